@@ -16,7 +16,17 @@ from .utils.fs import (
     read_file,
 )
 from .utils.generators import get_random_secure_string
-from .utils.ip import get_my_ipv4, get_ipv4_meta, get_ip_country
+from .utils.ip import (
+    get_my_ipv4,
+    get_ipv4_meta,
+    get_ipv4_meta_many,
+    get_ip_country,
+    get_ip_countries,
+    get_ip_country_code,
+    get_ip_country_codes,
+    IpSet,
+    IpMap,
+)
 from .utils.json_ import get_pretty_json, read_json, write_json, json_dumps_safe
 from .utils.lithuania import (
     validate_lt_id,
@@ -26,7 +36,16 @@ from .utils.lithuania import (
 from .utils.validators import is_email_valid
 from .utils.sql import get_inline_sql, get_conn_cur, init_db, close_connections
 from .utils.decorators import timer
+from .utils.ratelimit import RateLimiter, rate_limited
 from .utils.simplestore import DirStore
+from .utils.cache import LruCache, TieredCache, get_tiered_cache
+from .utils.http import (
+    get_http_client,
+    get_async_http_client,
+    set_http_client,
+    create_http_client,
+    create_async_http_client,
+)
 from .utils.string_ import human_readable_size, str_remove_except, str_keep_except
 from .services.iptoolkit import IpToolKit
 from .utils.image import (
@@ -66,7 +85,13 @@ __all__ = [
     # ip.py
     "get_my_ipv4",
     "get_ipv4_meta",
+    "get_ipv4_meta_many",
     "get_ip_country",
+    "get_ip_countries",
+    "get_ip_country_code",
+    "get_ip_country_codes",
+    "IpSet",
+    "IpMap",
     # json_.py
     "get_pretty_json",
     "read_json",
@@ -87,8 +112,21 @@ __all__ = [
     "IpToolKit",
     # decorators.py
     "timer",
+    # ratelimit.py
+    "RateLimiter",
+    "rate_limited",
     # simplestore.py
     "DirStore",
+    # cache.py
+    "LruCache",
+    "TieredCache",
+    "get_tiered_cache",
+    # http.py
+    "get_http_client",
+    "get_async_http_client",
+    "set_http_client",
+    "create_http_client",
+    "create_async_http_client",
     # string_.py
     "human_readable_size",
     "str_remove_except",
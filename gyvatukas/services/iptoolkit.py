@@ -1,18 +1,434 @@
+import bisect
 import csv
+import datetime
 import gzip
+import hashlib
+import heapq
+import io
 import logging
+import mmap
+import os
 import pathlib
-import tempfile
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import Callable, Iterable, Iterator, Sequence, TextIO
 
 import httpx
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from gyvatukas.exceptions import GyvatukasException
 from gyvatukas.internal import get_app_storage_path
+from gyvatukas.utils.cache import LruCache
 from gyvatukas.utils.dict_ import dict_get_by_path
-from gyvatukas.utils.ip import ip_to_int
-from gyvatukas.utils.sql import get_conn_cur
+from gyvatukas.utils.dt import get_dt_utc_now, get_utc_today
+from gyvatukas.utils.ip import ip_to_int, ipv6_to_int
+from gyvatukas.utils.sql import get_conn_cur, init_db
+from gyvatukas.utils.string_ import human_readable_size
 
 logger = logging.getLogger("gyvatukas.iptoolkit")
 
+IpRange = tuple[int, int, str]
+# Address family (4 or 6), start, end, country code.
+IpFamilyRange = tuple[int, int, int, str]
+_MISSING = object()
+# Sorted ips further apart than this are resolved by separate range queries, so sparse batches do not pull
+# every range in between through Python.
+_LOOKUP_MANY_MAX_GAP = 1 << 20
+
+
+def _pick_majority(active: Counter) -> str:
+    """Country code most providers agree on, ties go to the smallest code, same as in the SQL lookups."""
+    return min(active.items(), key=lambda item: (-item[1], item[0]))[0]
+
+
+def _iter_segments(ranges: Iterable[IpRange]) -> Iterator[IpRange]:
+    """Split (start, end, cc) ranges sorted by start into disjoint segments.
+
+    Where ranges of multiple providers overlap, the country code most providers agree on wins,
+    same as in the SQL lookup.
+    """
+    active: Counter = Counter()
+    ends: list[tuple[int, str]] = []  # Min-heap of (end + 1, cc) for active ranges.
+    pos = 0
+
+    def close_until(limit: int | None) -> Iterator[IpRange]:
+        nonlocal pos
+        while ends and (limit is None or ends[0][0] <= limit):
+            stop = ends[0][0]
+            if pos < stop:
+                yield pos, stop - 1, _pick_majority(active)
+                pos = stop
+            while ends and ends[0][0] == stop:
+                _, cc = heapq.heappop(ends)
+                active[cc] -= 1
+                if not active[cc]:
+                    del active[cc]
+
+    for start, end, cc in ranges:
+        yield from close_until(start)
+        if active and pos < start:
+            yield pos, start - 1, _pick_majority(active)
+        pos = start
+        active[cc] += 1
+        heapq.heappush(ends, (end + 1, cc))
+
+    yield from close_until(None)
+
+
+def _iter_flat_ranges(ranges: Iterable[IpRange]) -> Iterator[IpRange]:
+    """Flatten overlapping ranges sorted by start into disjoint ranges, merging adjacent ranges of same country."""
+    current: IpRange | None = None
+    for start, end, cc in _iter_segments(ranges):
+        if current and current[2] == cc and current[1] + 1 == start:
+            current = (current[0], end, cc)
+            continue
+        if current:
+            yield current
+        current = (start, end, cc)
+    if current:
+        yield current
+
+
+def _lookup_sorted(
+    ip_ints: Sequence[int], ranges: Iterable[IpRange]
+) -> list[str | None]:
+    """Resolve ips with a single merge pass over disjoint ranges sorted by start, return results in input order."""
+    results: list[str | None] = [None] * len(ip_ints)
+    ranges_iter = iter(ranges)
+    current = next(ranges_iter, None)
+
+    for i in sorted(range(len(ip_ints)), key=ip_ints.__getitem__):
+        ip_int = ip_ints[i]
+        while current is not None and current[1] < ip_int:
+            current = next(ranges_iter, None)
+        if current is None:
+            break
+        if current[0] <= ip_int:
+            results[i] = current[2]
+
+    return results
+
+
+class _ByteStream(io.RawIOBase):
+    """Readable file object over an iterator of byte chunks, e.g. httpx `iter_bytes()`.
+
+    Counts bytes read and computes sha256 checksum of everything read.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self._sha256 = hashlib.sha256()
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+            self._sha256.update(self._buffer)
+
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        self.bytes_read += n
+        return n
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def _get_file_sha256(path: pathlib.Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _parse_rows(
+    rows: Iterable[Sequence[str | None]], provider: str
+) -> Iterator[IpFamilyRange]:
+    """Parse (start ip, end ip, country code) rows, malformed rows are skipped and counted."""
+    skipped = 0
+    for row in rows:
+        if len(row) < 3 or not all(row[:3]):
+            skipped += 1
+            continue
+        ipf, ipt, cc = row[:3]
+        try:
+            if ":" in ipf:
+                yield 6, ipv6_to_int(ipf), ipv6_to_int(ipt), cc
+            else:
+                yield 4, ip_to_int(ipf), ip_to_int(ipt), cc
+        except ValueError:
+            skipped += 1
+    if skipped:
+        logger.warning(f"{provider}: skipped {skipped} malformed rows.")
+
+
+def _parse_rows_dbipcom(text_file: TextIO) -> Iterator[IpFamilyRange]:
+    # No header, columns: start ip, end ip, country code.
+    return _parse_rows(csv.reader(text_file), "db-ip.com")
+
+
+def _parse_rows_ipinfoio(text_file: TextIO) -> Iterator[IpFamilyRange]:
+    rows = (
+        (row.get("start_ip"), row.get("end_ip"), row.get("country"))
+        for row in csv.DictReader(text_file)
+    )
+    return _parse_rows(rows, "ipinfo.io")
+
+
+class _U128Array:
+    """Append-only sequence of 128-bit unsigned ints, stored as high/low halves in two `array("Q")`
+    (or read-only memoryviews of mmapped index file).
+
+    Supports indexing and `len()`, so it can be searched with `bisect`.
+    """
+
+    def __init__(
+        self,
+        hi: "array | memoryview | None" = None,
+        lo: "array | memoryview | None" = None,
+    ):
+        self.hi = hi if hi is not None else array("Q")
+        self.lo = lo if lo is not None else array("Q")
+
+    def __len__(self) -> int:
+        return len(self.hi)
+
+    def __getitem__(self, i: int) -> int:
+        return (self.hi[i] << 64) | self.lo[i]
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self.hi) + sys.getsizeof(self.lo)
+
+    def append(self, value: int) -> None:
+        self.hi.append(value >> 64)
+        self.lo.append(value & 0xFFFFFFFFFFFFFFFF)
+
+
+class IpRangeIndex:
+    """Disjoint ip ranges kept in compact sorted arrays, resolved with `bisect`.
+
+    - Range boundaries are stored in `array("I")` for ipv4 and as high/low `array("Q")` pairs for ipv6,
+      country codes as indexes into a small country code table.
+    - Build from overlapping provider ranges with `IpRangeIndex.from_ranges()`.
+    """
+
+    def __init__(
+        self,
+        starts: "array | memoryview | _U128Array",
+        ends: "array | memoryview | _U128Array",
+        cc_indexes: "array | memoryview",
+        cc_table: list[str],
+    ):
+        self.starts = starts
+        self.ends = ends
+        self.cc_indexes = cc_indexes
+        self.cc_table = cc_table
+
+    @classmethod
+    def from_ranges(
+        cls, ranges: Iterable[IpRange], ipv6: bool = False
+    ) -> "IpRangeIndex":
+        """Build index from (start, end, cc) ranges sorted by start, ranges may overlap."""
+        starts = _U128Array() if ipv6 else array("I")
+        ends = _U128Array() if ipv6 else array("I")
+        cc_indexes = array("H")
+        cc_table: list[str] = []
+        cc_lookup: dict[str, int] = {}
+
+        for start, end, cc in _iter_flat_ranges(ranges):
+            if cc not in cc_lookup:
+                cc_lookup[cc] = len(cc_table)
+                cc_table.append(cc)
+            starts.append(start)
+            ends.append(end)
+            cc_indexes.append(cc_lookup[cc])
+
+        return cls(starts=starts, ends=ends, cc_indexes=cc_indexes, cc_table=cc_table)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def lookup(self, ip_int: int) -> str | None:
+        """Return country code for given ip as int or None."""
+        i = bisect.bisect_right(self.starts, ip_int) - 1
+        if i >= 0 and ip_int <= self.ends[i]:
+            return self.cc_table[self.cc_indexes[i]]
+        return None
+
+    def lookup_many(self, ip_ints: Sequence[int]) -> list[str | None]:
+        """Return country codes for given ips as ints in input order.
+
+        Ips are sorted and resolved in one pass, each bisect only searches the part of the index after previous match.
+        """
+        results: list[str | None] = [None] * len(ip_ints)
+        lo = 0
+
+        for i in sorted(range(len(ip_ints)), key=ip_ints.__getitem__):
+            ip_int = ip_ints[i]
+            lo = max(bisect.bisect_right(self.starts, ip_int, lo) - 1, 0)
+            if lo < len(self.starts) and self.starts[lo] <= ip_int <= self.ends[lo]:
+                results[i] = self.cc_table[self.cc_indexes[lo]]
+
+        return results
+
+    def lookup_array(self, ip_ints: "np.ndarray") -> "np.ndarray":
+        """Vectorized lookup of numpy array of ips as ints, returns object array of country codes or None."""
+        starts = np.frombuffer(self.starts, dtype=f"u{self.starts.itemsize}")
+        ends = np.frombuffer(self.ends, dtype=f"u{self.ends.itemsize}")
+        cc_indexes = np.frombuffer(
+            self.cc_indexes, dtype=f"u{self.cc_indexes.itemsize}"
+        )
+        cc_table = np.array([*self.cc_table, None], dtype=object)
+
+        if not len(starts):
+            return np.full(ip_ints.shape, None, dtype=object)
+
+        ip_ints = ip_ints.astype(np.int64, copy=False)
+        positions = np.searchsorted(starts, ip_ints, side="right") - 1
+        clipped = positions.clip(0, len(starts) - 1)
+        found = (positions >= 0) & (ip_ints <= ends[clipped])
+        return cc_table[np.where(found, cc_indexes[clipped], len(self.cc_table))]
+
+    def get_memory_usage(self) -> dict:
+        """Return approximate memory footprint of the index."""
+        arrays_bytes = sum(
+            sys.getsizeof(a) for a in (self.starts, self.ends, self.cc_indexes)
+        )
+        cc_table_bytes = sys.getsizeof(self.cc_table) + sum(
+            sys.getsizeof(cc) for cc in self.cc_table
+        )
+        total_bytes = arrays_bytes + cc_table_bytes
+        return {
+            "ranges": len(self),
+            "countries": len(self.cc_table),
+            "arrays_bytes": arrays_bytes,
+            "cc_table_bytes": cc_table_bytes,
+            "total_bytes": total_bytes,
+            "total_human": human_readable_size(total_bytes),
+        }
+
+
+_INDEX_FILE_MAGIC = b"GYVIPIX1"
+# Magic, byte order (b"l" or b"b"), ipv4 range count, ipv6 range count, country code count.
+_INDEX_FILE_HEADER = struct.Struct("<8sc3xIII")
+_INDEX_FILE_BYTE_ORDER = sys.byteorder[0].encode()
+
+
+def write_index_file(
+    path: pathlib.Path, index: IpRangeIndex, index6: IpRangeIndex
+) -> None:
+    """Write ipv4 and ipv6 indexes into binary file for `mmap_index_file()`, existing file is replaced atomically.
+
+    Layout: header, country code table (2 ascii bytes per code), then 8 byte aligned native byte order sections:
+    ipv4 starts, ends (u32), country indexes (u16), ipv6 starts high, low, ends high, low (u64), country indexes (u16).
+    """
+    cc_table = list(index.cc_table)
+    for cc in index6.cc_table:
+        if cc not in cc_table:
+            cc_table.append(cc)
+    cc6_remap = [cc_table.index(cc) for cc in index6.cc_table]
+
+    for cc in cc_table:
+        if len(cc.encode("ascii")) > 2:
+            raise ValueError(f"Country code `{cc}` does not fit into 2 bytes.")
+
+    sections = [
+        index.starts,
+        index.ends,
+        index.cc_indexes,
+        index6.starts.hi,
+        index6.starts.lo,
+        index6.ends.hi,
+        index6.ends.lo,
+        array("H", (cc6_remap[i] for i in index6.cc_indexes)),
+    ]
+
+    path_tmp = path.with_name(path.name + ".tmp")
+    with open(path_tmp, "wb") as f:
+        f.write(
+            _INDEX_FILE_HEADER.pack(
+                _INDEX_FILE_MAGIC,
+                _INDEX_FILE_BYTE_ORDER,
+                len(index),
+                len(index6),
+                len(cc_table),
+            )
+        )
+        f.write(b"".join(cc.encode("ascii").ljust(2, b"\0") for cc in cc_table))
+        for section in sections:
+            f.write(b"\0" * (-f.tell() % 8))
+            f.write(section)
+
+    # Processes that already mapped old file keep reading it until they reopen.
+    os.replace(path_tmp, path)
+
+
+def mmap_index_file(path: pathlib.Path) -> tuple[IpRangeIndex, IpRangeIndex]:
+    """Map index file written by `write_index_file()` read-only into memory, return ipv4 and ipv6 indexes.
+
+    Nothing is copied, indexes search the mapped file directly, so all processes share one page cache copy.
+    """
+    truncated = GyvatukasException(f"{path} is truncated, recompile it.")
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _INDEX_FILE_HEADER.size:
+            raise truncated
+        view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    magic, byte_order, n4, n6, n_cc = _INDEX_FILE_HEADER.unpack_from(view)
+    if magic != _INDEX_FILE_MAGIC:
+        raise GyvatukasException(f"{path} is not an IpToolKit index file.")
+    if byte_order != _INDEX_FILE_BYTE_ORDER:
+        raise GyvatukasException(
+            f"{path} was compiled on a machine with different byte order, recompile it."
+        )
+
+    offset = _INDEX_FILE_HEADER.size
+    if offset + n_cc * 2 > len(view):
+        raise truncated
+    cc_table = [
+        bytes(view[offset + i * 2 : offset + i * 2 + 2]).rstrip(b"\0").decode("ascii")
+        for i in range(n_cc)
+    ]
+    offset += n_cc * 2
+
+    def take(fmt: str, n: int) -> memoryview:
+        nonlocal offset
+        offset += -offset % 8
+        size = struct.calcsize(fmt) * n
+        if offset + size > len(view):
+            raise truncated
+        section = view[offset : offset + size].cast(fmt)
+        offset += size
+        return section
+
+    index = IpRangeIndex(
+        starts=take("I", n4),
+        ends=take("I", n4),
+        cc_indexes=take("H", n4),
+        cc_table=cc_table,
+    )
+    starts6 = _U128Array(hi=take("Q", n6), lo=take("Q", n6))
+    ends6 = _U128Array(hi=take("Q", n6), lo=take("Q", n6))
+    index6 = IpRangeIndex(
+        starts=starts6, ends=ends6, cc_indexes=take("H", n6), cc_table=cc_table
+    )
+    return index, index6
+
 
 class IpToolKit:
     """Simple ip to country lookup tool based on free ip databases.
@@ -20,6 +436,20 @@ class IpToolKit:
     - If provider config is not passed, only db-ip.com database will be used.
     - Currently supported providers: db-ip.com, ipinfo.io.
     - Do not forget to run setup_db() when changing provider config to get new data.
+    - Both ipv4 and ipv6 ranges are imported. Ipv6 boundaries are stored as 16 byte big-endian blobs, which sort
+      correctly, so ipv6 lookup is a single index seek per provider.
+    - Pass `in_memory=True` to load ranges from the database into an `IpRangeIndex` and resolve lookups
+      in memory, without SQLite round trips. Costs a few MB of memory per provider.
+    - Results of `get_country_by_ip()` are kept in a per-instance LRU cache of `cache_size` entries
+      (0 disables it), cache is cleared whenever setup_db() reloads data. See get_stats() for hit rate.
+    - Databases are streamed from download through gzip and csv into chunked inserts, pass `progress_callback`
+      to receive `{"provider", "rows", "bytes_read", "bytes_total"}` after every inserted chunk.
+    - Dataset version and checksum are recorded per provider, setup_db() skips datasets that are already imported.
+    - For offline setups pass `auto_setup=False`, which creates empty database instead of downloading data,
+      and import local csv/csv.gz files with import_file().
+    - For many worker processes, compile ranges once with compile_index_file() and start workers with
+      `IpToolKit(index_path=path)`. Workers binary-search the file through read-only `mmap`, sharing one page cache
+      copy, and never touch the database, so only lookups are available to them.
 
     Provider configuration:
     # TODO: Document ant validate. If key matches, validate that all info passed.
@@ -31,6 +461,28 @@ class IpToolKit:
 
     """
 
+    INSERT_CHUNK_SIZE = 10_000
+    READ_CHUNK_SIZE = 64 * 1024
+    DOWNLOAD_TIMEOUT = 60
+    PROVIDER_ROW_PARSERS = {
+        "db-ip.com": _parse_rows_dbipcom,
+        "ipinfo.io": _parse_rows_ipinfoio,
+    }
+
+    # Table per address family: name, columns, index columns. Used to build shadow tables during reloads.
+    TABLES = {
+        4: (
+            "ip_to_country",
+            "ipf INTEGER, ipt INTEGER, cc CHAR(2), provider TEXT",
+            "ipf, ipt",
+        ),
+        6: (
+            "ip6_to_country",
+            "ipf BLOB, ipt BLOB, cc CHAR(2), provider TEXT",
+            "provider, ipf",
+        ),
+    }
+
     DB_SCHEMA = """
         CREATE TABLE IF NOT EXISTS ip_to_country (
             ipf INTEGER,
@@ -39,163 +491,513 @@ class IpToolKit:
             provider TEXT
         );
         CREATE INDEX IF NOT EXISTS ip_to_country_idx ON ip_to_country (ipf, ipt);
+        CREATE TABLE IF NOT EXISTS ip6_to_country (
+            ipf BLOB,
+            ipt BLOB,
+            cc CHAR(2),
+            provider TEXT
+        );
+        CREATE INDEX IF NOT EXISTS ip6_to_country_idx ON ip6_to_country (provider, ipf);
+        CREATE TABLE IF NOT EXISTS ip_to_country_meta (
+            provider TEXT PRIMARY KEY,
+            version TEXT,
+            checksum TEXT,
+            rows INTEGER,
+            updated_at TEXT
+        );
     """
 
     def __init__(
-        self, provider_config: dict | None = None, db_path: pathlib.Path | None = None
+        self,
+        provider_config: dict | None = None,
+        db_path: pathlib.Path | None = None,
+        in_memory: bool = False,
+        cache_size: int = 1024,
+        progress_callback: Callable[[dict], None] | None = None,
+        auto_setup: bool = True,
+        index_path: pathlib.Path | None = None,
     ):
         self.provider_config = provider_config or {}
         self.path_db = db_path or get_app_storage_path() / "iptoolkit.db"
+        self.in_memory = in_memory
+        self._index: IpRangeIndex | None = None
+        self._index6: IpRangeIndex | None = None
+        self._cache: LruCache | None = LruCache(cache_size) if cache_size else None
+        self.progress_callback = progress_callback
+        self.index_only = index_path is not None
+
+        if self.index_only:
+            self.open_index_file(index_path)
+            return
 
-        if not self.db_exists():
+        db_existed = self.db_exists()
+        init_db(self.path_db, self.DB_SCHEMA)
+
+        if not db_existed and auto_setup:
             logger.warning("IpToolKit database not found, setting up...")
             self.setup_db()
 
+        if self.in_memory and self._index is None:
+            self.load_index()
+
     def db_exists(self) -> bool:
         return self.path_db.exists()
 
-    def _insert_into_db(self, entries: list[dict]) -> None:
+    def _report_progress(
+        self, provider: str, rows: int, bytes_read: int, bytes_total: int | None
+    ) -> None:
+        logger.debug(
+            f"{provider}: inserted {rows} rows, read {bytes_read}/{bytes_total or '?'} bytes."
+        )
+        if self.progress_callback:
+            self.progress_callback(
+                {
+                    "provider": provider,
+                    "rows": rows,
+                    "bytes_read": bytes_read,
+                    "bytes_total": bytes_total,
+                }
+            )
+
+    def _get_meta(self, provider: str) -> dict:
+        """Return version, checksum, row count and update time of last import of given provider."""
+        with get_conn_cur(self.path_db) as (conn, cur):
+            cur.execute(
+                "SELECT version, checksum, rows, updated_at FROM ip_to_country_meta WHERE provider = :provider",
+                {"provider": provider},
+            )
+            return cur.fetchone() or {}
+
+    def _insert_into_db(
+        self,
+        provider: str,
+        ranges: Iterable[IpFamilyRange],
+        on_chunk: Callable[[int], None] | None = None,
+        get_meta: Callable[[], dict] | None = None,
+    ) -> int:
+        """Replace provider rows with given ranges. Return row count.
+
+        Rows of other providers and new rows are loaded into unindexed shadow tables, indexes are built after the load
+        and shadow tables are swapped in place of the live ones within the same transaction. Database runs in WAL
+        mode, so concurrent lookups keep reading the previous data until the swap is committed.
+
+        `get_meta` is called after all ranges are consumed, its version and checksum are stored with the swap.
+        """
+        rows = 0
+        chunks: dict[int, list[tuple]] = {family: [] for family in self.TABLES}
+
         with get_conn_cur(self.path_db) as (conn, cur):
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.executescript(self.DB_SCHEMA)
+            conn.execute("BEGIN IMMEDIATE")
+
+            for table, columns, _ in self.TABLES.values():
+                conn.execute(f"DROP TABLE IF EXISTS {table}_shadow")
+                conn.execute(f"CREATE TABLE {table}_shadow ({columns})")
+                conn.execute(
+                    f"INSERT INTO {table}_shadow SELECT ipf, ipt, cc, provider FROM {table} WHERE provider != :provider",
+                    {"provider": provider},
+                )
+
+            def flush(family: int) -> None:
+                nonlocal rows
+                conn.executemany(
+                    f"INSERT INTO {self.TABLES[family][0]}_shadow(ipf, ipt, cc, provider) VALUES (?, ?, ?, ?)",
+                    chunks[family],
+                )
+                rows += len(chunks[family])
+                chunks[family] = []
+                if on_chunk:
+                    on_chunk(rows)
+
+            for family, ipf, ipt, cc in ranges:
+                if family == 6:
+                    ipf, ipt = ipf.to_bytes(16, "big"), ipt.to_bytes(16, "big")
+                chunks[family].append((ipf, ipt, cc, provider))
+                if len(chunks[family]) >= self.INSERT_CHUNK_SIZE:
+                    flush(family)
+
+            for family in self.TABLES:
+                if chunks[family]:
+                    flush(family)
 
-            # Drop existing provider data.
+            # Swap, old indexes are dropped together with old tables.
+            for table, _, index_columns in self.TABLES.values():
+                conn.execute(f"DROP TABLE {table}")
+                conn.execute(f"ALTER TABLE {table}_shadow RENAME TO {table}")
+                conn.execute(f"CREATE INDEX {table}_idx ON {table} ({index_columns})")
+
+            meta = get_meta() if get_meta else {}
             conn.execute(
-                "DELETE FROM ip_to_country WHERE provider = :provider",
-                {"provider": entries[0]["provider"]},
+                "INSERT OR REPLACE INTO ip_to_country_meta(provider, version, checksum, rows, updated_at) VALUES (:provider, :version, :checksum, :rows, :updated_at)",
+                {
+                    "provider": provider,
+                    "version": meta.get("version"),
+                    "checksum": meta.get("checksum"),
+                    "rows": rows,
+                    "updated_at": get_dt_utc_now().isoformat(),
+                },
             )
 
-            conn.executemany(
-                "INSERT INTO ip_to_country(ipf, ipt, cc, provider) VALUES (:ipf, :ipt, :cc, :provider)",
-                entries,
-            )
-            conn.commit()
+        return rows
 
-    def _setup_dbipcom(self) -> None:
-        logger.info("Setting up db-ip.com database.")
+    def _ingest(
+        self,
+        provider: str,
+        chunks: Iterable[bytes],
+        bytes_total: int | None = None,
+        version: str | None = None,
+        gzipped: bool = True,
+    ) -> int:
+        """Stream csv (gzipped by default) of given provider from byte chunks into database. Return row count."""
+        stream = _ByteStream(chunks)
+        parse_rows = self.PROVIDER_ROW_PARSERS[provider]
 
-        url = "https://download.db-ip.com/free/dbip-country-lite-2024-12.csv.gz"
-        entries: list[dict] = []
+        binary_file = io.BufferedReader(stream)
+        if gzipped:
+            binary_file = gzip.GzipFile(fileobj=binary_file)
 
-        with (
-            tempfile.TemporaryDirectory() as temp_dir,
-        ):
-            gz_path = pathlib.Path(temp_dir) / "data.csv.gz"
+        with io.TextIOWrapper(binary_file, encoding="utf-8", newline="") as text_file:
+            rows = self._insert_into_db(
+                provider=provider,
+                ranges=parse_rows(text_file),
+                on_chunk=lambda n: self._report_progress(
+                    provider, n, stream.bytes_read, bytes_total
+                ),
+                get_meta=lambda: {"version": version, "checksum": stream.hexdigest()},
+            )
+
+        logger.info(f"Inserted {rows} {provider} rows into IpToolKit database.")
+        return rows
 
-            # Download the file
-            response = httpx.get(url)
+    def _ingest_url(
+        self, provider: str, url: str, version: str | None = None, force: bool = False
+    ) -> int | None:
+        """Stream gzipped csv of given provider from url into database.
 
+        Without explicit `version`, ETag or Last-Modified header is used. Download is skipped if version matches
+        last import. Return row count or None if skipped or download failed.
+        """
+        with httpx.stream(
+            "GET", url, follow_redirects=True, timeout=self.DOWNLOAD_TIMEOUT
+        ) as response:
             if response.status_code != 200:
                 logger.warning(
-                    f"Could not download db-ip.com database @ {url} with http {response.status_code}, please investigate."
+                    f"Could not download {provider} database @ {url} with http {response.status_code}, please investigate."
                 )
-                return
-
-            with open(gz_path, "wb") as f:
-                for chunk in response.iter_bytes():
-                    f.write(chunk)
-
-            # Read and yield rows directly from gz file
-            with gzip.open(gz_path, "rt", encoding="utf-8") as gz_file:
-                reader = csv.DictReader(gz_file)
-
-                for row in reader:
-                    try:
-                        entries.append(
-                            {
-                                "ipf": ip_to_int(row["0.0.0.0"]),
-                                "ipt": ip_to_int(row["0.255.255.255"]),
-                                "cc": row["ZZ"],
-                                "provider": "db-ip.com",
-                            }
-                        )
-                    except Exception:
-                        pass
-
-        self._insert_into_db(entries)
-
-    def _setup_ipinfoio(self) -> None:
+                return None
+
+            version = (
+                version
+                or response.headers.get("ETag")
+                or response.headers.get("Last-Modified")
+            )
+            if (
+                not force
+                and version
+                and self._get_meta(provider).get("version") == version
+            ):
+                logger.info(f"{provider} database `{version}` is up to date, skipping.")
+                return None
+
+            content_length = response.headers.get("Content-Length")
+            return self._ingest(
+                provider=provider,
+                chunks=response.iter_bytes(),
+                bytes_total=int(content_length) if content_length else None,
+                version=version,
+            )
+
+    def _setup_dbipcom(self, force: bool = False) -> int | None:
+        logger.info("Setting up db-ip.com database.")
+
+        # Released monthly, current month might not be published during first days of the month.
+        this_month = get_utc_today().replace(day=1)
+        last_month = (this_month - datetime.timedelta(days=1)).replace(day=1)
+
+        for month in (this_month, last_month):
+            version = month.strftime("%Y-%m")
+            if not force and self._get_meta("db-ip.com").get("version") == version:
+                logger.info(f"db-ip.com database `{version}` is up to date, skipping.")
+                return None
+
+            url = f"https://download.db-ip.com/free/dbip-country-lite-{version}.csv.gz"
+            rows = self._ingest_url(
+                provider="db-ip.com", url=url, version=version, force=force
+            )
+            if rows is not None:
+                return rows
+
+        return None
+
+    def _setup_ipinfoio(self, force: bool = False) -> int | None:
         logger.info("Setting up ipinfo.io database.")
 
         token = dict_get_by_path(self.provider_config, "ipinfo.io/token", "/")
         if not token:
             logger.warning("Cannot setup ipinfo.io database, token is not in config.")
-            return
+            return None
 
         url = "https://ipinfo.io/data/free/country.csv.gz?token={token}".format(
             token=token
         )
-        entries: list[dict] = []
+        return self._ingest_url(provider="ipinfo.io", url=url, force=force)
 
-        with (
-            tempfile.TemporaryDirectory() as temp_dir,
-        ):
-            gz_path = pathlib.Path(temp_dir) / "data.csv.gz"
+    def _on_data_changed(self) -> None:
+        if self.in_memory:
+            self.load_index()
+        if self._cache is not None:
+            self._cache.clear()
+
+    def setup_db(self, force: bool = False) -> None:
+        """Download and import provider databases. Providers whose dataset is already imported are skipped,
+        unless `force`."""
+        changed = False
 
-            # Download the file
-            response = httpx.get(url)
-            if response.status_code not in [200, 302]:
-                logger.warning(
-                    f"Could not download ipinfo.io database @ {url} with http {response.status_code}, please investigate."
-                )
-                return
-
-            # If 302, extract download url.
-            if response.status_code == 302:
-                url = response.headers["Location"]
-                response = httpx.get(url)
-                if response.status_code != 200:
-                    logger.warning(
-                        f"Could not download ipinfo.io database @ {url} with http {response.status_code}, please investigate."
-                    )
-                    return
-
-            with open(gz_path, "wb") as f:
-                for chunk in response.iter_bytes():
-                    f.write(chunk)
-
-            # Read and yield rows directly from gz file
-            with gzip.open(gz_path, "rt", encoding="utf-8") as gz_file:
-                reader = csv.DictReader(gz_file)
-
-                for row in reader:
-                    try:
-                        entries.append(
-                            {
-                                "ipf": ip_to_int(row["start_ip"]),
-                                "ipt": ip_to_int(row["end_ip"]),
-                                "cc": row["country"],
-                                "provider": "ipinfo.io",
-                            }
-                        )
-                    except Exception:
-                        pass
-
-        self._insert_into_db(entries)
-
-    def setup_db(self) -> None:
         # Always setup db-ip.com since their db is free and no signup required.
         if "ipinfo.io" in self.provider_config:
-            self._setup_ipinfoio()
+            changed |= self._setup_ipinfoio(force=force) is not None
+
+        changed |= self._setup_dbipcom(force=force) is not None
+
+        if changed:
+            self._on_data_changed()
 
-        self._setup_dbipcom()
+    def import_file(
+        self,
+        path: pathlib.Path,
+        provider: str = "db-ip.com",
+        version: str | None = None,
+        force: bool = False,
+    ) -> int | None:
+        """Import provider database from local csv or csv.gz file, no network required.
+
+        - `version` defaults to the file name.
+        - Skipped if file checksum matches last import of this provider, unless `force`.
+
+        Return row count or None if skipped.
+        """
+        if provider not in self.PROVIDER_ROW_PARSERS:
+            raise ValueError(
+                f"Unknown provider `{provider}`, expected one of {list(self.PROVIDER_ROW_PARSERS)}"
+            )
+
+        checksum = _get_file_sha256(path)
+        if not force and self._get_meta(provider).get("checksum") == checksum:
+            logger.info(f"{provider} database @ {path} is already imported, skipping.")
+            return None
+
+        with open(path, "rb") as f:
+            gzipped = f.read(2) == b"\x1f\x8b"
+            f.seek(0)
+            rows = self._ingest(
+                provider=provider,
+                chunks=iter(lambda: f.read(self.READ_CHUNK_SIZE), b""),
+                bytes_total=path.stat().st_size,
+                version=version or path.name,
+                gzipped=gzipped,
+            )
+
+        self._on_data_changed()
+        return rows
+
+    def _build_indexes(self) -> tuple[IpRangeIndex, IpRangeIndex]:
+        with get_conn_cur(self.path_db) as (conn, cur):
+            rows = conn.execute("SELECT ipf, ipt, cc FROM ip_to_country ORDER BY ipf")
+            index = IpRangeIndex.from_ranges(rows)
+            rows6 = conn.execute("SELECT ipf, ipt, cc FROM ip6_to_country ORDER BY ipf")
+            index6 = IpRangeIndex.from_ranges(
+                (
+                    (int.from_bytes(ipf, "big"), int.from_bytes(ipt, "big"), cc)
+                    for ipf, ipt, cc in rows6
+                ),
+                ipv6=True,
+            )
+        return index, index6
+
+    def load_index(self) -> IpRangeIndex:
+        """Load ipv4 and ipv6 ranges from database into memory, further lookups are resolved without SQLite.
+
+        Return ipv4 index.
+        """
+        index, index6 = self._build_indexes()
+        self._index, self._index6 = index, index6
+        for name, i in (("ipv4", index), ("ipv6", index6)):
+            usage = i.get_memory_usage()
+            logger.info(
+                f"Loaded {usage['ranges']} {name} ranges into memory, using {usage['total_human']}."
+            )
+        return self._index
+
+    def compile_index_file(self, path: pathlib.Path | None = None) -> pathlib.Path:
+        """Compile ranges from database into binary index file, see `write_index_file()`. Return path of the file.
+
+        Run again after setup_db() or import_file() to publish new data, workers pick it up with open_index_file().
+        """
+        path = path or self.path_db.with_suffix(".idx")
+        write_index_file(path, *self._build_indexes())
+        logger.info(f"Compiled IpToolKit index file @ {path}.")
+        return path
+
+    def open_index_file(self, path: pathlib.Path) -> None:
+        """Resolve further lookups from index file compiled by compile_index_file(), mapped read-only."""
+        self._index, self._index6 = mmap_index_file(path)
+        if self._cache is not None:
+            self._cache.clear()
+
+    def get_country_by_ip(self, ip: str) -> str | None:
+        """Given ipv4 or ipv6 address, return best matched country code or None."""
+        if self._cache is None:
+            return self._lookup(ip)
+
+        result = self._cache.get(ip, _MISSING)
+        if result is _MISSING:
+            result = self._lookup(ip)
+            self._cache.set(ip, result)
+        return result
 
     def get_country_by_ipv4(self, ipv4: str) -> str | None:
         """Given ipv4 address, return best matched country code or None."""
+        return self.get_country_by_ip(ipv4)
+
+    def get_country_by_ipv6(self, ipv6: str) -> str | None:
+        """Given ipv6 address, return best matched country code or None."""
+        return self.get_country_by_ip(ipv6)
+
+    def _lookup(self, ip: str) -> str | None:
+        if ":" in ip:
+            return self._lookup_ipv6(ip)
+
         # todo: Validate IP4.
-        ip_int = ip_to_int(ipv4)
+        ip_int = ip_to_int(ip)
+        if self._index is not None:
+            return self._index.lookup(ip_int)
+
         with get_conn_cur(self.path_db) as (conn, cur):
             cur.execute(
-                "SELECT cc, COUNT(*) as count FROM ip_to_country WHERE ipf <= :ipf AND ipt >= :ipt GROUP BY cc ORDER BY count DESC LIMIT 1",
+                "SELECT cc, COUNT(*) as count FROM ip_to_country WHERE ipf <= :ipf AND ipt >= :ipt GROUP BY cc ORDER BY count DESC, cc LIMIT 1",
                 {"ipf": ip_int, "ipt": ip_int},
             )
             result = cur.fetchone()
             return result["cc"] if result else None
 
+    def _lookup_ipv6(self, ipv6: str) -> str | None:
+        ip_int = ipv6_to_int(ipv6)
+        if self._index6 is not None:
+            return self._index6.lookup(ip_int)
+
+        # Per provider, a single seek on (provider, ipf) finds the closest range starting at or before the ip.
+        with get_conn_cur(self.path_db) as (conn, cur):
+            cur.execute(
+                """
+                SELECT cc, COUNT(*) AS count FROM (
+                    SELECT (
+                        SELECT CASE WHEN ipt >= :ip THEN cc END FROM ip6_to_country
+                        WHERE provider = m.provider AND ipf <= :ip
+                        ORDER BY ipf DESC LIMIT 1
+                    ) AS cc FROM ip_to_country_meta AS m
+                ) WHERE cc IS NOT NULL GROUP BY cc ORDER BY count DESC, cc LIMIT 1
+                """,
+                {"ip": ip_int.to_bytes(16, "big")},
+            )
+            result = cur.fetchone()
+            return result["cc"] if result else None
+
+    def get_countries_by_ipv4(
+        self, ipv4s: "Iterable[str] | np.ndarray"
+    ) -> "list[str | None] | np.ndarray":
+        """Given ipv4 addresses, return best matched country codes or None in input order.
+
+        - Addresses are sorted and resolved in a single merge pass against sorted ip ranges, using in-memory index
+          if loaded, otherwise ranges are streamed from database once per call.
+        - If numpy is installed, also accepts numpy array of ipv4 strings or ints and returns numpy object array.
+        """
+        if np is not None and isinstance(ipv4s, np.ndarray):
+            if ipv4s.dtype.kind in "iu":
+                ip_ints = ipv4s
+            else:
+                ip_ints = np.fromiter(
+                    (ip_to_int(ip) for ip in ipv4s), dtype=np.int64, count=len(ipv4s)
+                )
+            if self._index is not None:
+                return self._index.lookup_array(ip_ints)
+            return np.array(self._lookup_many(ip_ints.tolist()), dtype=object)
+
+        return self._lookup_many([ip_to_int(ip) for ip in ipv4s])
+
+    def get_stats(self) -> dict:
+        """Return row counts and imported dataset info per provider, lookup cache counters and in-memory index
+        footprint. Index-only workers have no database, their row stats are None."""
+        rows_per_provider, providers = None, None
+        if not self.index_only:
+            rows_per_provider, providers = self._get_db_stats()
+
+        return {
+            "rows_total": sum(rows_per_provider.values())
+            if rows_per_provider is not None
+            else None,
+            "rows_per_provider": rows_per_provider,
+            "providers": providers,
+            "cache": self._cache.get_stats() if self._cache is not None else None,
+            "index": self._index.get_memory_usage()
+            if self._index is not None
+            else None,
+            "index6": self._index6.get_memory_usage()
+            if self._index6 is not None
+            else None,
+        }
+
+    def _get_db_stats(self) -> tuple[dict, dict]:
+        with get_conn_cur(self.path_db) as (conn, cur):
+            cur.execute(
+                """
+                SELECT provider, COUNT(*) AS count FROM (
+                    SELECT provider FROM ip_to_country UNION ALL SELECT provider FROM ip6_to_country
+                ) GROUP BY provider
+                """
+            )
+            rows_per_provider = {
+                row["provider"]: row["count"] for row in cur.fetchall()
+            }
+            cur.execute("SELECT * FROM ip_to_country_meta")
+            providers = {row.pop("provider"): row for row in cur.fetchall()}
+        return rows_per_provider, providers
+
+    def _lookup_many(self, ip_ints: list[int]) -> list[str | None]:
+        if not ip_ints:
+            return []
+        if self._index is not None:
+            return self._index.lookup_many(ip_ints)
+
+        spans: list[list[int]] = []  # [lo, hi] of ip clusters.
+        for ip_int in sorted(set(ip_ints)):
+            if spans and ip_int - spans[-1][1] <= _LOOKUP_MANY_MAX_GAP:
+                spans[-1][1] = ip_int
+            else:
+                spans.append([ip_int, ip_int])
+
+        def iter_ranges(conn) -> Iterator[IpRange]:
+            for lo, hi in spans:
+                rows = conn.execute(
+                    "SELECT ipf, ipt, cc FROM ip_to_country WHERE ipf <= :hi AND ipt >= :lo ORDER BY ipf",
+                    {"lo": lo, "hi": hi},
+                )
+                # Clipped to span, ranges beyond it miss rows starting after hi.
+                for start, end, cc in _iter_flat_ranges(rows):
+                    yield max(start, lo), min(end, hi), cc
+
+        with get_conn_cur(self.path_db) as (conn, cur):
+            return _lookup_sorted(ip_ints, iter_ranges(conn))
+
 
 if __name__ == "__main__":
     iptk = IpToolKit()
     print(iptk.get_country_by_ipv4("8.8.8.8"))
 
+    iptk_mem = IpToolKit(in_memory=True)
+    print(iptk_mem.get_country_by_ipv4("8.8.8.8"))
+    print(iptk_mem._index.get_memory_usage())
+
 """
 Rewrite current logic to use class based approach
 Each provider is a class.
@@ -206,7 +1008,6 @@ IpToolKit
  init(config: dict, base_dir: pathlib.Path)
    create provider instances based on config, call their setup methods.
  get_country_by_ipv4(ipv4: str) -> str | None
-   add lru cache
  get_stats() -> dict
    total rows, rows per provider
 
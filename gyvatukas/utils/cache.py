@@ -0,0 +1,274 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable
+
+import diskcache
+
+from gyvatukas.internal import get_app_cache
+
+_MISSING = object()
+_tiered_caches: dict[tuple[str, bool], "TieredCache"] = {}
+_tiered_caches_lock = threading.Lock()
+
+
+class LruCache:
+    """Thread-safe bounded in-memory cache that evicts least recently used entries.
+
+    Keeps hit/miss/eviction counters, see `get_stats()`. Since `None` can be a valid cached value,
+    pass own sentinel as `default` to tell misses apart. Pass `ttl` seconds to expire entries, expired
+    entries are dropped lazily on access and count as misses.
+
+    Usage:
+        >>> cache = LruCache(maxsize=2)
+        >>> cache.set("a", 1)
+        >>> cache.set("b", 2)
+        >>> cache.get("a")  # 1, "a" is now most recently used.
+        >>> cache.set("c", 3)  # Evicts "b".
+        >>> cache.get("b")  # None
+        >>> print(cache.get_stats())
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl must be positive, got {ttl}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and (item[1] is None or item[1] > time.monotonic())
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Store value, `ttl` overrides cache wide ttl for this entry."""
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """Drop all entries, counters are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TieredCache:
+    """Two tier TTL cache: in-memory `LruCache` in front of optional `diskcache.Cache`.
+
+    Memory tier keeps hot entries, disk tier survives restarts and is shared between processes.
+    Disk keys are prefixed with `namespace`, so one app cache can hold many tiered caches.
+    Use `get_or_set()` to compute missing values, concurrent calls for the same key wait for
+    single computation instead of repeating it.
+
+    Usage:
+        >>> cache = TieredCache("ip_meta", ttl=3600, disk=get_app_cache())
+        >>> cache.get_or_set("8.8.8.8", lambda: get_ipv4_meta("8.8.8.8", use_cache=False))
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        maxsize: int = 1024,
+        disk: diskcache.Cache | None = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.memory = LruCache(maxsize=maxsize, ttl=ttl)
+        self.disk = disk
+        self.disk_hits = 0
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, Future] = {}
+
+    def _disk_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.disk is None:
+            return default
+
+        value, expire_time = self.disk.get(
+            self._disk_key(key), default=_MISSING, expire_time=True
+        )
+        if value is _MISSING:
+            return default
+        self.disk_hits += 1
+        # Promote to memory tier for the rest of entry lifetime.
+        remaining = expire_time - time.time() if expire_time is not None else None
+        if remaining is None or remaining > 0:
+            self.memory.set(key, value, ttl=remaining)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(self._disk_key(key), value, expire=self.ttl)
+
+    def delete(self, key: Hashable) -> bool:
+        deleted = self.memory.delete(key)
+        if self.disk is not None:
+            deleted = self.disk.delete(self._disk_key(key)) or deleted
+        return deleted
+
+    def get_or_set(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Return cached value or compute it with `func()` and cache it.
+
+        Concurrent callers of a missing key share one `func()` call and its result or exception.
+        `None` results are returned but not cached, so failed lookups are retried next time.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not is_owner:
+            return future.result()
+
+        try:
+            value = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            if value is not None:
+                self.set(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    async def get_or_set_async(
+        self, key: Hashable, func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Async version of `get_or_set()`, concurrent callers are not coalesced."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = await func()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def get_stats(self) -> dict:
+        return {
+            "namespace": self.namespace,
+            "ttl": self.ttl,
+            "memory": self.memory.get_stats(),
+            "disk_hits": self.disk_hits,
+        }
+
+
+def get_tiered_cache(
+    namespace: str, ttl: float, maxsize: int = 1024, disk: bool = True
+) -> TieredCache:
+    """Return process wide `TieredCache` for namespace, backed by app cache. Created on first use.
+
+    Pass `disk=False` for memory only cache, app cache is then neither read nor written.
+    """
+    with _tiered_caches_lock:
+        cache = _tiered_caches.get((namespace, disk))
+        if cache is None:
+            cache = TieredCache(
+                namespace=namespace,
+                ttl=ttl,
+                maxsize=maxsize,
+                disk=get_app_cache() if disk else None,
+            )
+            _tiered_caches[(namespace, disk)] = cache
+        return cache
+
+
+class ResponseCacheMixin:
+    """Opt-in response cache for API clients, see `TieredCache`.
+
+    Subclass sets `CACHE_NAMESPACE` and `CACHE_TTLS` as `{endpoint: seconds}`, instance enables caching
+    with `self.cache_enabled = True`. Wrap idempotent calls with `_cached()` / `_cached_async()` and
+    pass `use_cache=False` through to bypass cache for single call.
+    """
+
+    CACHE_NAMESPACE: str = ""
+    CACHE_TTLS: dict[str, float] = {}
+    cache_enabled: bool = False
+
+    def _get_response_cache(self, endpoint: str, disk: bool = True) -> TieredCache:
+        return get_tiered_cache(
+            f"{self.CACHE_NAMESPACE}.{endpoint}",
+            ttl=self.CACHE_TTLS[endpoint],
+            disk=disk,
+        )
+
+    def _cached(
+        self,
+        endpoint: str,
+        key: Hashable,
+        func: Callable[[], Any],
+        use_cache: bool = True,
+    ) -> Any:
+        if not (self.cache_enabled and use_cache):
+            return func()
+        return self._get_response_cache(endpoint).get_or_set(key, func)
+
+    async def _cached_async(
+        self,
+        endpoint: str,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        use_cache: bool = True,
+    ) -> Any:
+        if not (self.cache_enabled and use_cache):
+            return await func()
+        return await self._get_response_cache(endpoint).get_or_set_async(key, func)
@@ -0,0 +1,148 @@
+import asyncio
+import importlib.util
+import threading
+import weakref
+
+import httpx
+
+
+DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+)
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def is_http2_available() -> bool:
+    """HTTP/2 needs optional `h2` package, install with `pip install httpx[http2]`."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(
+    timeout: httpx.Timeout | float = DEFAULT_TIMEOUT,
+    limits: httpx.Limits = DEFAULT_LIMITS,
+    http2: bool | None = None,
+    **kwargs,
+) -> httpx.Client:
+    """Create keep-alive `httpx.Client` with library defaults, `http2=None` enables HTTP/2 if `h2` is installed.
+
+    Extra kwargs are passed to `httpx.Client`.
+    """
+    if http2 is None:
+        http2 = is_http2_available()
+    return httpx.Client(timeout=timeout, limits=limits, http2=http2, **kwargs)
+
+
+def create_async_http_client(
+    timeout: httpx.Timeout | float = DEFAULT_TIMEOUT,
+    limits: httpx.Limits = DEFAULT_LIMITS,
+    http2: bool | None = None,
+    **kwargs,
+) -> httpx.AsyncClient:
+    """Async counterpart of `create_http_client()`."""
+    if http2 is None:
+        http2 = is_http2_available()
+    return httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2, **kwargs)
+
+
+def get_http_client() -> httpx.Client:
+    """Return process wide shared client, used by `gyvatukas.www` clients and `gyvatukas.utils.ip` by default.
+
+    Connections are pooled and kept alive between calls, so repeated requests to the same host skip
+    TCP and TLS handshakes. Client is created on first use and recreated if closed.
+
+    🚨 Client is shared, do not set auth or cookies on it. Pass own client to those that need a session.
+    """
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = create_http_client()
+        return _client
+
+
+def set_http_client(client: httpx.Client | None) -> None:
+    """Replace shared client, e.g. to change limits or proxies. Previous client is not closed.
+
+    Pass None to create default client again on next use.
+    """
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return shared async client of currently running event loop.
+
+    Async connections are bound to event loop they were opened in, so every loop gets own client.
+    Raises RuntimeError when called outside of running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = create_async_http_client()
+        _async_clients[loop] = client
+    return client
+
+
+def close_http_client() -> None:
+    """Close shared sync client, next `get_http_client()` call creates new one."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+async def aclose_http_client() -> None:
+    """Close shared async client of currently running event loop."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    # Benchmark: new connection per request vs pooled client against local keep-alive server.
+    # Local server has no TLS, so real world difference is bigger, every new https connection also pays TLS handshake.
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = (
+            True  # Headers and body are separate writes, avoid delayed ACK stalls.
+        )
+
+        def do_GET(self):
+            body = b'{"ip": "127.0.0.1"}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    n = 500
+
+    started = time.perf_counter()
+    for _ in range(n):
+        httpx.get(url)
+    unpooled = time.perf_counter() - started
+
+    client = get_http_client()
+    started = time.perf_counter()
+    for _ in range(n):
+        client.get(url)
+    pooled = time.perf_counter() - started
+
+    print(f"httpx.get:         {n / unpooled:8.0f} req/s")
+    print(f"get_http_client(): {n / pooled:8.0f} req/s ({unpooled / pooled:.1f}x)")
+    close_http_client()
+    server.shutdown()
@@ -1,40 +1,66 @@
 """Bunch of IP related utilities relying on 3rd party."""
+import bisect
 import ipaddress
 import logging
 import random
+import socket
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, Iterable, Mapping
 
 import httpx
 
+from gyvatukas.internal import get_app_cache
+from gyvatukas.utils.cache import TieredCache
 from gyvatukas.utils.decorators import timer
+from gyvatukas.utils.http import get_http_client
+
+if TYPE_CHECKING:
+    import diskcache
+
+    from gyvatukas.services.iptoolkit import IpToolKit
 
 _logger = logging.getLogger("gyvatukas")
 
+# List of IP lookup services with their respective endpoints and response parsing
+_IP_SERVICES = [
+    {"url": "https://wasab.is/json", "parser": lambda data: data.json()["ip"]},
+    {"url": "https://ifconfig.me/ip", "parser": lambda data: data.text.strip()},
+    {
+        "url": "http://checkip.amazonaws.com",
+        "parser": lambda data: data.text.strip(),
+    },
+]
+_MY_IPV4_CACHE_KEY = "gyvatukas.utils.ip.get_my_ipv4"
+IPV4_META_CACHE_TTL = 24 * 3600
+_app_cache: "diskcache.Cache | None" = None
+_app_cache_lock = threading.Lock()
+_ipv4_meta_cache: TieredCache | None = None
+_ipv4_meta_cache_lock = threading.Lock()
 
-@timer()
-def get_my_ipv4() -> str:
-    """Lookup external ipv4 address. Uses https://ifconfig.me or https://wasab.is or http://checkip.amazonaws.com/.
 
-    🚨 Performs external request.
-    """
-    # List of IP lookup services with their respective endpoints and response parsing
-    ip_services = [
-        {"url": "https://wasab.is/json", "parser": lambda data: data["ip"]},
-        {"url": "https://ifconfig.me/ip", "parser": lambda data: data.text.strip()},
-        {
-            "url": "http://checkip.amazonaws.com",
-            "parser": lambda data: data.text.strip(),
-        },
-    ]
+def _get_app_cache() -> "diskcache.Cache":
+    """Open app cache on first use and reuse it, instead of opening new `diskcache.Cache` per call."""
+    global _app_cache
+    with _app_cache_lock:
+        if _app_cache is None:
+            _app_cache = get_app_cache()
+        return _app_cache
 
-    random.shuffle(ip_services)
 
+def _fetch_my_ipv4(service: dict, client: httpx.Client) -> str:
+    result = client.get(url=service["url"], timeout=5)
+    result.raise_for_status()
+    ip = service["parser"](result)
+    ip_to_int(ip)  # Raises ValueError if service returned garbage.
+    return ip
+
+
+def _get_my_ipv4_sequential(ip_services: list[dict], client: httpx.Client) -> str:
     for service in ip_services:
         try:
-            result = httpx.get(url=service["url"], timeout=5)
-            result.raise_for_status()
-            ip = service["parser"](result)
-            return ip
-
+            return _fetch_my_ipv4(service, client)
         except Exception as e:
             _logger.error(f"Error getting ip: {e}")
             continue
@@ -42,16 +68,79 @@ def get_my_ipv4() -> str:
     raise RuntimeError("All IP lookup services failed!")
 
 
+def _get_my_ipv4_concurrent(ip_services: list[dict], client: httpx.Client) -> str:
+    executor = ThreadPoolExecutor(max_workers=len(ip_services))
+    futures = [
+        executor.submit(_fetch_my_ipv4, service, client) for service in ip_services
+    ]
+    try:
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except Exception as e:
+                _logger.error(f"Error getting ip: {e}")
+                continue
+    finally:
+        # Requests still in flight can't be interrupted, their results are discarded once they finish.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    raise RuntimeError("All IP lookup services failed!")
+
+
 @timer()
-def get_ipv4_meta(ip: str) -> dict | None:
-    """Lookup ipv4 information. Uses https://wasab.is.
+def get_my_ipv4(
+    concurrent: bool = False,
+    cache_ttl: int | None = None,
+    client: httpx.Client | None = None,
+) -> str:
+    """Lookup external ipv4 address. Uses https://ifconfig.me or https://wasab.is or http://checkip.amazonaws.com/.
+
+    - By default services are tried one by one in random order, so a dead service adds its 5s timeout.
+      Pass `concurrent=True` to query all of them at once and return the first valid answer.
+    - Pass `cache_ttl` seconds to cache the result in app cache, see `gyvatukas.internal.get_app_cache`.
+    - Requests go through shared `gyvatukas.utils.http.get_http_client()` unless own `client` is passed.
 
     🚨 Performs external request.
     """
+    cache = _get_app_cache() if cache_ttl else None
+    if cache is not None:
+        ip = cache.get(_MY_IPV4_CACHE_KEY)
+        if ip:
+            return ip
+
+    ip_services = _IP_SERVICES.copy()
+    random.shuffle(ip_services)
+
+    client = client or get_http_client()
+    if concurrent:
+        ip = _get_my_ipv4_concurrent(ip_services, client)
+    else:
+        ip = _get_my_ipv4_sequential(ip_services, client)
+
+    if cache is not None:
+        cache.set(_MY_IPV4_CACHE_KEY, ip, expire=cache_ttl)
+    return ip
+
+
+def _get_ipv4_meta_cache() -> TieredCache:
+    """Create ipv4 meta cache on first use, so importing this module does not open app cache."""
+    global _ipv4_meta_cache
+    with _ipv4_meta_cache_lock:
+        if _ipv4_meta_cache is None:
+            _ipv4_meta_cache = TieredCache(
+                namespace="gyvatukas.utils.ip.get_ipv4_meta",
+                ttl=IPV4_META_CACHE_TTL,
+                maxsize=4096,
+                disk=_get_app_cache(),
+            )
+        return _ipv4_meta_cache
+
+
+def _fetch_ipv4_meta(ip: str, client: httpx.Client | None = None) -> dict | None:
     _logger.debug("performing ipv4 meta lookup for ip `%s`.", ip)
     url = f"https://wasab.is/json?ip={ip}"
 
-    result = httpx.get(url=url, timeout=5)
+    result = (client or get_http_client()).get(url=url, timeout=5)
 
     if result.status_code == 200:
         result = result.json()
@@ -62,22 +151,321 @@ def get_ipv4_meta(ip: str) -> dict | None:
 
 
 @timer()
-def get_ip_country(ip: str) -> str | None:
-    """Get country for given ip address or "Unknown" if not found. Uses https://wasab.is."""
-    data = get_ipv4_meta(ip)
+def get_ipv4_meta(
+    ip: str, use_cache: bool = True, client: httpx.Client | None = None
+) -> dict | None:
+    """Lookup ipv4 information. Uses https://wasab.is.
+
+    Successful lookups are cached for `IPV4_META_CACHE_TTL` seconds in memory and in app cache,
+    concurrent lookups of the same ip share one request. Pass `use_cache=False` to always hit the network.
+
+    🚨 Performs external request.
+    """
+    if not use_cache:
+        return _fetch_ipv4_meta(ip, client)
+    return _get_ipv4_meta_cache().get_or_set(ip, lambda: _fetch_ipv4_meta(ip, client))
+
+
+def get_ipv4_meta_many(
+    ips: Iterable[str],
+    max_workers: int = 8,
+    use_cache: bool = True,
+    client: httpx.Client | None = None,
+) -> dict[str, dict | None]:
+    """Lookup ipv4 information for many ips, at most `max_workers` requests at a time.
+
+    Duplicates are looked up once, returns `{ip: meta or None}`. Failed lookups are logged and return None.
+
+    🚨 Performs external requests.
+    """
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+
+    def lookup(ip: str) -> dict | None:
+        try:
+            return get_ipv4_meta(ip, use_cache=use_cache, client=client)
+        except Exception as e:
+            _logger.error(f"Error getting ipv4 meta for `{ip}`: {e}")
+            return None
+
+    unique_ips = list(dict.fromkeys(ips))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(unique_ips, executor.map(lookup, unique_ips)))
+
+
+def _is_valid_ip(ip: str) -> bool:
+    try:
+        ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return True
+
+
+@timer()
+def get_ip_country(ip: str, client: httpx.Client | None = None) -> str | None:
+    """Get country name (`United States`) for given ip address or "Unknown" if not found. Uses https://wasab.is.
+
+    Returns None for invalid ip or failed lookup. See `get_ip_country_code()` for ISO codes from local database.
+    """
+    if not _is_valid_ip(ip):
+        return None
+    data = get_ipv4_meta(ip, client=client)
     if data is None:
         return None
     return data.get("country", "Unknown")
 
 
+def get_ip_countries(
+    ips: Iterable[str],
+    max_workers: int = 8,
+    client: httpx.Client | None = None,
+) -> dict[str, str | None]:
+    """Batch version of `get_ip_country()`, returns `{ip: country name or None}`.
+
+    🚨 Performs external requests.
+    """
+    unique_ips = list(dict.fromkeys(ips))
+    valid_ips = [ip for ip in unique_ips if _is_valid_ip(ip)]
+    metas = get_ipv4_meta_many(valid_ips, max_workers=max_workers, client=client)
+    return {
+        ip: metas[ip].get("country", "Unknown") if metas.get(ip) is not None else None
+        for ip in unique_ips
+    }
+
+
+def _get_meta_country_code(meta: dict | None) -> str | None:
+    return meta.get("country_code") if meta is not None else None
+
+
+def get_ip_country_code(
+    ip: str,
+    iptoolkit: "IpToolKit",
+    network_fallback: bool = False,
+    client: httpx.Client | None = None,
+) -> str | None:
+    """Get ISO 3166 country code (`US`) for ipv4 or ipv6 address from local `IpToolKit` database.
+
+    Returns None for invalid ip or ip missing from database. Pass `network_fallback=True` to look up ips missing
+    from database at https://wasab.is. See `get_ip_country()` for country names.
+    """
+    if not _is_valid_ip(ip):
+        return None
+    country_code = iptoolkit.get_country_by_ip(ip)
+    if country_code is None and network_fallback:
+        country_code = _get_meta_country_code(get_ipv4_meta(ip, client=client))
+    return country_code
+
+
+def get_ip_country_codes(
+    ips: Iterable[str],
+    iptoolkit: "IpToolKit",
+    network_fallback: bool = False,
+    max_workers: int = 8,
+    client: httpx.Client | None = None,
+) -> dict[str, str | None]:
+    """Batch version of `get_ip_country_code()`, returns `{ip: country code or None}`.
+
+    With `network_fallback=True` only ips missing from local database are looked up at https://wasab.is,
+    at most `max_workers` requests at a time.
+    """
+    result = {ip: get_ip_country_code(ip, iptoolkit) for ip in dict.fromkeys(ips)}
+    if network_fallback:
+        misses = [
+            ip for ip, code in result.items() if code is None and _is_valid_ip(ip)
+        ]
+        if misses:
+            metas = get_ipv4_meta_many(misses, max_workers=max_workers, client=client)
+            for ip in misses:
+                result[ip] = _get_meta_country_code(metas[ip])
+    return result
+
+
 def ip_to_int(ip: str) -> int:
-    return int(ipaddress.IPv4Address(ip))
+    """Parse ipv4 address to int. Uses `socket.inet_pton`, several times faster than `ipaddress.IPv4Address`."""
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except OSError:
+        raise ValueError(f"`{ip}` is not a valid ipv4 address")
 
 
 def int_to_ip(ip_int: int) -> str:
     return str(ipaddress.IPv4Address(ip_int))
 
 
+def ipv6_to_int(ip: str) -> int:
+    """Parse ipv6 address to int. Uses `socket.inet_pton`, several times faster than `ipaddress.IPv6Address`."""
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+    except OSError:
+        raise ValueError(f"`{ip}` is not a valid ipv6 address")
+
+
+def int_to_ipv6(ip_int: int) -> str:
+    return str(ipaddress.IPv6Address(ip_int))
+
+
+def parse_ip(ip: str) -> tuple[int, int]:
+    """Parse ipv4 or ipv6 address, return (version, ip as int)."""
+    if ":" in ip:
+        return 6, ipv6_to_int(ip)
+    return 4, ip_to_int(ip)
+
+
+def _parse_network(network: str) -> tuple[int, int, int]:
+    """Parse CIDR or single address, return (version, first ip as int, last ip as int)."""
+    net = ipaddress.ip_network(network, strict=False)
+    return net.version, int(net.network_address), int(net.broadcast_address)
+
+
+def _new_bounds(version: int) -> array | list:
+    # Ipv4 fits into compact unsigned int array, ipv6 needs python ints.
+    return array("I") if version == 4 else []
+
+
+class IpSet:
+    """Set of ipv4 and ipv6 addresses built from CIDRs or single addresses.
+
+    Networks are merged into disjoint sorted intervals per ip version, membership check is a single `bisect`.
+
+    Usage:
+        >>> deny = IpSet(["10.0.0.0/8", "192.168.1.1", "2001:db8::/32"])
+        >>> "10.1.2.3" in deny  # True
+        >>> "8.8.8.8" in deny  # False
+    """
+
+    def __init__(self, networks: Iterable[str] = ()):
+        ranges: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for network in networks:
+            version, first, last = _parse_network(network)
+            ranges[version].append((first, last))
+
+        self._starts: dict[int, array | list] = {}
+        self._ends: dict[int, array | list] = {}
+        for version, items in ranges.items():
+            starts, ends = _new_bounds(version), _new_bounds(version)
+            for first, last in sorted(items):
+                if starts and first <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], last)
+                else:
+                    starts.append(first)
+                    ends.append(last)
+            self._starts[version], self._ends[version] = starts, ends
+
+    def __len__(self) -> int:
+        """Return number of disjoint intervals."""
+        return sum(len(starts) for starts in self._starts.values())
+
+    def __contains__(self, ip: str) -> bool:
+        try:
+            version, ip_int = parse_ip(ip)
+        except ValueError:
+            return False
+        return self.contains_int(ip_int, version)
+
+    def contains_int(self, ip_int: int, version: int = 4) -> bool:
+        """Check membership of already parsed ip."""
+        starts = self._starts[version]
+        i = bisect.bisect_right(starts, ip_int) - 1
+        return i >= 0 and ip_int <= self._ends[version][i]
+
+
+class IpMap:
+    """Map of ipv4 and ipv6 CIDRs to values with longest prefix match.
+
+    Nested networks are flattened into disjoint sorted intervals per ip version, each resolved to its most specific
+    network, so lookup is a single `bisect`. When same network is given multiple times, last value wins.
+
+    Usage:
+        >>> routes = IpMap({"10.0.0.0/8": "internal", "10.1.0.0/16": "office", "0.0.0.0/0": "internet"})
+        >>> routes.get("10.1.2.3")  # "office"
+        >>> routes.get("10.2.0.1")  # "internal"
+        >>> routes.get_network("8.8.8.8")  # "0.0.0.0/0"
+    """
+
+    def __init__(self, networks: Mapping[str, Any] | Iterable[tuple[str, Any]] = ()):
+        items = networks.items() if isinstance(networks, Mapping) else networks
+
+        self._networks: list[tuple[str, Any]] = []
+        ranges: dict[int, list[tuple[int, int, int]]] = {4: [], 6: []}
+        for network, value in items:
+            version, first, last = _parse_network(network)
+            ranges[version].append((first, -last, len(self._networks)))
+            self._networks.append(
+                (str(ipaddress.ip_network(network, strict=False)), value)
+            )
+
+        self._starts: dict[int, array | list] = {}
+        self._ends: dict[int, array | list] = {}
+        self._network_indexes: dict[int, array] = {}
+        for version, items in ranges.items():
+            starts, ends, indexes = (
+                _new_bounds(version),
+                _new_bounds(version),
+                array("I"),
+            )
+
+            def emit(first: int, last: int, i: int) -> None:
+                starts.append(first)
+                ends.append(last)
+                indexes.append(i)
+
+            # Sorted by start, enclosing networks before nested ones. Stack holds networks enclosing current position.
+            stack: list[tuple[int, int]] = []
+            pos = 0
+            for first, neg_last, i in sorted(items):
+                while stack and stack[-1][0] < first:
+                    last, j = stack.pop()
+                    if pos <= last:
+                        emit(pos, last, j)
+                        pos = last + 1
+                if stack and pos < first:
+                    emit(pos, first - 1, stack[-1][1])
+                pos = first
+                stack.append((-neg_last, i))
+            while stack:
+                last, j = stack.pop()
+                if pos <= last:
+                    emit(pos, last, j)
+                    pos = last + 1
+
+            self._starts[version], self._ends[version] = starts, ends
+            self._network_indexes[version] = indexes
+
+    def __len__(self) -> int:
+        """Return number of networks."""
+        return len(self._networks)
+
+    def __contains__(self, ip: str) -> bool:
+        return self._find(ip) is not None
+
+    def __getitem__(self, ip: str) -> Any:
+        i = self._find(ip)
+        if i is None:
+            raise KeyError(ip)
+        return self._networks[i][1]
+
+    def _find(self, ip: str) -> int | None:
+        try:
+            version, ip_int = parse_ip(ip)
+        except ValueError:
+            return None
+        starts = self._starts[version]
+        i = bisect.bisect_right(starts, ip_int) - 1
+        if i >= 0 and ip_int <= self._ends[version][i]:
+            return self._network_indexes[version][i]
+        return None
+
+    def get(self, ip: str, default: Any = None) -> Any:
+        """Return value of the longest network containing given ip or default."""
+        i = self._find(ip)
+        return self._networks[i][1] if i is not None else default
+
+    def get_network(self, ip: str) -> str | None:
+        """Return the longest network containing given ip or None."""
+        i = self._find(ip)
+        return self._networks[i][0] if i is not None else None
+
+
 if __name__ == "__main__":
     my_ip = get_my_ipv4()
     print(my_ip)
@@ -0,0 +1,225 @@
+import asyncio
+import functools
+import hashlib
+import mmap
+import os
+import pathlib
+import re
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows, limiter is shared between threads only.
+    fcntl = None
+
+from gyvatukas.internal import get_app_storage_path
+
+# Bucket file layout: tokens left, unix time of last refill.
+_STATE = struct.Struct("<dd")
+
+
+class RateLimiter:
+    """Token bucket rate limiter: `count` calls per `seconds`, up to `burst` calls at once (defaults to `count`).
+
+    By default bucket state lives in small memory-mapped file in app storage, guarded by `flock`, so every
+    thread and process using the same `name` shares one bucket. Pass `path` to use own file or
+    `shared=False` for process local bucket. On platforms without `fcntl` bucket is shared between threads only.
+
+    - `try_acquire()` takes token if available and returns immediately.
+    - `acquire()` / `acquire_async()` reserve token and sleep / await until it is due. Waiters are served in
+      order of arrival and sleep once instead of polling.
+    - `get_stats()` returns calls, rejects and time spent waiting in this process.
+
+    Usage:
+        >>> limiter = RateLimiter(1, 1, name="www.example.com", burst=5)
+        >>> limiter.acquire()
+        >>> await limiter.acquire_async()
+        >>> if not limiter.try_acquire():
+        >>>     print("later")
+    """
+
+    def __init__(
+        self,
+        count: int,
+        seconds: float,
+        name: str,
+        burst: int | None = None,
+        path: pathlib.Path | None = None,
+        shared: bool = True,
+    ):
+        if count < 1 or seconds <= 0:
+            raise ValueError(
+                f"count must be at least 1 and seconds positive, got {count=} {seconds=}"
+            )
+        if burst is not None and burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        self.count = count
+        self.seconds = seconds
+        self.name = name
+        self.rate = count / seconds
+        self.burst = burst if burst is not None else count
+        self.path = path
+        self.shared = shared
+
+        self._lock = threading.Lock()
+        self._state = [float(self.burst), time.time()]  # Used when not shared.
+        self._fd: int | None = None
+        self._mmap: mmap.mmap | None = None
+        self._pid: int | None = None
+
+        self.acquired = 0
+        self.rejected = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _get_path(self) -> pathlib.Path:
+        if self.path is None:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.name)
+            digest = hashlib.sha1(self.name.encode()).hexdigest()[:8]
+            self.path = get_app_storage_path() / "ratelimit" / f"{slug}-{digest}.bucket"
+        return self.path
+
+    def _open(self) -> None:
+        """Open and map bucket file, on first use and again after fork, since flock is shared with parent."""
+        if self._mmap is not None:
+            self._mmap.close()
+            os.close(self._fd)
+        path = self._get_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < _STATE.size:
+                os.ftruncate(fd, _STATE.size)
+                os.pwrite(fd, _STATE.pack(float(self.burst), time.time()), 0)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        self._mmap = mmap.mmap(fd, _STATE.size)
+        self._pid = os.getpid()
+
+    def _update(self, tokens: int, reserve: bool) -> float | None:
+        """Refill bucket and take `tokens` from it.
+
+        Returns seconds until taken tokens are due (0 if available now). With `reserve=False` tokens
+        are taken only if available now, otherwise None is returned.
+        """
+        with self._lock:
+            if not self.shared:
+                wait = self._take(self._state, tokens, reserve)
+            else:
+                wait = self._update_shared(tokens, reserve)
+            self._record(wait)
+            return wait
+
+    def _update_shared(self, tokens: int, reserve: bool) -> float | None:
+        if self._pid != os.getpid():
+            self._open()
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            state = list(_STATE.unpack_from(self._mmap))
+            wait = self._take(state, tokens, reserve)
+            _STATE.pack_into(self._mmap, 0, *state)
+            return wait
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _take(self, state: list, tokens: int, reserve: bool) -> float | None:
+        available, updated_at = state
+        now = time.time()
+        # Clamp elapsed time, wall clock may jump backwards.
+        available = min(available + max(now - updated_at, 0.0) * self.rate, self.burst)
+        state[1] = now
+        if available < tokens and not reserve:
+            state[0] = available
+            return None
+        # Reserved tokens may drive bucket negative, later callers wait for the debt to refill.
+        state[0] = available - tokens
+        return max(0.0, -state[0] / self.rate)
+
+    def _record(self, wait: float | None) -> None:
+        if wait is None:
+            self.rejected += 1
+            return
+        self.acquired += 1
+        if wait > 0:
+            self.waits += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def _check_tokens(self, tokens: int) -> None:
+        if not 1 <= tokens <= self.burst:
+            raise ValueError(f"tokens must be between 1 and {self.burst}, got {tokens}")
+
+    def try_acquire(self, tokens: int = 1) -> bool:
+        """Take tokens if available, never waits."""
+        self._check_tokens(tokens)
+        wait = self._update(tokens, reserve=False)
+        return wait is not None
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Block until call is allowed, returns seconds waited."""
+        self._check_tokens(tokens)
+        wait = self._update(tokens, reserve=True)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 1) -> float:
+        """Wait until call is allowed without blocking event loop, returns seconds waited."""
+        self._check_tokens(tokens)
+        wait = self._update(tokens, reserve=True)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def get_stats(self) -> dict:
+        """Return limiter metrics of this process."""
+        return {
+            "name": self.name,
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "waits": self.waits,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+            "wait_seconds_avg": self.wait_seconds_total / self.acquired
+            if self.acquired
+            else 0.0,
+        }
+
+
+def rate_limited(limiter: RateLimiter):
+    """Decorator that acquires `limiter` before every call, works with sync and async functions.
+
+    Usage:
+        >>> @rate_limited(RateLimiter(5, 1, name="my-api"))
+        >>> async def call_api():
+        >>>     ...
+    """
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                await limiter.acquire_async()
+                return await func(*args, **kwargs)
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                limiter.acquire()
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -35,16 +35,23 @@ class DictCursor(sqlite3.Cursor):
 @contextmanager
 def get_conn_cur(path_db: pathlib.Path):
     """Thread-safe context manager that yields SQLite connection and cursor.
-    Reuses connection within same thread."""
-    if not hasattr(_thread_local, "connection"):
-        _thread_local.connection = sqlite3.connect(path_db, check_same_thread=False)
+    Reuses connection per database path within same thread."""
+    if not hasattr(_thread_local, "connections"):
+        _thread_local.connections = {}
 
+    key = str(path_db)
+    if key not in _thread_local.connections:
+        _thread_local.connections[key] = sqlite3.connect(
+            path_db, check_same_thread=False
+        )
+    connection = _thread_local.connections[key]
+
+    cursor = DictCursor(connection)
     try:
-        cursor = DictCursor(_thread_local.connection)
-        yield _thread_local.connection, cursor
-        _thread_local.connection.commit()
+        yield connection, cursor
+        connection.commit()
     except Exception:
-        _thread_local.connection.rollback()
+        connection.rollback()
         raise
     finally:
         cursor.close()
@@ -57,7 +64,8 @@ def init_db(path_db: pathlib.Path, sql_script: str):
 
 
 def close_connections():
-    """Close thread's database connection."""
-    if hasattr(_thread_local, "connection"):
-        _thread_local.connection.close()
-        del _thread_local.connection
+    """Close thread's database connections."""
+    if hasattr(_thread_local, "connections"):
+        for connection in _thread_local.connections.values():
+            connection.close()
+        del _thread_local.connections
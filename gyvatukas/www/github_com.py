@@ -1,19 +1,49 @@
+import asyncio
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable
+
 import httpx
-import diskcache
 
 from gyvatukas.exceptions import GyvatukasException
-from gyvatukas.internal import get_app_cache
+from gyvatukas.utils.cache import ResponseCacheMixin
+from gyvatukas.utils.http import get_async_http_client, get_http_client
+from gyvatukas.utils.ratelimit import RateLimiter
 
 _logger = logging.getLogger("gyvatukas")
-cache = get_app_cache()
 
 
-class GithubComBase:
-    """Base class for GitHub API clients with rate limiting."""
+@dataclass
+class MarkdownRenderResult:
+    """Result of one document of `GithubComBase.convert_md_to_html_many()`, `error` is set if `html` is None."""
+
+    html: str | None
+    from_cache: bool
+    error: Exception | None = None
+
+
+class GithubComBase(ResponseCacheMixin):
+    """Base class for GitHub API clients with rate limiting.
+
+    Pass `cache=True` to cache rendered markdown for `CACHE_TTLS` seconds in memory and app cache,
+    keyed by sha256 of content, cache hits skip rate limit. Pass `use_cache=False` to single call to bypass cache.
+    """
 
     GITHUB_API_VERSION = "2022-11-28"  # Latest as of 2024-01.
     URL_API_MARKDOWN_CONVERT = "https://api.github.com/markdown"
+    RATE_LIMITER: RateLimiter | None = None
+    CACHE_NAMESPACE = "github.com"
+    CACHE_TTLS = {"markdown": 7 * 24 * 3600}
+
+    def __init__(self, client: httpx.Client | None = None, cache: bool = False):
+        """Pass `client` to use own `httpx.Client`, shared pooled client is used by default."""
+        self.client = client
+        self.cache_enabled = cache
+
+    def _get_client(self) -> httpx.Client:
+        return self.client or get_http_client()
 
     @staticmethod
     def _get_api_version_header() -> dict:
@@ -36,25 +66,32 @@ class GithubComBase:
         """Return auth headers for GitHub API requests. Override in subclasses."""
         return {}
 
-    def convert_md_to_html(self, text: str, fancy_gfm_mode: bool = False) -> str:
-        """Convert markdown to HTML using GitHub API.
-        Extremely inefficient, but hey, no need to install markdown parsing library and internet is already
-        mostly bot traffic anyway.
+    @staticmethod
+    def _get_markdown_cache_key(text: str, fancy_gfm_mode: bool) -> str:
+        mode = "gfm" if fancy_gfm_mode else "markdown"
+        return hashlib.sha256(f"{mode}\0{text}".encode()).hexdigest()
 
-        See: https://docs.github.com/en/rest/reference/markdown
-        """
-        response = httpx.post(
-            url=self.URL_API_MARKDOWN_CONVERT,
-            json={
+    def _build_convert_md_to_html_request(
+        self, text: str, fancy_gfm_mode: bool
+    ) -> dict:
+        return {
+            "method": "POST",
+            "url": self.URL_API_MARKDOWN_CONVERT,
+            "json": {
                 "mode": "gfm" if fancy_gfm_mode else "markdown",
                 "text": text,
             },
-            headers={
+            "headers": {
                 **self._get_base_headers(),
                 **self._get_auth_headers(),
             },
-            timeout=15,
-        )
+            "timeout": 15,
+        }
+
+    @staticmethod
+    def _parse_convert_md_to_html_response(
+        response: httpx.Response, text: str, fancy_gfm_mode: bool
+    ) -> str:
         if response.status_code == 200:
             return response.text
 
@@ -69,6 +106,172 @@ class GithubComBase:
         )
         raise GyvatukasException("Failed to convert markdown to HTML!")
 
+    def _request_md_to_html(self, text: str, fancy_gfm_mode: bool) -> str:
+        response = self._get_client().request(
+            **self._build_convert_md_to_html_request(text, fancy_gfm_mode)
+        )
+        return self._parse_convert_md_to_html_response(response, text, fancy_gfm_mode)
+
+    def convert_md_to_html(
+        self, text: str, fancy_gfm_mode: bool = False, use_cache: bool = True
+    ) -> str:
+        """Convert markdown to HTML using GitHub API.
+        Extremely inefficient, but hey, no need to install markdown parsing library and internet is already
+        mostly bot traffic anyway.
+
+        See: https://docs.github.com/en/rest/reference/markdown
+        """
+
+        def fetch() -> str:
+            if self.RATE_LIMITER is not None:
+                self.RATE_LIMITER.acquire()
+            return self._request_md_to_html(text, fancy_gfm_mode)
+
+        key = self._get_markdown_cache_key(text, fancy_gfm_mode)
+        return self._cached("markdown", key, fetch, use_cache=use_cache)
+
+    def _plan_md_batch(
+        self, texts: Iterable[str], fancy_gfm_mode: bool, use_cache: bool
+    ) -> tuple[list[str], dict[str, MarkdownRenderResult], dict[str, str]]:
+        """Return cache key of every text, results of cache hits and unique texts to render by key."""
+        keys, results, misses = [], {}, {}
+        for text in texts:
+            key = self._get_markdown_cache_key(text, fancy_gfm_mode)
+            keys.append(key)
+            if key in results or key in misses:
+                continue
+            html = (
+                self._get_response_cache("markdown").get(key)
+                if self.cache_enabled and use_cache
+                else None
+            )
+            if html is not None:
+                results[key] = MarkdownRenderResult(html=html, from_cache=True)
+            else:
+                misses[key] = text
+        return keys, results, misses
+
+    def _finish_md_render(
+        self, key: str, html: str, use_cache: bool
+    ) -> MarkdownRenderResult:
+        if self.cache_enabled and use_cache:
+            self._get_response_cache("markdown").set(key, html)
+        return MarkdownRenderResult(html=html, from_cache=False)
+
+    @staticmethod
+    def _get_rate_limited_result() -> MarkdownRenderResult:
+        return MarkdownRenderResult(
+            html=None,
+            from_cache=False,
+            error=GyvatukasException("GitHub rate limit budget exhausted"),
+        )
+
+    def convert_md_to_html_many(
+        self,
+        texts: Iterable[str],
+        fancy_gfm_mode: bool = False,
+        use_cache: bool = True,
+        max_concurrency: int = 4,
+        wait_for_rate_limit: bool = True,
+    ) -> list[MarkdownRenderResult]:
+        """Convert many markdown documents, returns results in input order.
+
+        Cached documents are served from cache, identical documents are rendered once and the rest are
+        rendered `max_concurrency` at a time. With `wait_for_rate_limit=False` documents beyond what rate
+        limit allows right now are not rendered, their result has `error` set, so build can fall back.
+        Failures are returned in `error` instead of raised.
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+        keys, results, misses = self._plan_md_batch(texts, fancy_gfm_mode, use_cache)
+
+        def render(key: str, text: str) -> MarkdownRenderResult:
+            if self.RATE_LIMITER is not None:
+                if not wait_for_rate_limit:
+                    if not self.RATE_LIMITER.try_acquire():
+                        return self._get_rate_limited_result()
+                else:
+                    self.RATE_LIMITER.acquire()
+            try:
+                html = self._request_md_to_html(text, fancy_gfm_mode)
+            except Exception as e:
+                return MarkdownRenderResult(html=None, from_cache=False, error=e)
+            return self._finish_md_render(key, html, use_cache)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            rendered = executor.map(render, misses.keys(), misses.values())
+            results.update(zip(misses.keys(), rendered))
+        _logger.info(
+            "Rendered %d markdown documents, %d from cache",
+            len(keys),
+            len(results) - len(misses),
+        )
+        return [results[key] for key in keys]
+
+
+class _AsyncGithubComMixin:
+    """Async `convert_md_to_html()` for GitHub clients, `client` must be `httpx.AsyncClient`."""
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self.client or get_async_http_client()
+
+    async def convert_md_to_html(
+        self, text: str, fancy_gfm_mode: bool = False, use_cache: bool = True
+    ) -> str:
+        """Async version of `GithubComBase.convert_md_to_html()`."""
+
+        async def fetch() -> str:
+            if self.RATE_LIMITER is not None:
+                await self.RATE_LIMITER.acquire_async()
+            return await self._request_md_to_html(text, fancy_gfm_mode)
+
+        key = self._get_markdown_cache_key(text, fancy_gfm_mode)
+        return await self._cached_async("markdown", key, fetch, use_cache=use_cache)
+
+    async def _request_md_to_html(self, text: str, fancy_gfm_mode: bool) -> str:
+        response = await self._get_client().request(
+            **self._build_convert_md_to_html_request(text, fancy_gfm_mode)
+        )
+        return self._parse_convert_md_to_html_response(response, text, fancy_gfm_mode)
+
+    async def convert_md_to_html_many(
+        self,
+        texts: Iterable[str],
+        fancy_gfm_mode: bool = False,
+        use_cache: bool = True,
+        max_concurrency: int = 4,
+        wait_for_rate_limit: bool = True,
+    ) -> list[MarkdownRenderResult]:
+        """Async version of `GithubComBase.convert_md_to_html_many()`."""
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+        keys, results, misses = self._plan_md_batch(texts, fancy_gfm_mode, use_cache)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def render(key: str, text: str) -> MarkdownRenderResult:
+            async with semaphore:
+                if self.RATE_LIMITER is not None:
+                    if not wait_for_rate_limit:
+                        if not self.RATE_LIMITER.try_acquire():
+                            return self._get_rate_limited_result()
+                    else:
+                        await self.RATE_LIMITER.acquire_async()
+                try:
+                    html = await self._request_md_to_html(text, fancy_gfm_mode)
+                except Exception as e:
+                    return MarkdownRenderResult(html=None, from_cache=False, error=e)
+                return self._finish_md_render(key, html, use_cache)
+
+        rendered = await asyncio.gather(
+            *(render(key, text) for key, text in misses.items())
+        )
+        results.update(zip(misses.keys(), rendered))
+        return [results[key] for key in keys]
+
 
 class GithubComNoAuth(GithubComBase):
     """
@@ -79,14 +282,10 @@ class GithubComNoAuth(GithubComBase):
     """
 
     RATE_LIMIT_PER_SECOND = 60 / 3600  # 60 requests per hour
+    RATE_LIMITER = RateLimiter(60, 3600, name="github.com (unauthenticated)")
 
-    def __init__(self):
-        super().__init__()
-
-    @diskcache.throttle(cache, 60, 3600, name="github.com (unauthenticated)")
-    def convert_md_to_html(self, text: str, fancy_gfm_mode: bool = False) -> str:
-        """Rate-limited wrapper for convert_md_to_html."""
-        return super().convert_md_to_html(text, fancy_gfm_mode)
+    def __init__(self, client: httpx.Client | None = None, cache: bool = False):
+        super().__init__(client=client, cache=cache)
 
 
 class GithubComAuth(GithubComBase):
@@ -98,12 +297,15 @@ class GithubComAuth(GithubComBase):
     """
 
     RATE_LIMIT_PER_SECOND = 5000 / 3600  # 5000 requests per hour
+    RATE_LIMITER = RateLimiter(5000, 3600, name="github.com (authenticated)")
 
-    def __init__(self, api_token: str):
+    def __init__(
+        self, api_token: str, client: httpx.Client | None = None, cache: bool = False
+    ):
         if not api_token:
             raise ValueError("API token is required for authenticated GitHub client")
         self.api_token = api_token
-        super().__init__()
+        super().__init__(client=client, cache=cache)
 
     def _get_auth_headers(self) -> dict:
         """Return auth headers for GitHub API."""
@@ -111,7 +313,10 @@ class GithubComAuth(GithubComBase):
             "Authorization": f"Bearer {self.api_token}",
         }
 
-    @diskcache.throttle(cache, 5000, 3600, name="github.com (authenticated)")
-    def convert_md_to_html(self, text: str, fancy_gfm_mode: bool = False) -> str:
-        """Rate-limited wrapper for convert_md_to_html."""
-        return super().convert_md_to_html(text, fancy_gfm_mode)
+
+class AsyncGithubComNoAuth(_AsyncGithubComMixin, GithubComNoAuth):
+    """Async unauthenticated GitHub API client, shares rate limit with `GithubComNoAuth`."""
+
+
+class AsyncGithubComAuth(_AsyncGithubComMixin, GithubComAuth):
+    """Async authenticated GitHub API client, shares rate limit with `GithubComAuth`."""
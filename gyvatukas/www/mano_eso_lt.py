@@ -1,15 +1,31 @@
+import asyncio
+import calendar
 import datetime
 import pathlib
-from dataclasses import dataclass
-from itertools import groupby
+import struct
+import sys
+import threading
+import zlib
+import zoneinfo
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Literal
 
 import logging
 from html.parser import HTMLParser
 import httpx
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from gyvatukas.exceptions import GyvatukasException
 from gyvatukas.internal import get_app_storage_path
-from gyvatukas.utils.json_ import get_pretty_json
+from gyvatukas.utils.http import create_async_http_client, create_http_client
+from gyvatukas.utils.json_ import read_json, write_json
+from gyvatukas.utils.simplestore import DirStore, KeyValueStore
 
 _logger = logging.getLogger("gyvatukas")
 
@@ -58,29 +74,295 @@ class ConsumptionDataset:
     records: list[ConsumptionRecord]
 
 
+_EPOCH_DATE = datetime.date(1970, 1, 1)
+_ESO_TZ = zoneinfo.ZoneInfo("Europe/Vilnius")
+_DAY_SECONDS = 86400
+# Blob layout: magic, number of series, then per series: type_key and type lengths, record count,
+# utf-8 type_key and type, int64 timestamps, float64 kwh. Whole blob is zlib compressed.
+_SERIES_MAGIC = b"ESO1"
+_SERIES_HEADER = struct.Struct("<4sI")
+_SERIES_ENTRY = struct.Struct("<HHI")
+
+
+def _to_timestamp(dt: datetime.datetime) -> int:
+    """Seconds since epoch of naive meter time, no timezone conversion is done."""
+    return calendar.timegm(dt.timetuple())
+
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+@dataclass
+class ConsumptionSeries:
+    """Columnar hourly consumption of one dataset type, sorted by time.
+
+    Timestamps are `array("q")` of seconds since epoch in meter (Lithuanian) time and kwh is `array("d")`,
+    16 bytes per hour instead of two objects. Aggregation uses numpy if installed.
+
+    Usage:
+        >>> series = ConsumptionSeries.from_records("P+", "Suvartota", records)
+        >>> series.aggregate("month")  # {datetime.date(2025, 1, 1): 312.5, ...}
+        >>> blob = dump_consumption_series([series])
+    """
+
+    type_key: str
+    type: str
+    timestamps: array = field(default_factory=lambda: array("q"))
+    kwh: array = field(default_factory=lambda: array("d"))
+
+    def __post_init__(self):
+        if len(self.timestamps) != len(self.kwh):
+            raise ValueError(
+                f"timestamps and kwh differ in length: {len(self.timestamps)} != {len(self.kwh)}"
+            )
+        if np is not None:
+            timestamps = np.frombuffer(self.timestamps, dtype=np.int64)
+            if not np.all(timestamps[1:] >= timestamps[:-1]):
+                order = np.argsort(timestamps, kind="stable")
+                self.timestamps = array("q", timestamps[order].tobytes())
+                self.kwh = array(
+                    "d", np.frombuffer(self.kwh, dtype=np.float64)[order].tobytes()
+                )
+            return
+        timestamps = self.timestamps
+        if any(timestamps[i] > timestamps[i + 1] for i in range(len(timestamps) - 1)):
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            self.timestamps = array("q", (timestamps[i] for i in order))
+            self.kwh = array("d", (self.kwh[i] for i in order))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_records(
+        cls, type_key: str, type: str, records: Iterable[ConsumptionRecord]
+    ) -> "ConsumptionSeries":
+        timestamps, kwh = array("q"), array("d")
+        for record in records:
+            timestamps.append(_to_timestamp(record.dt))
+            kwh.append(record.kwh)
+        return cls(type_key=type_key, type=type, timestamps=timestamps, kwh=kwh)
+
+    @classmethod
+    def from_datasets(
+        cls, datasets: Iterable[ConsumptionDataset]
+    ) -> dict[str, "ConsumptionSeries"]:
+        """Merge daily datasets into one series per type key."""
+        columns: dict[str, tuple[str, array, array]] = {}
+        for dataset in datasets:
+            if dataset.type_key not in columns:
+                columns[dataset.type_key] = (dataset.type, array("q"), array("d"))
+            _, timestamps, kwh = columns[dataset.type_key]
+            for record in dataset.records:
+                timestamps.append(_to_timestamp(record.dt))
+                kwh.append(record.kwh)
+        return {
+            type_key: cls(type_key, type_, timestamps, kwh)
+            for type_key, (type_, timestamps, kwh) in columns.items()
+        }
+
+    def concat(self, other: "ConsumptionSeries") -> "ConsumptionSeries":
+        return ConsumptionSeries(
+            type_key=self.type_key,
+            type=self.type,
+            timestamps=self.timestamps + other.timestamps,
+            kwh=self.kwh + other.kwh,
+        )
+
+    def get_datetimes(self) -> list[datetime.datetime]:
+        return [
+            datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=ts)
+            for ts in self.timestamps
+        ]
+
+    def to_datasets(self) -> list[ConsumptionDataset]:
+        """Split series into `ConsumptionDataset` per day."""
+        result = []
+        timestamps, kwh = self.timestamps, self.kwh
+        start = 0
+        for end in range(1, len(timestamps) + 1):
+            if (
+                end < len(timestamps)
+                and timestamps[end] // _DAY_SECONDS == timestamps[start] // _DAY_SECONDS
+            ):
+                continue
+            day_kwh = kwh[start:end]
+            result.append(
+                ConsumptionDataset(
+                    type_key=self.type_key,
+                    type=self.type,
+                    dt=_EPOCH_DATE
+                    + datetime.timedelta(days=timestamps[start] // _DAY_SECONDS),
+                    total_kwh=sum(day_kwh),
+                    records=[
+                        ConsumptionRecord(
+                            dt=datetime.datetime(1970, 1, 1)
+                            + datetime.timedelta(seconds=ts),
+                            kwh=value,
+                        )
+                        for ts, value in zip(timestamps[start:end], day_kwh)
+                    ],
+                )
+            )
+            start = end
+        return result
+
+    @staticmethod
+    def _period_key_to_date(
+        key: int, period: Literal["day", "week", "month"]
+    ) -> datetime.date:
+        if period == "month":
+            return datetime.date(1970 + key // 12, key % 12 + 1, 1)
+        return _EPOCH_DATE + datetime.timedelta(days=key)
+
+    def aggregate(
+        self, period: Literal["day", "week", "month"] = "day"
+    ) -> dict[datetime.date, float]:
+        """Return total kwh per period, keyed by day, monday of week or first day of month."""
+        if period not in ("day", "week", "month"):
+            raise ValueError(f"Unknown period {period!r}")
+        if not self.timestamps:
+            return {}
+
+        if np is not None:
+            days = np.frombuffer(self.timestamps, dtype=np.int64) // _DAY_SECONDS
+            if period == "week":
+                keys = days - (days + 3) % 7  # 1970-01-01 was thursday.
+            elif period == "month":
+                keys = (
+                    days.astype("datetime64[D]")
+                    .astype("datetime64[M]")
+                    .astype(np.int64)
+                )
+            else:
+                keys = days
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            totals = np.bincount(inverse, weights=np.frombuffer(self.kwh, np.float64))
+            return {
+                self._period_key_to_date(int(k), period): float(t)
+                for k, t in zip(unique_keys, totals)
+            }
+
+        result: dict[datetime.date, float] = {}
+        for ts, value in zip(self.timestamps, self.kwh):
+            day = _EPOCH_DATE + datetime.timedelta(days=ts // _DAY_SECONDS)
+            if period == "week":
+                day -= datetime.timedelta(days=day.weekday())
+            elif period == "month":
+                day = day.replace(day=1)
+            result[day] = result.get(day, 0.0) + value
+        return result
+
+
+def dump_consumption_series(series: Iterable[ConsumptionSeries]) -> bytes:
+    """Serialize series into compact zlib compressed blob."""
+    series = list(series)
+    parts = [_SERIES_HEADER.pack(_SERIES_MAGIC, len(series))]
+    for s in series:
+        type_key, type_ = s.type_key.encode(), s.type.encode()
+        parts.append(_SERIES_ENTRY.pack(len(type_key), len(type_), len(s)))
+        parts += [type_key, type_, _to_little_endian(s.timestamps)]
+        parts.append(_to_little_endian(s.kwh))
+    return zlib.compress(b"".join(parts))
+
+
+def load_consumption_series(blob: bytes) -> list[ConsumptionSeries]:
+    """Inverse of `dump_consumption_series()`."""
+    data = zlib.decompress(blob)
+    magic, count = _SERIES_HEADER.unpack_from(data)
+    if magic != _SERIES_MAGIC:
+        raise ValueError("Not a consumption series blob")
+    offset = _SERIES_HEADER.size
+    result = []
+    for _ in range(count):
+        key_len, type_len, length = _SERIES_ENTRY.unpack_from(data, offset)
+        offset += _SERIES_ENTRY.size
+        type_key = data[offset : offset + key_len].decode()
+        offset += key_len
+        type_ = data[offset : offset + type_len].decode()
+        offset += type_len
+        timestamps = _from_little_endian("q", data[offset : offset + length * 8])
+        offset += length * 8
+        kwh = _from_little_endian("d", data[offset : offset + length * 8])
+        offset += length * 8
+        result.append(ConsumptionSeries(type_key, type_, timestamps, kwh))
+    return result
+
+
 class ManoEsoLt:
     """ESO data extractor based on https://github.com/algirdasc/hass-eso +rep
 
     Kai moki daxuja+1 už perdavimą ir etc, pastato naują skaitliuką, bet jo duomenys tik per web'ą
     arba mokamą API ale verslui. Ačiū jums, kad esate, ESO.
+
+    Saved session of the same user is loaded on init, `ensure_login()` checks it and logs in again only
+    if it expired. `sync_range()` fetches only days missing from `store` (`DirStore` in app storage by default).
+
+    Usage:
+        >>> eso = ManoEsoLt(username="me@example.com", password="...")
+        >>> eso.ensure_login()
+        >>> days = eso.sync_range("123456", datetime.date(2025, 1, 1), datetime.date(2025, 12, 31))
     """
 
     # TODO: Custom exceptions.
     URL_LOGIN = "https://mano.eso.lt/?destination=/consumption"
+    URL_CONSUMPTION = "https://mano.eso.lt/consumption"
     URL_CONSUMPTION_DATA = (
         "https://mano.eso.lt/consumption?ajax_form=1&_wrapper_format=drupal_ajax"
     )
-
-    def __init__(self, username: str, password: str, persist_session: bool = True):
-        # TODO: Check if session exists, load it if username matches.
-        #  Also log that!
+    # Week request with active date D returns hourly data of 7 days up to D - 1.
+    WEEK_DAYS = 7
+    # mano.eso.lt is slow and not built for scraping, keep parallel requests low.
+    MAX_CONCURRENCY = 4
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        persist_session: bool = True,
+        client: httpx.Client | None = None,
+        store: KeyValueStore | None = None,
+    ):
+        """Keeps login cookies in own `httpx.Client` instead of shared one, pass `client` to override it."""
+        self.client: httpx.Client = client or self._create_client()
         self.username: str = username
         self.password: str = password
         self.persist_session: bool = persist_session
+        self.store: KeyValueStore | None = store
         self.cookies: dict | None = None
         self.special_fields: dict = {}
 
         self.is_persisted_session: bool = False
+        # Incremented on every login, concurrent fetches that hit expired session log in only once.
+        self._session_generation: int = 0
+        self._login_lock = threading.Lock()
+        if persist_session:
+            self._load_session()
+
+    @staticmethod
+    def _create_client() -> httpx.Client:
+        return create_http_client()
+
+    @staticmethod
+    def _get_session_path() -> pathlib.Path:
+        return pathlib.Path(get_app_storage_path(), "mano_eso_lt.json")
+
+    def _get_store(self) -> KeyValueStore:
+        if self.store is None:
+            self.store = DirStore(get_app_storage_path() / "mano_eso_lt")
+        return self.store
 
     def _extract_special_fields(self, login_response: str) -> None:
         fp = FormParser()
@@ -92,7 +374,7 @@ class ManoEsoLt:
 
     def _save_session(self) -> None:
         """Saves session to disk for reuse."""
-        path = pathlib.Path(get_app_storage_path(), "mano_eso_lt.json")
+        path = self._get_session_path()
 
         data = {
             "username": self.username,
@@ -100,28 +382,96 @@ class ManoEsoLt:
             "special_fields": self.special_fields,
         }
 
-        path.write_text(get_pretty_json(data))
-
-    def login(self) -> None:
-        with httpx.post(
-            url=self.URL_LOGIN,
-            data={
+        write_json(path, data, pretty=True, override=True)
+
+    def _load_session(self) -> bool:
+        """Load saved session if it belongs to the same user, it is not checked against server."""
+        data = read_json(self._get_session_path(), default={})
+        if (
+            not isinstance(data, dict)
+            or data.get("username") != self.username
+            or not data.get("cookies")
+        ):
+            _logger.debug("mano.eso.lt saved session is not of %s", self.username)
+            return False
+
+        self.cookies = data["cookies"]
+        self.special_fields = data.get("special_fields") or {}
+        self.client.cookies.update(self.cookies)
+        self.is_persisted_session = True
+        _logger.info("mano.eso.lt loaded saved session of %s", self.username)
+        return True
+
+    def _build_login_request(self) -> dict:
+        # Start from clean jar, stale session cookies would mix with fresh ones.
+        self.client.cookies.clear()
+        return {
+            "method": "POST",
+            "url": self.URL_LOGIN,
+            "data": {
                 "name": self.username,
                 "pass": self.password,
                 "login_type": 1,
                 "form_id": "user_login_form",
             },
-            allow_redirects=True,
-            timeout=30,
-        ) as response:
-            if response.status_code != 200:
-                raise GyvatukasException("Failed mano.eso.lt login!")
+            "follow_redirects": True,
+            "timeout": 30,
+        }
 
-            self.cookies = httpx.utils.dict_from_cookiejar(response.cookies)
-            self._extract_special_fields(response.text)
+    def _handle_login_response(self, response: httpx.Response) -> None:
+        if response.status_code != 200:
+            raise GyvatukasException("Failed mano.eso.lt login!")
 
-            if self.persist_session:
-                self._save_session()
+        self.cookies = {cookie.name: cookie.value for cookie in self.client.cookies.jar}
+        self._extract_special_fields(response.text)
+        self._session_generation += 1
+
+        if self.persist_session:
+            self._save_session()
+
+    def login(self) -> None:
+        response = self.client.request(**self._build_login_request())
+        self._handle_login_response(response)
+        self.is_persisted_session = False
+
+    def _build_session_check_request(self) -> dict:
+        self.client.cookies.update(self.cookies or {})
+        return {
+            "method": "GET",
+            "url": self.URL_CONSUMPTION,
+            "follow_redirects": False,
+            "timeout": 30,
+        }
+
+    def _handle_session_check_response(self, response: httpx.Response) -> bool:
+        """Logged in users get consumption form, others are redirected to login."""
+        if response.status_code != 200 or "eso_consumption_history_form" not in (
+            response.text
+        ):
+            return False
+        # Form tokens rotate, keep the fresh ones.
+        self._extract_special_fields(response.text)
+        if self.persist_session:
+            self._save_session()
+        return True
+
+    @staticmethod
+    def _is_session_expired_response(response: httpx.Response) -> bool:
+        return response.status_code in (301, 302, 303, 403)
+
+    def is_session_valid(self) -> bool:
+        """Check whether current cookies are still logged in."""
+        if not self.cookies:
+            return False
+        response = self.client.request(**self._build_session_check_request())
+        return self._handle_session_check_response(response)
+
+    def ensure_login(self) -> None:
+        """Reuse saved session if still valid, otherwise log in."""
+        if self.is_session_valid():
+            _logger.info("mano.eso.lt reusing session of %s", self.username)
+            return
+        self.login()
 
     def get_day_stats(
         self, eso_object_id: str, date: datetime.date | datetime.datetime
@@ -129,16 +479,9 @@ class ManoEsoLt:
         """Return daily consumption stats."""
         raise NotImplementedError()
 
-    def get_week_stats(
+    def _build_week_stats_request(
         self, eso_object_id: str, date: datetime.date | datetime.datetime
-    ) -> list[ConsumptionDataset]:
-        """Return weekly consumption stats.
-
-        🚨 Will always return date - 1 stats.
-        """
-        # TODO: handle if session expired!
-        # TODO: handle historical data!
-
+    ) -> dict:
         if not self.cookies:
             raise Exception("Cookies are empty. Check your credentials.")
 
@@ -171,69 +514,290 @@ class ManoEsoLt:
             **self.special_fields,
         }
 
-        with httpx.post(
-            url=self.URL_CONSUMPTION_DATA,
-            data=data,
-            headers=headers,
-            cookies=self.cookies,
-            allow_redirects=False,
-            timeout=90,
-        ) as response:
-            if response.status_code != 200:
-                raise GyvatukasException("Failed mano.eso.lt consumption data request!")
-
-            data = response.json()
-
-            # Find dataset with key `settings.eso_consumption_history_form`
-            wanted_data = None
-            for d in data:
-                try:
-                    wanted_data = d["settings"]["eso_consumption_history_form"][
-                        "graphics_data"
-                    ]
-                except (KeyError, TypeError):
-                    continue
-
-            # Do initial processing of all data.
-            result = []
-            for dataset in wanted_data["datasets"]:
-                parsed_records = []
-
-                for record in dataset["record"]:
-                    ts = datetime.datetime.strptime(record["date"], "%Y%m%d%H%M%S")
-                    # TODO: Set tz to lithuania.
-                    kwh = (
-                        abs(float(record["value"]))
-                        if record["value"] is not None
-                        else 0.0
-                    )
-                    parsed_records.append(
-                        ConsumptionRecord(
-                            dt=ts,
-                            kwh=kwh,
+        self.client.cookies.update(self.cookies)
+        return {
+            "method": "POST",
+            "url": self.URL_CONSUMPTION_DATA,
+            "data": data,
+            "headers": headers,
+            "follow_redirects": False,
+            "timeout": 90,
+        }
+
+    @staticmethod
+    def _parse_week_stats_response(
+        response: httpx.Response,
+    ) -> list[ConsumptionSeries]:
+        if response.status_code != 200:
+            raise GyvatukasException("Failed mano.eso.lt consumption data request!")
+
+        data = response.json()
+
+        # Find dataset with key `settings.eso_consumption_history_form`
+        wanted_data = None
+        for d in data:
+            try:
+                wanted_data = d["settings"]["eso_consumption_history_form"][
+                    "graphics_data"
+                ]
+            except (KeyError, TypeError):
+                continue
+
+        result = []
+        for dataset in wanted_data["datasets"]:
+            timestamps, kwh = array("q"), array("d")
+            for record in dataset["record"]:
+                if record["value"] is None:
+                    continue  # Hour not published yet.
+                # TODO: Set tz to lithuania.
+                d = record["date"]  # YYYYmmddHHMMSS
+                timestamps.append(
+                    calendar.timegm(
+                        (
+                            int(d[:4]),
+                            int(d[4:6]),
+                            int(d[6:8]),
+                            int(d[8:10]),
+                            int(d[10:12]),
+                            int(d[12:14]),
                         )
                     )
+                )
+                kwh.append(abs(float(record["value"])))
+            result.append(
+                ConsumptionSeries(
+                    type_key=dataset["key"],
+                    type=dataset["label"],
+                    timestamps=timestamps,
+                    kwh=kwh,
+                )
+            )
+
+        return result
 
-                # Group records by day and create consumption dataset for each day.
-                parsed_records.sort(key=lambda x: x.dt.date())
-                grouped_parsed_records = groupby(
-                    parsed_records, key=lambda x: x.dt.date()
+    def get_week_series(
+        self, eso_object_id: str, date: datetime.date | datetime.datetime
+    ) -> list[ConsumptionSeries]:
+        """Return weekly consumption as `ConsumptionSeries` per type, logs in again once if session expired.
+
+        🚨 Will always return date - 1 stats.
+        """
+        generation = self._session_generation
+        response = self.client.request(
+            **self._build_week_stats_request(eso_object_id, date)
+        )
+        if self._is_session_expired_response(response):
+            with self._login_lock:
+                # Other thread may have logged in while we waited.
+                if self._session_generation == generation:
+                    _logger.info("mano.eso.lt session expired, logging in again")
+                    self.login()
+            response = self.client.request(
+                **self._build_week_stats_request(eso_object_id, date)
+            )
+        return self._parse_week_stats_response(response)
+
+    def get_week_stats(
+        self, eso_object_id: str, date: datetime.date | datetime.datetime
+    ) -> list[ConsumptionDataset]:
+        """Return weekly consumption stats split by day, see `get_week_series()`."""
+        return [
+            dataset
+            for series in self.get_week_series(eso_object_id, date)
+            for dataset in series.to_datasets()
+        ]
+
+    @staticmethod
+    def _get_day_key(eso_object_id: str, day: datetime.date) -> str:
+        return f"{eso_object_id}_{day.isoformat()}"
+
+    @staticmethod
+    def _get_hours_in_day(day: datetime.date) -> int:
+        """23 or 25 on DST switch days."""
+        start, end = (
+            datetime.datetime.combine(d, datetime.time(), _ESO_TZ).timestamp()
+            for d in (day, day + datetime.timedelta(days=1))
+        )
+        return int(end - start) // 3600
+
+    def _is_day_complete(
+        self, day: datetime.date, datasets: list[ConsumptionDataset]
+    ) -> bool:
+        # Unpublished hours come as null and are skipped, so fewer records mean data is not in yet.
+        hours = self._get_hours_in_day(day)
+        return bool(datasets) and all(len(d.records) >= hours for d in datasets)
+
+    def _load_days(
+        self, eso_object_id: str, start: datetime.date, end: datetime.date
+    ) -> tuple[dict[datetime.date, list[ConsumptionDataset]], list[datetime.date]]:
+        """Return stored complete days and list of days that need fetching."""
+        if end < start:
+            raise ValueError(f"end {end} is before start {start}")
+        store = self._get_store()
+        stored, missing = {}, []
+        for offset in range((end - start).days + 1):
+            day = start + datetime.timedelta(days=offset)
+            blob = store.get(self._get_day_key(eso_object_id, day))
+            if isinstance(blob, bytes):
+                stored[day] = [
+                    dataset
+                    for series in load_consumption_series(blob)
+                    for dataset in series.to_datasets()
+                ]
+            else:
+                missing.append(day)
+        return stored, missing
+
+    def _plan_week_requests(self, missing: list[datetime.date]) -> list[datetime.date]:
+        """Return active dates of week requests covering all missing days."""
+        active_dates = []
+        covered_until = None
+        for day in missing:
+            if covered_until is None or day > covered_until:
+                covered_until = day + datetime.timedelta(days=self.WEEK_DAYS - 1)
+                active_dates.append(day + datetime.timedelta(days=self.WEEK_DAYS))
+        return active_dates
+
+    def _store_days(
+        self,
+        eso_object_id: str,
+        datasets: list[ConsumptionDataset],
+        days: dict[datetime.date, list[ConsumptionDataset]],
+        start: datetime.date,
+        end: datetime.date,
+    ) -> None:
+        """Add fetched datasets within range to `days`, store complete ones."""
+        store = self._get_store()
+        by_day: dict[datetime.date, list[ConsumptionDataset]] = {}
+        for dataset in datasets:
+            by_day.setdefault(dataset.dt, []).append(dataset)
+        for day, day_datasets in by_day.items():
+            if not start <= day <= end or day in days:
+                continue
+            days[day] = day_datasets
+            if self._is_day_complete(day, day_datasets) and day < datetime.date.today():
+                series = [
+                    ConsumptionSeries.from_records(d.type_key, d.type, d.records)
+                    for d in day_datasets
+                ]
+                store.set(
+                    self._get_day_key(eso_object_id, day),
+                    dump_consumption_series(series),
+                    override=True,
                 )
 
-                for key, group in grouped_parsed_records:
-                    day_records = []
-                    total_kwh = 0.0
-                    for hourly_parsed_record in group:
-                        day_records.append(hourly_parsed_record)
-                        total_kwh += hourly_parsed_record.kwh
-
-                    cd = ConsumptionDataset(
-                        type_key=dataset["key"],
-                        type=dataset["label"],
-                        total_kwh=total_kwh,
-                        dt=key,
-                        records=day_records,
-                    )
-                    result.append(cd)
+    def _check_concurrency(self, max_concurrency: int) -> int:
+        if not 1 <= max_concurrency <= self.MAX_CONCURRENCY:
+            raise ValueError(
+                f"max_concurrency must be between 1 and {self.MAX_CONCURRENCY}, got {max_concurrency}"
+            )
+        return max_concurrency
+
+    def sync_range(
+        self,
+        eso_object_id: str,
+        start: datetime.date,
+        end: datetime.date,
+        max_concurrency: int = 2,
+    ) -> dict[datetime.date, list[ConsumptionDataset]]:
+        """Return consumption of days from `start` to `end` inclusive, fetching only days missing from store.
+
+        Complete past days are stored, today and days with missing hours are fetched again next time.
+        Days with no data on server are absent from result. Call `ensure_login()` first.
+        """
+        self._check_concurrency(max_concurrency)
+        days, missing = self._load_days(eso_object_id, start, end)
+        active_dates = self._plan_week_requests(missing)
+        _logger.info(
+            "mano.eso.lt %d days stored, fetching %d missing in %d requests",
+            len(days),
+            len(missing),
+            len(active_dates),
+        )
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            for datasets in executor.map(
+                lambda d: self.get_week_stats(eso_object_id, d), active_dates
+            ):
+                self._store_days(eso_object_id, datasets, days, start, end)
+        return dict(sorted(days.items()))
+
+
+class AsyncManoEsoLt(ManoEsoLt):
+    """Async ESO data extractor, keeps login cookies in own `httpx.AsyncClient`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._async_login_lock = asyncio.Lock()
+
+    @staticmethod
+    def _create_client() -> httpx.AsyncClient:
+        return create_async_http_client()
+
+    async def login(self) -> None:
+        response = await self.client.request(**self._build_login_request())
+        self._handle_login_response(response)
+        self.is_persisted_session = False
+
+    async def is_session_valid(self) -> bool:
+        """Async version of `ManoEsoLt.is_session_valid()`."""
+        if not self.cookies:
+            return False
+        response = await self.client.request(**self._build_session_check_request())
+        return self._handle_session_check_response(response)
+
+    async def ensure_login(self) -> None:
+        """Async version of `ManoEsoLt.ensure_login()`."""
+        if await self.is_session_valid():
+            _logger.info("mano.eso.lt reusing session of %s", self.username)
+            return
+        await self.login()
 
-            return result
+    async def get_week_series(
+        self, eso_object_id: str, date: datetime.date | datetime.datetime
+    ) -> list[ConsumptionSeries]:
+        """Async version of `ManoEsoLt.get_week_series()`."""
+        generation = self._session_generation
+        response = await self.client.request(
+            **self._build_week_stats_request(eso_object_id, date)
+        )
+        if self._is_session_expired_response(response):
+            async with self._async_login_lock:
+                if self._session_generation == generation:
+                    _logger.info("mano.eso.lt session expired, logging in again")
+                    await self.login()
+            response = await self.client.request(
+                **self._build_week_stats_request(eso_object_id, date)
+            )
+        return self._parse_week_stats_response(response)
+
+    async def get_week_stats(
+        self, eso_object_id: str, date: datetime.date | datetime.datetime
+    ) -> list[ConsumptionDataset]:
+        """Async version of `ManoEsoLt.get_week_stats()`."""
+        return [
+            dataset
+            for series in await self.get_week_series(eso_object_id, date)
+            for dataset in series.to_datasets()
+        ]
+
+    async def sync_range(
+        self,
+        eso_object_id: str,
+        start: datetime.date,
+        end: datetime.date,
+        max_concurrency: int = 2,
+    ) -> dict[datetime.date, list[ConsumptionDataset]]:
+        """Async version of `ManoEsoLt.sync_range()`."""
+        semaphore = asyncio.Semaphore(self._check_concurrency(max_concurrency))
+        days, missing = self._load_days(eso_object_id, start, end)
+
+        async def fetch(active_date: datetime.date) -> list[ConsumptionDataset]:
+            async with semaphore:
+                return await self.get_week_stats(eso_object_id, active_date)
+
+        results = await asyncio.gather(
+            *(fetch(d) for d in self._plan_week_requests(missing))
+        )
+        for datasets in results:
+            self._store_days(eso_object_id, datasets, days, start, end)
+        return dict(sorted(days.items()))
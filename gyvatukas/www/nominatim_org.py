@@ -1,42 +1,90 @@
-import diskcache
+import json
+import logging
+import pathlib
+from typing import BinaryIO, Callable, Iterable
+
 import httpx
 
 from gyvatukas.exceptions import GyvatukasException
-from gyvatukas.internal import get_app_cache
+from gyvatukas.utils.cache import ResponseCacheMixin
+from gyvatukas.utils.http import get_async_http_client, get_http_client
+from gyvatukas.utils.ratelimit import RateLimiter
 
-cache = get_app_cache()
+_logger = logging.getLogger("gyvatukas")
 
 
-class NominatimOrg:
+class NominatimOrg(ResponseCacheMixin):
     """Nominatim.org API client.
 
     🚨 Employs 1 request per second rate limit, as per Nominatim.org policy.
     See: https://operations.osmfoundation.org/policies/nominatim/
+
+    Pass `cache=True` to cache results for `CACHE_TTLS` seconds in memory and app cache, keyed on
+    normalized address or coords rounded to ~10cm. Cache hits skip rate limit. Pass `use_cache=False`
+    to single call to bypass cache.
+
+    For self-hosted Nominatim pass `base_url` and, since public policy does not apply there, own `rate_limiter`.
     """
 
-    def __init__(self, user_agent: str):
+    RATE_LIMITER = RateLimiter(1, 1, name="www.nominatim.org")
+    CACHE_NAMESPACE = "www.nominatim.org"
+    CACHE_TTLS = {
+        "coords_to_address": 30 * 24 * 3600,
+        "address_to_coords": 30 * 24 * 3600,
+    }
+
+    def __init__(
+        self,
+        user_agent: str,
+        client: httpx.Client | None = None,
+        cache: bool = False,
+        base_url: str = "https://nominatim.openstreetmap.org",
+        rate_limiter: RateLimiter | None = None,
+    ):
         self.user_agent = user_agent
+        self.client = client
+        self.cache_enabled = cache
+        self.base_url = base_url.rstrip("/")
+        if rate_limiter is not None:
+            self.RATE_LIMITER = rate_limiter
         super().__init__()
 
+    def _get_client(self) -> httpx.Client:
+        return self.client or get_http_client()
+
     def _get_request_headers(self) -> dict:
         """Return request headers."""
         return {
             "User-Agent": self.user_agent,
         }
 
-    @diskcache.throttle(cache, 1, 1, name="www.nominatim.org")
-    def resolve_coords_to_address(self, lat: float, lon: float) -> str:
-        """Given lat/lon, return address."""
-        response = httpx.get(
-            "https://nominatim.openstreetmap.org/reverse",
-            params={
+    def _get_coords_cache_key(self, lat: float, lon: float) -> tuple[str, str]:
+        return self.base_url, f"{float(lat):.6f},{float(lon):.6f}"
+
+    @staticmethod
+    def _normalize_address(address: str) -> str:
+        return " ".join(address.lower().split())
+
+    def _get_address_cache_key(self, address: str) -> tuple[str, str]:
+        return self.base_url, self._normalize_address(address)
+
+    def _build_coords_to_address_request(self, lat: float, lon: float) -> dict:
+        return {
+            "method": "GET",
+            "url": f"{self.base_url}/reverse",
+            "params": {
                 "lat": lat,
                 "lon": lon,
                 "format": "json",
                 "limit": 1,
             },
-            headers=self._get_request_headers(),
-        )
+            "headers": self._get_request_headers(),
+        }
+
+    @staticmethod
+    def _parse_coords_to_address_response(
+        response: httpx.Response, lat: float, lon: float
+    ) -> str:
         data = response.json()
         if not data:
             raise GyvatukasException(
@@ -44,22 +92,22 @@ class NominatimOrg:
             )
         return data["display_name"]
 
-    @diskcache.throttle(cache, 1, 1, name="www.nominatim.org")
-    def resolve_address_to_coords(self, address: str) -> tuple[float, float]:
-        """Given address, return coords as lat/lon.
-
-        🚨 Precision required, since will return first match.
-        """
-        # todo: maybe return dataclass with bbox, formatted addr, etc?
-        response = httpx.get(
-            "https://nominatim.openstreetmap.org/search",
-            params={
+    def _build_address_to_coords_request(self, address: str) -> dict:
+        return {
+            "method": "GET",
+            "url": f"{self.base_url}/search",
+            "params": {
                 "q": address,
                 "format": "json",
                 "limit": 1,
             },
-            headers=self._get_request_headers(),
-        )
+            "headers": self._get_request_headers(),
+        }
+
+    @staticmethod
+    def _parse_address_to_coords_response(
+        response: httpx.Response, address: str
+    ) -> tuple[float, float]:
         data = response.json()
         if not data:
             raise GyvatukasException(
@@ -67,6 +115,204 @@ class NominatimOrg:
             )
         return data[0]["lat"], data[0]["lon"]
 
+    def resolve_coords_to_address(
+        self, lat: float, lon: float, use_cache: bool = True
+    ) -> str:
+        """Given lat/lon, return address."""
+
+        def fetch() -> str:
+            self.RATE_LIMITER.acquire()
+            response = self._get_client().request(
+                **self._build_coords_to_address_request(lat, lon)
+            )
+            return self._parse_coords_to_address_response(response, lat, lon)
+
+        key = self._get_coords_cache_key(lat, lon)
+        return self._cached("coords_to_address", key, fetch, use_cache=use_cache)
+
+    def resolve_address_to_coords(
+        self, address: str, use_cache: bool = True
+    ) -> tuple[float, float]:
+        """Given address, return coords as lat/lon.
+
+        🚨 Precision required, since will return first match.
+        """
+        # todo: maybe return dataclass with bbox, formatted addr, etc?
+
+        def fetch() -> tuple[float, float]:
+            self.RATE_LIMITER.acquire()
+            response = self._get_client().request(
+                **self._build_address_to_coords_request(address)
+            )
+            return self._parse_address_to_coords_response(response, address)
+
+        key = self._get_address_cache_key(address)
+        return self._cached("address_to_coords", key, fetch, use_cache=use_cache)
+
+    def resolve_addresses_to_coords(
+        self,
+        addresses: Iterable[str],
+        checkpoint_path: pathlib.Path | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
+    ) -> dict[str, tuple[float, float] | None]:
+        """Geocode many addresses, returns `{address: (lat, lon) or None if not found}`.
+
+        - Addresses are normalized (case, whitespace) and each unique one is resolved once.
+        - Every lookup goes through `resolve_address_to_coords()`, so cache (if enabled) is consulted
+          first and only misses wait for rate limit.
+        - Pass `checkpoint_path` to append every result to jsonl file. Addresses already in it are not
+          looked up again, so after crash or interrupt same call resumes where it left off.
+        - `progress_callback` receives `{"done", "total"}` after every resolved address.
+
+        Network errors are raised, results resolved so far stay in checkpoint.
+        """
+        addresses = list(addresses)
+        unique, resolved, pending = self._plan_batch(addresses, checkpoint_path)
+        checkpoint = self._open_checkpoint(checkpoint_path)
+        try:
+            for done, address in enumerate(
+                pending, start=len(unique) - len(pending) + 1
+            ):
+                try:
+                    coords = self.resolve_address_to_coords(address)
+                except GyvatukasException:
+                    coords = None
+                self._record_batch_result(resolved, checkpoint, address, coords)
+                if progress_callback is not None:
+                    progress_callback({"done": done, "total": len(unique)})
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+        return {a: resolved[self._normalize_address(a)] for a in addresses}
+
+    def _plan_batch(
+        self, addresses: list[str], checkpoint_path: pathlib.Path | None
+    ) -> tuple[dict, dict[str, tuple[float, float] | None], list[str]]:
+        """Return unique normalized addresses, results from checkpoint and addresses left to resolve."""
+        unique = dict.fromkeys(self._normalize_address(a) for a in addresses)
+        resolved = self._read_checkpoint(checkpoint_path) if checkpoint_path else {}
+        pending = [a for a in unique if a not in resolved]
+        _logger.info(
+            "geocoding %d unique addresses, %d from checkpoint",
+            len(unique),
+            len(unique) - len(pending),
+        )
+        return unique, resolved, pending
+
+    @staticmethod
+    def _open_checkpoint(checkpoint_path: pathlib.Path | None) -> BinaryIO | None:
+        if checkpoint_path is None:
+            return None
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        checkpoint = checkpoint_path.open("ab+")
+        if checkpoint.tell():
+            checkpoint.seek(-1, 2)
+            if checkpoint.read(1) != b"\n":
+                # Terminate torn line, so next row stays parseable.
+                checkpoint.write(b"\n")
+        return checkpoint
+
+    @staticmethod
+    def _record_batch_result(
+        resolved: dict,
+        checkpoint: BinaryIO | None,
+        address: str,
+        coords: tuple[float, float] | None,
+    ) -> None:
+        resolved[address] = coords
+        if checkpoint is not None:
+            row = json.dumps({"q": address, "coords": coords})
+            checkpoint.write(row.encode() + b"\n")
+            checkpoint.flush()
+
+    @staticmethod
+    def _read_checkpoint(path: pathlib.Path) -> dict[str, tuple[float, float] | None]:
+        """Read jsonl checkpoint, torn last line from crash mid-write is skipped."""
+        resolved = {}
+        if not path.exists():
+            return resolved
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                coords = row["coords"]
+                resolved[row["q"]] = tuple(coords) if coords is not None else None
+        return resolved
+
+
+class AsyncNominatimOrg(NominatimOrg):
+    """Async Nominatim.org API client, shares rate limit with `NominatimOrg`. Pass `client` as `httpx.AsyncClient`."""
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self.client or get_async_http_client()
+
+    async def resolve_coords_to_address(
+        self, lat: float, lon: float, use_cache: bool = True
+    ) -> str:
+        """Given lat/lon, return address."""
+
+        async def fetch() -> str:
+            await self.RATE_LIMITER.acquire_async()
+            response = await self._get_client().request(
+                **self._build_coords_to_address_request(lat, lon)
+            )
+            return self._parse_coords_to_address_response(response, lat, lon)
+
+        key = self._get_coords_cache_key(lat, lon)
+        return await self._cached_async(
+            "coords_to_address", key, fetch, use_cache=use_cache
+        )
+
+    async def resolve_address_to_coords(
+        self, address: str, use_cache: bool = True
+    ) -> tuple[float, float]:
+        """Given address, return coords as lat/lon.
+
+        🚨 Precision required, since will return first match.
+        """
+
+        async def fetch() -> tuple[float, float]:
+            await self.RATE_LIMITER.acquire_async()
+            response = await self._get_client().request(
+                **self._build_address_to_coords_request(address)
+            )
+            return self._parse_address_to_coords_response(response, address)
+
+        key = self._get_address_cache_key(address)
+        return await self._cached_async(
+            "address_to_coords", key, fetch, use_cache=use_cache
+        )
+
+    async def resolve_addresses_to_coords(
+        self,
+        addresses: Iterable[str],
+        checkpoint_path: pathlib.Path | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
+    ) -> dict[str, tuple[float, float] | None]:
+        """Async version of `NominatimOrg.resolve_addresses_to_coords()`."""
+        addresses = list(addresses)
+        unique, resolved, pending = self._plan_batch(addresses, checkpoint_path)
+        checkpoint = self._open_checkpoint(checkpoint_path)
+        try:
+            for done, address in enumerate(
+                pending, start=len(unique) - len(pending) + 1
+            ):
+                try:
+                    coords = await self.resolve_address_to_coords(address)
+                except GyvatukasException:
+                    coords = None
+                self._record_batch_result(resolved, checkpoint, address, coords)
+                if progress_callback is not None:
+                    progress_callback({"done": done, "total": len(unique)})
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+        return {a: resolved[self._normalize_address(a)] for a in addresses}
+
 
 if __name__ == "__main__":
     nom = NominatimOrg(user_agent="gyvatukas library")
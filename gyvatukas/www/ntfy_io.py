@@ -1,12 +1,28 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+import weakref
+from typing import Literal
+
 import httpx
-import diskcache
 
 from gyvatukas.exceptions import GyvatukasException
-from gyvatukas.internal import get_app_cache
+from gyvatukas.utils.http import get_async_http_client, get_http_client
+from gyvatukas.utils.ratelimit import RateLimiter
 
 from pydantic import BaseModel, Field
 
-cache = get_app_cache()
+_logger = logging.getLogger("gyvatukas")
+_open_batch_senders: "weakref.WeakSet[NtfyIOBatchSender]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_batch_senders() -> None:
+    """Flush senders still open at interpreter exit, set is weak so senders are not kept alive by it."""
+    for sender in list(_open_batch_senders):
+        sender.close()
 
 
 class NtfyIOParams(BaseModel):
@@ -25,27 +41,34 @@ class NtfyIO:
     See: https://docs.ntfy.sh/publish/
     """
 
-    def __init__(self, base_url: str = "https://ntfy.sh/"):
+    RATE_LIMITER = RateLimiter(1, 1, name="www.ntfy.io")
+
+    def __init__(
+        self, base_url: str = "https://ntfy.sh/", client: httpx.Client | None = None
+    ):
         self.base_url = base_url
+        self.client = client
         super().__init__()
 
+    def _get_client(self) -> httpx.Client:
+        return self.client or get_http_client()
+
     def _get_request_headers(self) -> dict:
         headers = {
             "Content-Type": "application/json",
         }
         return headers
 
-    @diskcache.throttle(cache, 1, 1, name="www.ntfy.io")
-    def post(self, payload: NtfyIOParams) -> dict:
-        try:
-            response = httpx.post(
-                self.base_url,
-                data=payload.model_dump_json(),
-                headers=self._get_request_headers(),
-                timeout=10,
-            )
-        except Exception as e:
-            raise GyvatukasException(f"Failed POST'ing to {self.base_url}: {e}")
+    def _build_post_request(self, payload: NtfyIOParams) -> dict:
+        return {
+            "method": "POST",
+            "url": self.base_url,
+            "content": payload.model_dump_json(),
+            "headers": self._get_request_headers(),
+            "timeout": 10,
+        }
+
+    def _parse_post_response(self, response: httpx.Response) -> dict:
         if not response.status_code or response.status_code >= 400:
             raise GyvatukasException(
                 f"{self.base_url} POST failed with status {response.status_code}: {response.text}"
@@ -54,3 +77,312 @@ class NtfyIO:
             return response.json()
         except Exception:  # noqa: Don't care.
             return {"status_code": response.status_code, "text": response.text}
+
+    def post(self, payload: NtfyIOParams) -> dict:
+        self.RATE_LIMITER.acquire()
+        try:
+            response = self._get_client().request(**self._build_post_request(payload))
+        except Exception as e:
+            raise GyvatukasException(f"Failed POST'ing to {self.base_url}: {e}")
+        return self._parse_post_response(response)
+
+
+class AsyncNtfyIO(NtfyIO):
+    """Async ntfy.sh API client, shares rate limit with `NtfyIO`. Pass `client` as `httpx.AsyncClient`."""
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self.client or get_async_http_client()
+
+    async def post(self, payload: NtfyIOParams) -> dict:
+        await self.RATE_LIMITER.acquire_async()
+        try:
+            response = await self._get_client().request(
+                **self._build_post_request(payload)
+            )
+        except Exception as e:
+            raise GyvatukasException(f"Failed POST'ing to {self.base_url}: {e}")
+        return self._parse_post_response(response)
+
+
+def _has_same_title(payloads: list[NtfyIOParams]) -> bool:
+    return len({p.title for p in payloads}) == 1
+
+
+def _format_line(payload: NtfyIOParams, same_title: bool) -> str:
+    """Line of merged message, prefixed with title when merged payloads have different titles."""
+    if same_title or not payload.title:
+        return payload.message
+    return f"{payload.title}: {payload.message}"
+
+
+def _merge_payloads(payloads: list[NtfyIOParams]) -> NtfyIOParams:
+    """Merge payloads of one topic into single notification, one message per line."""
+    first = payloads[0]
+    if len(payloads) == 1:
+        return first
+    same_title = _has_same_title(payloads)
+    lines = [_format_line(p, same_title) for p in payloads]
+    tags = list(dict.fromkeys(t for p in payloads for t in p.tags or []))
+    priorities = [p.priority for p in payloads if p.priority is not None]
+    return NtfyIOParams(
+        topic=first.topic,
+        message="\n".join(lines),
+        title=first.title if same_title else None,
+        tags=tags or None,
+        priority=max(priorities) if priorities else None,
+    )
+
+
+class NtfyIOBatchSender:
+    """Background sender for `NtfyIO`, turns bursts of notifications into few requests.
+
+    `submit()` puts payload into in-memory queue and returns immediately. Background thread waits
+    `window` seconds after first queued payload, merges payloads of the same topic into one notification
+    (up to `max_batch_messages` lines and `MAX_MESSAGE_BYTES`) and posts them with up to `max_concurrency`
+    requests at once, still respecting `NtfyIO.RATE_LIMITER`.
+
+    When queue holds `max_queue` payloads, `policy` decides: "block" waits up to `block_timeout` for space,
+    "drop_new" drops submitted payload, "drop_oldest" drops oldest queued one. Dropped and failed
+    payloads are counted in `get_stats()`, failures are logged. `close()`, leaving `with` block and
+    interpreter exit flush queued payloads. Sender threads are started upfront, so flushing still works
+    at interpreter exit, when no new threads or executor jobs can be started.
+
+    Usage:
+        >>> with NtfyIOBatchSender(NtfyIO(), window=2) as sender:
+        >>>     for i in range(100):
+        >>>         sender.submit(NtfyIOParams(topic="alerts", message=f"disk full #{i}"))
+    """
+
+    MAX_MESSAGE_BYTES = 4096  # ntfy.sh truncates longer messages.
+
+    def __init__(
+        self,
+        ntfy: NtfyIO | None = None,
+        window: float = 1.0,
+        max_queue: int = 1000,
+        max_concurrency: int = 4,
+        max_batch_messages: int = 50,
+        policy: Literal["block", "drop_new", "drop_oldest"] = "block",
+        block_timeout: float | None = 5.0,
+    ):
+        if policy not in ("block", "drop_new", "drop_oldest"):
+            raise ValueError(f"Unknown policy {policy!r}")
+        if max_queue < 1 or max_concurrency < 1 or max_batch_messages < 1:
+            raise ValueError(
+                "max_queue, max_concurrency and max_batch_messages must be at least 1"
+            )
+        self.ntfy = ntfy or NtfyIO()
+        self.window = window
+        self.max_concurrency = max_concurrency
+        self.max_batch_messages = max_batch_messages
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self._queue: queue.Queue[NtfyIOParams] = queue.Queue(maxsize=max_queue)
+        self._pending = 0  # Queued or in-flight payloads.
+        self._pending_cond = threading.Condition()
+        self._flush_now = threading.Event()
+        self._closing = threading.Event()
+        self._aborted = (
+            False  # Set when close() times out, remaining payloads are dropped.
+        )
+        self._submit_lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.sent_messages = 0
+        self.sent_requests = 0
+        self.failed_messages = 0
+
+        # Batcher stops taking from queue while all senders are busy, so full queue pushes back on submit().
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._chunks: queue.Queue[list[NtfyIOParams] | None] = queue.Queue()
+        self._senders = [
+            threading.Thread(target=self._work, name=f"ntfy-sender-{i}", daemon=True)
+            for i in range(max_concurrency)
+        ]
+        self._thread = threading.Thread(
+            target=self._run, name="ntfy-batcher", daemon=True
+        )
+        for thread in [*self._senders, self._thread]:
+            thread.start()
+        _open_batch_senders.add(self)
+
+    def __enter__(self) -> "NtfyIOBatchSender":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _done(self, count: int, outcome: str) -> None:
+        """Mark payloads as no longer pending, `outcome` is name of counter to increase."""
+        with self._pending_cond:
+            self._pending -= count
+            setattr(self, outcome, getattr(self, outcome) + count)
+            self._pending_cond.notify_all()
+
+    def submit(self, payload: NtfyIOParams) -> bool:
+        """Queue payload for sending, returns False if it was dropped."""
+        if self._closing.is_set():
+            raise GyvatukasException("NtfyIOBatchSender is closed")
+        with self._pending_cond:
+            self._pending += 1
+            self.submitted += 1
+        try:
+            if self.policy == "block":
+                self._queue.put(payload, timeout=self.block_timeout)
+            elif self.policy == "drop_new":
+                self._queue.put_nowait(payload)
+            else:
+                while True:
+                    try:
+                        self._queue.put_nowait(payload)
+                        break
+                    except queue.Full:
+                        try:
+                            self._queue.get_nowait()
+                        except queue.Empty:
+                            continue
+                        self._done(1, "dropped")
+        except queue.Full:
+            self._done(1, "dropped")
+            return False
+        return True
+
+    def _collect(self) -> list[NtfyIOParams]:
+        """Wait for first payload, then gather everything arriving within window."""
+        try:
+            payloads = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.window
+        while True:
+            remaining = deadline - time.monotonic()
+            if self._closing.is_set() or self._flush_now.is_set():
+                remaining = 0
+            try:
+                payloads.append(
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                if remaining <= 0:
+                    return payloads
+
+    def _chunk(self, payloads: list[NtfyIOParams]) -> list[list[NtfyIOParams]]:
+        # Chunk with differing titles may still end up with one title, prefixed size is then an upper bound.
+        same_title = _has_same_title(payloads)
+        chunks = []
+        chunk, size = [], 0
+        for payload in payloads:
+            payload_size = len(_format_line(payload, same_title).encode()) + 1
+            if chunk and (
+                len(chunk) >= self.max_batch_messages
+                or size + payload_size > self.MAX_MESSAGE_BYTES
+            ):
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append(payload)
+            size += payload_size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _send(self, payloads: list[NtfyIOParams]) -> None:
+        try:
+            self.ntfy.post(_merge_payloads(payloads))
+        except Exception as e:
+            _logger.warning(
+                "ntfy failed to send %d messages to %s: %s",
+                len(payloads),
+                payloads[0].topic,
+                e,
+            )
+            self._done(len(payloads), "failed_messages")
+        else:
+            with self._pending_cond:
+                self.sent_requests += 1
+            self._done(len(payloads), "sent_messages")
+        finally:
+            self._slots.release()
+
+    def _work(self) -> None:
+        while (chunk := self._chunks.get()) is not None:
+            if self._aborted:
+                self._done(len(chunk), "dropped")
+                self._slots.release()
+            else:
+                self._send(chunk)
+
+    def _run(self) -> None:
+        while not (self._closing.is_set() and self._queue.empty()):
+            payloads = self._collect()
+            by_topic: dict[str, list[NtfyIOParams]] = {}
+            for payload in payloads:
+                by_topic.setdefault(payload.topic, []).append(payload)
+            for topic_payloads in by_topic.values():
+                for chunk in self._chunk(topic_payloads):
+                    self._submit(chunk)
+
+    def _submit(self, chunk: list[NtfyIOParams]) -> None:
+        acquired = False
+        while not self._aborted and not acquired:
+            acquired = self._slots.acquire(timeout=0.1)
+        with self._submit_lock:
+            if self._aborted:
+                if acquired:
+                    self._slots.release()
+                self._done(len(chunk), "dropped")
+                return
+            self._chunks.put(chunk)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Send queued payloads now and wait until done, returns False on timeout."""
+        self._flush_now.set()
+        try:
+            with self._pending_cond:
+                return self._pending_cond.wait_for(
+                    lambda: self._pending == 0, timeout=timeout
+                )
+        finally:
+            self._flush_now.clear()
+
+    def close(self, timeout: float | None = 30.0) -> None:
+        """Stop accepting payloads, send queued ones and stop background threads.
+
+        Waits at most `timeout` seconds in total, payloads not sent by then are dropped.
+        """
+        if self._closing.is_set():
+            return
+        self._closing.set()
+        _open_batch_senders.discard(self)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining() -> float | None:
+            return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+        self._thread.join(remaining())
+        with self._submit_lock:
+            # Batcher stuck behind slow sends drops what it still holds, senders stop after queued chunks.
+            self._aborted = self._thread.is_alive()
+            for _ in self._senders:
+                self._chunks.put(None)
+        for thread in self._senders:
+            thread.join(remaining())
+        if any(thread.is_alive() for thread in [*self._senders, self._thread]):
+            self._aborted = True
+            _logger.warning(
+                "ntfy sender did not flush within %ss, dropping queued messages",
+                timeout,
+            )
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "pending": self._pending,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "sent_messages": self.sent_messages,
+            "sent_requests": self.sent_requests,
+            "failed_messages": self.failed_messages,
+        }
@@ -1,12 +1,256 @@
+import asyncio
+import datetime
+import email.utils
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional
+
 import httpx
-from typing import Any, Optional
 
+from gyvatukas.exceptions import GyvatukasException
+from gyvatukas.utils.cache import ResponseCacheMixin
+from gyvatukas.utils.http import get_async_http_client, get_http_client
+from gyvatukas.utils.simplestore import KeyValueStore
+
+_SSE_DONE = object()
+
+
+@dataclass
+class OpenrouterStreamDelta:
+    text: str
+    finish_reason: str | None = None
+    usage: dict | None = None  # Only set on last chunk.
+
+
+class _SseParser:
+    """Incremental server-sent events parser, feed it response lines one by one.
+
+    See: https://html.spec.whatwg.org/multipage/server-sent-events.html#event-stream-interpretation
+    """
+
+    def __init__(self):
+        self._data: list[str] = []
+
+    def feed(self, line: str) -> Any:
+        """Return parsed json event when line completes one, `_SSE_DONE` on `[DONE]`, otherwise None."""
+        if not line:
+            return self.flush()
+        if line.startswith(":"):
+            return None  # Comment, openrouter sends these as keep-alive.
+        field, _, value = line.partition(":")
+        if field == "data":
+            self._data.append(value[1:] if value.startswith(" ") else value)
+        return None
+
+    def flush(self) -> Any:
+        if not self._data:
+            return None
+        data = "\n".join(self._data)
+        self._data = []
+        if data == "[DONE]":
+            return _SSE_DONE
+        return json.loads(data)
+
+
+def _parse_stream_event(event: dict) -> OpenrouterStreamDelta:
+    if "error" in event:
+        raise GyvatukasException(f"openrouter.ai stream failed: {event['error']}")
+    choice = (event.get("choices") or [{}])[0]
+    delta = choice.get("delta") or {}
+    return OpenrouterStreamDelta(
+        text=delta.get("content") or choice.get("text") or "",
+        finish_reason=choice.get("finish_reason"),
+        usage=event.get("usage"),
+    )
+
+
+class OpenrouterPromptCache:
+    """Content-addressed cache of prompt results in any `KeyValueStore`, e.g. `DirStore`.
+
+    Key is sha256 of endpoint, model, prompt/messages and params, so only identical requests hit cache.
+    Least recently used results are evicted once there are more than `max_entries` or their json size
+    exceeds `max_bytes`. Bookkeeping is stored under `INDEX_KEY`, written every `INDEX_FLUSH_EVERY`
+    changes and on flush(), results written after last flush are picked up on next load.
+
+    Usage:
+        >>> cache = OpenrouterPromptCache(DirStore(Path("prompt_cache")), max_entries=5000)
+        >>> client = OpenrouterAi(token=token, prompt_cache=cache)
+        >>> print(cache.get_stats())
+    """
+
+    INDEX_KEY = "__index__"
+    INDEX_FLUSH_EVERY = 100
+
+    def __init__(
+        self,
+        store: KeyValueStore,
+        max_entries: int = 10_000,
+        max_bytes: int | None = None,
+    ):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+        self.store = store
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, int] = OrderedDict()  # key -> size, LRU first.
+        self._bytes = 0
+        self._dirty = 0
+        self._load_index()
+
+    @staticmethod
+    def make_key(endpoint: str, data: dict) -> str:
+        payload = json.dumps(
+            {"endpoint": endpoint, **data},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _get_size(value: Any) -> int:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode())
+
+    def _load_index(self) -> None:
+        saved = self.store.get(self.INDEX_KEY) or []
+        stored = set(self.store.keys()) - {self.INDEX_KEY}
+        for key, size in saved:
+            if key in stored:
+                self._index[key] = size
+        for key in stored - self._index.keys():
+            # Written after last index flush, age unknown so evict these first.
+            value = self.store.get(key)
+            if value is not None:
+                self._index[key] = self._get_size(value)
+                self._index.move_to_end(key, last=False)
+        self._bytes = sum(self._index.values())
+
+    def get(self, key: str) -> Any:
+        """Return cached result or None."""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            value = self.store.get(key)
+            if value is None:
+                self._bytes -= self._index.pop(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        size = self._get_size(value)
+        with self._lock:
+            self.store.set(key, value, override=True)
+            self._bytes += size - self._index.get(key, 0)
+            self._index[key] = size
+            self._index.move_to_end(key)
+            while len(self._index) > self.max_entries or (
+                self.max_bytes is not None
+                and self._bytes > self.max_bytes
+                and len(self._index) > 1
+            ):
+                evicted_key, evicted_size = self._index.popitem(last=False)
+                self.store.delete(evicted_key)
+                self._bytes -= evicted_size
+                self.evictions += 1
+            self._dirty += 1
+            if self._dirty >= self.INDEX_FLUSH_EVERY:
+                self._flush()
+
+    def _flush(self) -> None:
+        self.store.set(
+            self.INDEX_KEY, [[k, s] for k, s in self._index.items()], override=True
+        )
+        self._dirty = 0
+
+    def flush(self) -> None:
+        """Persist LRU order and sizes, call before exit to keep eviction order exact."""
+        with self._lock:
+            self._flush()
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class OpenrouterAi(ResponseCacheMixin):
+    """openrouter.ai API client.
+
+    Pass `cache=True` to cache model list for `CACHE_TTLS` seconds in memory and app cache.
+    Pass `use_cache=False` to single call to bypass cache. Model catalogue used by is_model_available()
+    and get_model() is always cached in memory and indexed by model id, in app cache too only with `cache=True`.
+    Pass `refresh=True` to reload it.
+
+    Every request has `timeout` seconds and is retried up to `max_retries` times on 408, 429, 5xx and
+    connection errors. Other transport errors (e.g. read timeout) are retried only for GET, since POST
+    may already be processed and billed. `Retry-After` header is honored (up to `RETRY_AFTER_MAX`), otherwise exponential
+    backoff with jitter is used. Latency and token usage of all requests is summed up in get_stats().
+
+    Pass `prompt_cache` to reuse results of identical prompt_structured() / prompt_simplified() calls,
+    see `OpenrouterPromptCache`. Only worth it for deterministic prompts, `use_cache=False` skips it per call.
+    """
 
-class OpenrouterAi:
     BASE_URL = "https://openrouter.ai/api/v1"
+    CACHE_NAMESPACE = "openrouter.ai"
+    CACHE_TTLS = {"models": 3600, "models_index": 3600}
+    RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+    # Raised before request reached server, safe to retry non-idempotent POST.
+    RETRY_SAFE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 30.0
+    RETRY_AFTER_MAX = 120.0
 
-    def __init__(self, token: str):
+    def __init__(
+        self,
+        token: str,
+        client: httpx.Client | None = None,
+        cache: bool = False,
+        timeout: float = 60,
+        max_retries: int = 3,
+        prompt_cache: OpenrouterPromptCache | None = None,
+    ):
         self.token = token
+        self.prompt_cache = prompt_cache
+        self.client = client
+        self.cache_enabled = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "latency_total_s": 0.0,
+            "latency_max_s": 0.0,
+        }
+
+    def _get_client(self) -> httpx.Client:
+        return self.client or get_http_client()
 
     def _auth_headers(self, extra: Optional[dict] = None) -> dict[str, str]:
         headers = {
@@ -17,22 +261,261 @@ class OpenrouterAi:
             headers.update(extra)
         return headers
 
-    def get_credits(self) -> dict[str, Any]:
-        response = httpx.get(f"{self.BASE_URL}/credits", headers=self._auth_headers())
-        response.raise_for_status()
-        return response.json()
+    def _build_get_request(self, path: str) -> dict:
+        return {
+            "method": "GET",
+            "url": f"{self.BASE_URL}{path}",
+            "headers": self._auth_headers(),
+        }
 
-    def get_models(self) -> dict[str, Any]:
-        response = httpx.get(f"{self.BASE_URL}/models", headers=self._auth_headers())
+    def _build_post_request(self, path: str, data: dict) -> dict:
+        return {
+            "method": "POST",
+            "url": f"{self.BASE_URL}{path}",
+            "headers": self._auth_headers(),
+            "json": data,
+        }
+
+    @staticmethod
+    def _build_structured_data(
+        model: str, messages: list[dict], max_tokens: int | None
+    ) -> dict:
+        data = {"model": model, "messages": messages}
+        if max_tokens is not None:
+            data["max_tokens"] = max_tokens
+        return data
+
+    @staticmethod
+    def _parse_retry_after(value: str | None) -> float | None:
+        """Parse `Retry-After` header given as seconds or http date."""
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            dt = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return max((dt - now).total_seconds(), 0.0)
+
+    def _get_retry_delay(
+        self, attempt: int, response: httpx.Response | None
+    ) -> float | None:
+        """Return seconds to wait before next attempt or None if request should not be retried.
+
+        `response` is None when request failed with connection error or timeout.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if response is not None:
+            if response.status_code not in self.RETRY_STATUS_CODES:
+                return None
+            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.RETRY_AFTER_MAX)
+        backoff = min(self.BACKOFF_BASE * 2**attempt, self.BACKOFF_MAX)
+        return backoff * random.uniform(0.5, 1.0)
+
+    def _record(self, latency: float, retried: bool = False, error: bool = False):
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["retries"] += retried
+            self._stats["errors"] += error
+            self._stats["latency_total_s"] += latency
+            self._stats["latency_max_s"] = max(self._stats["latency_max_s"], latency)
+
+    def _is_retryable_error(self, request: dict, error: httpx.TransportError) -> bool:
+        return request["method"] == "GET" or isinstance(error, self.RETRY_SAFE_ERRORS)
+
+    def _handle_transport_error(
+        self, request: dict, attempt: int, started: float, error: httpx.TransportError
+    ) -> float:
+        """Record failed attempt, return seconds to wait before next one or re-raise `error`."""
+        delay = (
+            self._get_retry_delay(attempt, None)
+            if self._is_retryable_error(request, error)
+            else None
+        )
+        self._record(time.perf_counter() - started, delay is not None, True)
+        if delay is None:
+            raise error
+        return delay
+
+    def _send(self, request: dict) -> httpx.Response:
+        request = {"timeout": self.timeout, **request}
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self._get_client().request(**request)
+            except httpx.TransportError as e:
+                delay = self._handle_transport_error(request, attempt, started, e)
+            else:
+                delay = self._get_retry_delay(attempt, response)
+                self._record(time.perf_counter() - started, delay is not None)
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> dict[str, Any]:
         response.raise_for_status()
         return response.json()
 
-    def is_model_available(self, model: str) -> bool:
-        models_data = self.get_models()
-        for m in models_data.get("data", []):
-            if m.get("id") == model:
-                return True
-        return False
+    def _record_usage(self, usage: dict | None) -> None:
+        usage = usage or {}
+        with self._stats_lock:
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                self._stats[key] += usage.get(key) or 0
+
+    def _parse_completion_response(self, response: httpx.Response) -> dict[str, Any]:
+        result = self._parse_response(response)
+        self._record_usage(result.get("usage"))
+        return result
+
+    def _cached_prompt(
+        self, endpoint: str, data: dict, fetch: Callable[[], dict], use_cache: bool
+    ) -> dict[str, Any]:
+        if self.prompt_cache is None or not use_cache:
+            return fetch()
+        key = self.prompt_cache.make_key(endpoint, data)
+        result = self.prompt_cache.get(key)
+        if result is None:
+            result = fetch()
+            self.prompt_cache.set(key, result)
+        return result
+
+    async def _cached_prompt_async(
+        self,
+        endpoint: str,
+        data: dict,
+        fetch: Callable[[], Awaitable[dict]],
+        use_cache: bool,
+    ) -> dict[str, Any]:
+        if self.prompt_cache is None or not use_cache:
+            return await fetch()
+        key = self.prompt_cache.make_key(endpoint, data)
+        result = self.prompt_cache.get(key)
+        if result is None:
+            result = await fetch()
+            self.prompt_cache.set(key, result)
+        return result
+
+    @staticmethod
+    def _build_stream_data(data: dict) -> dict:
+        return {**data, "stream": True, "usage": {"include": True}}
+
+    def _handle_stream_event(self, event: dict) -> OpenrouterStreamDelta:
+        delta = _parse_stream_event(event)
+        self._record_usage(delta.usage)
+        return delta
+
+    def _stream(self, request: dict) -> Iterator[OpenrouterStreamDelta]:
+        """Send streaming request and yield parsed deltas.
+
+        Retries apply only to connection errors and retryable status codes before stream starts, not to broken
+        streams.
+        """
+        request = {"timeout": self.timeout, **request}
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            client = self._get_client()
+            try:
+                response = client.send(client.build_request(**request), stream=True)
+            except httpx.TransportError as e:
+                delay = self._handle_transport_error(request, attempt, started, e)
+            else:
+                try:
+                    delay = self._get_retry_delay(attempt, response)
+                    if delay is None:
+                        if response.is_error:
+                            response.read()
+                            self._record(time.perf_counter() - started)
+                            response.raise_for_status()
+                        parser = _SseParser()
+                        error = False
+                        try:
+                            for line in response.iter_lines():
+                                event = parser.feed(line)
+                                if event is _SSE_DONE:
+                                    break
+                                if event is not None:
+                                    yield self._handle_stream_event(event)
+                            else:
+                                # Last event may not be followed by blank line.
+                                event = parser.flush()
+                                if event is not None and event is not _SSE_DONE:
+                                    yield self._handle_stream_event(event)
+                        except GeneratorExit:
+                            raise  # Consumer stopped early, not an error.
+                        except BaseException:
+                            error = True
+                            raise
+                        finally:
+                            self._record(time.perf_counter() - started, error=error)
+                        return
+                finally:
+                    response.close()
+                self._record(time.perf_counter() - started, retried=True)
+            time.sleep(delay)
+            attempt += 1
+
+    def get_stats(self) -> dict:
+        """Return request, retry, token and latency totals of this client."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["latency_avg_s"] = (
+            stats["latency_total_s"] / stats["requests"] if stats["requests"] else 0.0
+        )
+        return stats
+
+    @staticmethod
+    def _build_model_index(models_data: dict) -> dict[str, dict]:
+        return {m["id"]: m for m in models_data.get("data", []) if "id" in m}
+
+    def get_credits(self) -> dict[str, Any]:
+        response = self._send(self._build_get_request("/credits"))
+        return self._parse_response(response)
+
+    def get_models(self, use_cache: bool = True) -> dict[str, Any]:
+        def fetch() -> dict[str, Any]:
+            response = self._send(self._build_get_request("/models"))
+            return self._parse_response(response)
+
+        # Model list is public, same for every token.
+        return self._cached("models", self.BASE_URL, fetch, use_cache=use_cache)
+
+    def get_model_index(self, refresh: bool = False) -> dict[str, dict]:
+        """Return `{model_id: model}` catalogue, cached for `CACHE_TTLS["models_index"]` seconds.
+
+        Kept in memory only unless client was created with `cache=True`.
+        """
+        cache = self._get_response_cache("models_index", disk=self.cache_enabled)
+        if refresh:
+            cache.delete(self.BASE_URL)
+        return cache.get_or_set(
+            self.BASE_URL,
+            lambda: self._build_model_index(self.get_models(use_cache=False)),
+        )
+
+    def is_model_available(self, model: str, refresh: bool = False) -> bool:
+        return model in self.get_model_index(refresh=refresh)
+
+    def get_model(self, model: str, refresh: bool = False) -> dict | None:
+        """Return model metadata (`context_length`, `pricing`, `architecture`, ...) or None if unknown."""
+        return self.get_model_index(refresh=refresh).get(model)
+
+    def get_model_context_length(self, model: str) -> int | None:
+        return (self.get_model(model) or {}).get("context_length")
+
+    def get_model_pricing(self, model: str) -> dict | None:
+        """Return pricing as given by API, USD per token as strings, e.g. `{"prompt": "0.0000003", ...}`."""
+        return (self.get_model(model) or {}).get("pricing")
 
     def prompt_structured(
         self,
@@ -40,40 +523,295 @@ class OpenrouterAi:
         model: str,
         messages: list[dict],
         max_tokens: int | None = None,
+        use_cache: bool = True,
     ) -> dict[str, Any]:
         """
         Send a structured chat prompt to the /api/v1/chat/completions endpoint.
         Only model, messages, and max_tokens are supported.
         """
-        data = {"model": model, "messages": messages}
-        if max_tokens is not None:
-            data["max_tokens"] = max_tokens
-        response = httpx.post(
-            f"{self.BASE_URL}/chat/completions",
-            headers=self._auth_headers(),
-            json=data,
-        )
-        response.raise_for_status()
-        return response.json()
+        data = self._build_structured_data(model, messages, max_tokens)
+
+        def fetch() -> dict[str, Any]:
+            response = self._send(self._build_post_request("/chat/completions", data))
+            return self._parse_completion_response(response)
+
+        return self._cached_prompt("/chat/completions", data, fetch, use_cache)
 
     def prompt_simplified(
         self,
         *,
         model: str,
         prompt: str,
+        use_cache: bool = True,
     ) -> dict[str, Any]:
         """
         Send a simple text-only prompt to the /api/v1/completions endpoint.
         Only model and prompt are supported.
         """
         data = {"model": model, "prompt": prompt}
-        response = httpx.post(
-            f"{self.BASE_URL}/completions",
-            headers=self._auth_headers(),
-            json=data,
+
+        def fetch() -> dict[str, Any]:
+            response = self._send(self._build_post_request("/completions", data))
+            return self._parse_completion_response(response)
+
+        return self._cached_prompt("/completions", data, fetch, use_cache)
+
+    def prompt_structured_stream(
+        self,
+        *,
+        model: str,
+        messages: list[dict],
+        max_tokens: int | None = None,
+    ) -> Iterator[OpenrouterStreamDelta]:
+        """Streaming version of prompt_structured(), yields text deltas as they arrive.
+
+        Last delta carries token `usage` of the whole completion.
+        """
+        data = self._build_structured_data(model, messages, max_tokens)
+        data = self._build_stream_data(data)
+        yield from self._stream(self._build_post_request("/chat/completions", data))
+
+    def prompt_simplified_stream(
+        self,
+        *,
+        model: str,
+        prompt: str,
+    ) -> Iterator[OpenrouterStreamDelta]:
+        """Streaming version of prompt_simplified(), see prompt_structured_stream()."""
+        data = self._build_stream_data({"model": model, "prompt": prompt})
+        yield from self._stream(self._build_post_request("/completions", data))
+
+    def prompt_structured_many(
+        self,
+        *,
+        model: str,
+        messages_batch: Iterable[list[dict]],
+        max_tokens: int | None = None,
+        max_concurrency: int = 8,
+    ) -> list[dict[str, Any] | Exception]:
+        """Send many structured prompts, at most `max_concurrency` at a time.
+
+        Returns results in input order. Prompts that still fail after retries are returned as exception
+        instead of raised, so one bad item does not lose the whole batch. Totals are in get_stats().
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+
+        def prompt(messages: list[dict]) -> dict[str, Any] | Exception:
+            try:
+                return self.prompt_structured(
+                    model=model, messages=messages, max_tokens=max_tokens
+                )
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(prompt, messages_batch))
+
+
+class AsyncOpenrouterAi(OpenrouterAi):
+    """Async openrouter.ai API client. Pass `client` as `httpx.AsyncClient`."""
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self.client or get_async_http_client()
+
+    async def _send_async(self, request: dict) -> httpx.Response:
+        request = {"timeout": self.timeout, **request}
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await self._get_client().request(**request)
+            except httpx.TransportError as e:
+                delay = self._handle_transport_error(request, attempt, started, e)
+            else:
+                delay = self._get_retry_delay(attempt, response)
+                self._record(time.perf_counter() - started, delay is not None)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _stream_async(
+        self, request: dict
+    ) -> AsyncIterator[OpenrouterStreamDelta]:
+        """Async version of `OpenrouterAi._stream()`."""
+        request = {"timeout": self.timeout, **request}
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            client = self._get_client()
+            try:
+                response = await client.send(
+                    client.build_request(**request), stream=True
+                )
+            except httpx.TransportError as e:
+                delay = self._handle_transport_error(request, attempt, started, e)
+            else:
+                try:
+                    delay = self._get_retry_delay(attempt, response)
+                    if delay is None:
+                        if response.is_error:
+                            await response.aread()
+                            self._record(time.perf_counter() - started)
+                            response.raise_for_status()
+                        parser = _SseParser()
+                        error = False
+                        try:
+                            async for line in response.aiter_lines():
+                                event = parser.feed(line)
+                                if event is _SSE_DONE:
+                                    break
+                                if event is not None:
+                                    yield self._handle_stream_event(event)
+                            else:
+                                # Last event may not be followed by blank line.
+                                event = parser.flush()
+                                if event is not None and event is not _SSE_DONE:
+                                    yield self._handle_stream_event(event)
+                        except GeneratorExit:
+                            raise  # Consumer stopped early, not an error.
+                        except BaseException:
+                            error = True
+                            raise
+                        finally:
+                            self._record(time.perf_counter() - started, error=error)
+                        return
+                finally:
+                    await response.aclose()
+                self._record(time.perf_counter() - started, retried=True)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get_credits(self) -> dict[str, Any]:
+        response = await self._send_async(self._build_get_request("/credits"))
+        return self._parse_response(response)
+
+    async def get_models(self, use_cache: bool = True) -> dict[str, Any]:
+        async def fetch() -> dict[str, Any]:
+            response = await self._send_async(self._build_get_request("/models"))
+            return self._parse_response(response)
+
+        return await self._cached_async(
+            "models", self.BASE_URL, fetch, use_cache=use_cache
         )
-        response.raise_for_status()
-        return response.json()
+
+    async def get_model_index(self, refresh: bool = False) -> dict[str, dict]:
+        """Async version of `OpenrouterAi.get_model_index()`."""
+        cache = self._get_response_cache("models_index", disk=self.cache_enabled)
+        if refresh:
+            cache.delete(self.BASE_URL)
+
+        async def fetch() -> dict[str, dict]:
+            return self._build_model_index(await self.get_models(use_cache=False))
+
+        return await cache.get_or_set_async(self.BASE_URL, fetch)
+
+    async def is_model_available(self, model: str, refresh: bool = False) -> bool:
+        return model in await self.get_model_index(refresh=refresh)
+
+    async def get_model(self, model: str, refresh: bool = False) -> dict | None:
+        return (await self.get_model_index(refresh=refresh)).get(model)
+
+    async def get_model_context_length(self, model: str) -> int | None:
+        return (await self.get_model(model) or {}).get("context_length")
+
+    async def get_model_pricing(self, model: str) -> dict | None:
+        return (await self.get_model(model) or {}).get("pricing")
+
+    async def prompt_structured(
+        self,
+        *,
+        model: str,
+        messages: list[dict],
+        max_tokens: int | None = None,
+        use_cache: bool = True,
+    ) -> dict[str, Any]:
+        """Async version of `OpenrouterAi.prompt_structured()`."""
+        data = self._build_structured_data(model, messages, max_tokens)
+
+        async def fetch() -> dict[str, Any]:
+            response = await self._send_async(
+                self._build_post_request("/chat/completions", data)
+            )
+            return self._parse_completion_response(response)
+
+        return await self._cached_prompt_async(
+            "/chat/completions", data, fetch, use_cache
+        )
+
+    async def prompt_simplified(
+        self,
+        *,
+        model: str,
+        prompt: str,
+        use_cache: bool = True,
+    ) -> dict[str, Any]:
+        """Async version of `OpenrouterAi.prompt_simplified()`."""
+        data = {"model": model, "prompt": prompt}
+
+        async def fetch() -> dict[str, Any]:
+            response = await self._send_async(
+                self._build_post_request("/completions", data)
+            )
+            return self._parse_completion_response(response)
+
+        return await self._cached_prompt_async("/completions", data, fetch, use_cache)
+
+    async def prompt_structured_stream(
+        self,
+        *,
+        model: str,
+        messages: list[dict],
+        max_tokens: int | None = None,
+    ) -> AsyncIterator[OpenrouterStreamDelta]:
+        """Async version of `OpenrouterAi.prompt_structured_stream()`."""
+        data = self._build_structured_data(model, messages, max_tokens)
+        data = self._build_stream_data(data)
+        request = self._build_post_request("/chat/completions", data)
+        async for delta in self._stream_async(request):
+            yield delta
+
+    async def prompt_simplified_stream(
+        self,
+        *,
+        model: str,
+        prompt: str,
+    ) -> AsyncIterator[OpenrouterStreamDelta]:
+        """Async version of `OpenrouterAi.prompt_simplified_stream()`."""
+        data = self._build_stream_data({"model": model, "prompt": prompt})
+        async for delta in self._stream_async(
+            self._build_post_request("/completions", data)
+        ):
+            yield delta
+
+    async def prompt_structured_many(
+        self,
+        *,
+        model: str,
+        messages_batch: Iterable[list[dict]],
+        max_tokens: int | None = None,
+        max_concurrency: int = 8,
+    ) -> list[dict[str, Any] | Exception]:
+        """Async version of `OpenrouterAi.prompt_structured_many()`."""
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def prompt(messages: list[dict]) -> dict[str, Any] | Exception:
+            async with semaphore:
+                try:
+                    return await self.prompt_structured(
+                        model=model, messages=messages, max_tokens=max_tokens
+                    )
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(prompt(m) for m in messages_batch))
 
 
 # TODO: get_image_description -> padaryt prompta per kuri aprasytu perduota img.
@@ -113,3 +851,9 @@ if __name__ == "__main__":
     simple_prompt = "Write a short poem about the sunrise."
     simple_result = client.prompt_simplified(model=simple_model, prompt=simple_prompt)
     print("Prompt result (simplified):", simple_result)
+
+    # Step 5: Streaming prompt example
+    for delta in client.prompt_structured_stream(model=model, messages=messages):
+        print(delta.text, end="", flush=True)
+        if delta.usage:
+            print("\nUsage:", delta.usage)
@@ -1,25 +1,182 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Callable, Hashable, Iterator
+
 import httpx
-import diskcache
 
-from gyvatukas.internal import get_app_cache
+from gyvatukas.exceptions import GyvatukasException
+from gyvatukas.utils.http import get_async_http_client, get_http_client
+from gyvatukas.utils.ratelimit import RateLimiter
+
+_logger = logging.getLogger("gyvatukas")
+
+
+class _WatchState:
+    """Change detection, conditional request validators and adaptive interval of one `watch()` loop."""
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        backoff: float,
+        key: Callable[[dict], Hashable] | None,
+    ):
+        if not 0 <= min_interval <= max_interval or backoff < 1:
+            raise ValueError(
+                f"Need 0 <= min_interval <= max_interval and backoff >= 1, got {min_interval=} {max_interval=} {backoff=}"
+            )
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.key = key or (lambda song: json.dumps(song, sort_keys=True, default=str))
+        self.interval = min_interval
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self.last_key: Hashable | None = None
+
+    def get_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def _slow_down(self) -> None:
+        self.interval = min(max(self.interval, 0.1) * self.backoff, self.max_interval)
 
-cache = get_app_cache()
+    def handle_response(self, response: httpx.Response) -> dict | None:
+        """Return song if it changed since last poll, otherwise None."""
+        if response.status_code == 304:
+            self._slow_down()
+            return None
+        if response.status_code != 200:
+            raise GyvatukasException(
+                f"powerhitradio.lt returned status {response.status_code}"
+            )
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        song = PowerHitRadioLt._parse_currently_playing_response(response)
+        key = self.key(song)
+        if key == self.last_key:
+            self._slow_down()
+            return None
+        self.last_key = key
+        self.interval = self.min_interval
+        return song
+
+    def handle_error(self, error: Exception) -> None:
+        _logger.warning("powerhitradio.lt poll failed: %s", error)
+        self.interval = self.max_interval
 
 
 class PowerHitRadioLt:
     URL_CURRENTLY_PLAYING = "https://powerhitradio.tv3.lt/Pwr/lastSong"
+    RATE_LIMITER = RateLimiter(1, 1, name="www.powerhitradio.lt")
+
+    def __init__(self, client: httpx.Client | None = None):
+        self.client = client
+
+    def _get_client(self) -> httpx.Client:
+        return self.client or get_http_client()
+
+    def _build_currently_playing_request(self, headers: dict | None = None) -> dict:
+        request = {"method": "GET", "url": self.URL_CURRENTLY_PLAYING}
+        if headers:
+            request["headers"] = headers
+        return request
+
+    @staticmethod
+    def _parse_currently_playing_response(response: httpx.Response) -> dict:
+        data = response.json()
+        return data
 
-    @diskcache.throttle(cache, 1, 1, name="www.powerhitradio.lt")
     def get_currently_playing(self) -> dict:
         """Get currently playing song from Power Hit Radio LT.
 
         Returns parsed result, original response is stored in `_raw` key.
         """
-        response = httpx.get(url=self.URL_CURRENTLY_PLAYING)
-        data = response.json()
-        return data
+        self.RATE_LIMITER.acquire()
+        response = self._get_client().request(**self._build_currently_playing_request())
+        return self._parse_currently_playing_response(response)
+
+    def watch(
+        self,
+        min_interval: float = 5,
+        max_interval: float = 60,
+        backoff: float = 1.5,
+        key: Callable[[dict], Hashable] | None = None,
+    ) -> Iterator[dict]:
+        """Poll currently playing song forever, yield it only when it changes, starting with current one.
+
+        Interval starts at `min_interval` after every change and grows by `backoff` up to `max_interval`
+        while song stays the same. Requests reuse pooled connection and send `If-None-Match` /
+        `If-Modified-Since` when server returns validators. Songs are compared by `key(song)`, whole
+        response by default. Failed polls are logged and retried after `max_interval`.
+
+        Usage:
+            >>> for song in PowerHitRadioLt().watch():
+            >>>     print(song)
+        """
+        state = _WatchState(min_interval, max_interval, backoff, key)
+        while True:
+            self.RATE_LIMITER.acquire()
+            song = None
+            try:
+                response = self._get_client().request(
+                    **self._build_currently_playing_request(state.get_headers())
+                )
+                song = state.handle_response(response)
+            except (httpx.HTTPError, GyvatukasException, ValueError) as e:
+                state.handle_error(e)
+            if song is not None:
+                yield song
+            time.sleep(state.interval)
+
+
+class AsyncPowerHitRadioLt(PowerHitRadioLt):
+    """Async Power Hit Radio LT client, shares rate limit with `PowerHitRadioLt`. Pass `client` as `httpx.AsyncClient`."""
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self.client or get_async_http_client()
+
+    async def get_currently_playing(self) -> dict:
+        """Get currently playing song from Power Hit Radio LT."""
+        await self.RATE_LIMITER.acquire_async()
+        response = await self._get_client().request(
+            **self._build_currently_playing_request()
+        )
+        return self._parse_currently_playing_response(response)
+
+    async def watch(
+        self,
+        min_interval: float = 5,
+        max_interval: float = 60,
+        backoff: float = 1.5,
+        key: Callable[[dict], Hashable] | None = None,
+    ) -> AsyncIterator[dict]:
+        """Async version of `PowerHitRadioLt.watch()`."""
+        state = _WatchState(min_interval, max_interval, backoff, key)
+        while True:
+            await self.RATE_LIMITER.acquire_async()
+            song = None
+            try:
+                response = await self._get_client().request(
+                    **self._build_currently_playing_request(state.get_headers())
+                )
+                song = state.handle_response(response)
+            except (httpx.HTTPError, GyvatukasException, ValueError) as e:
+                state.handle_error(e)
+            if song is not None:
+                yield song
+            await asyncio.sleep(state.interval)
 
 
 if __name__ == "__main__":
     phr = PowerHitRadioLt()
     print(phr.get_currently_playing())
+    # Prints every new song, stop with Ctrl+C.
+    for song in phr.watch():
+        print(song)
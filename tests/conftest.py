@@ -0,0 +1,14 @@
+import diskcache
+import pytest
+
+import gyvatukas.utils.cache as cache_module
+
+
+@pytest.fixture
+def app_cache(monkeypatch, tmp_path):
+    """Isolate response caches from real app cache."""
+    disk = diskcache.Cache(directory=tmp_path / "app_cache")
+    monkeypatch.setattr(cache_module, "get_app_cache", lambda: disk)
+    monkeypatch.setattr(cache_module, "_tiered_caches", {})
+    yield disk
+    disk.close()
@@ -0,0 +1,379 @@
+import gzip
+import pathlib
+import threading
+
+import pytest
+
+from gyvatukas.exceptions import GyvatukasException
+import gyvatukas.services.iptoolkit as iptoolkit
+from gyvatukas.services.iptoolkit import IpToolKit, IpRangeIndex
+from gyvatukas.utils.dt import get_utc_today
+from gyvatukas.utils.ip import ip_to_int
+from gyvatukas.utils.sql import close_connections, get_conn_cur
+
+ASSETS = pathlib.Path("tests/assets")
+
+ROWS = [
+    # ipf, ipt, cc, provider
+    ("1.0.0.0", "1.0.0.255", "AU", "db-ip.com"),
+    ("1.0.1.0", "1.0.3.255", "CN", "db-ip.com"),
+    ("8.8.8.0", "8.8.8.255", "US", "db-ip.com"),
+    ("1.0.0.0", "1.0.0.127", "AU", "ipinfo.io"),
+    ("1.0.0.128", "1.0.0.255", "NZ", "ipinfo.io"),
+    ("8.8.4.0", "8.8.8.255", "US", "ipinfo.io"),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "iptoolkit.db"
+    with get_conn_cur(path) as (conn, cur):
+        conn.executescript(IpToolKit.DB_SCHEMA)
+        conn.executemany(
+            "INSERT INTO ip_to_country(ipf, ipt, cc, provider) VALUES (?, ?, ?, ?)",
+            [(ip_to_int(ipf), ip_to_int(ipt), cc, p) for ipf, ipt, cc, p in ROWS],
+        )
+    yield path
+    close_connections()
+
+
+@pytest.mark.parametrize(
+    "ip, expected_result",
+    [
+        ("1.0.0.1", "AU"),
+        ("1.0.2.1", "CN"),
+        ("8.8.8.8", "US"),
+        ("8.8.4.4", "US"),
+        ("0.0.0.1", None),
+        ("1.0.4.0", None),
+        ("255.255.255.255", None),
+    ],
+)
+def test_in_memory_lookup_matches_sqlite(db_path, ip, expected_result):
+    iptk_sql = IpToolKit(db_path=db_path)
+    iptk_mem = IpToolKit(db_path=db_path, in_memory=True)
+
+    assert iptk_sql.get_country_by_ipv4(ip) == expected_result
+    assert iptk_mem.get_country_by_ipv4(ip) == expected_result
+
+
+def test_in_memory_index_flattens_overlaps(db_path):
+    iptk = IpToolKit(db_path=db_path, in_memory=True)
+    index = iptk._index
+
+    # Overlapping ranges are split into disjoint ones, adjacent ones with same country are merged.
+    assert list(index.starts) == sorted(index.starts)
+    for i in range(1, len(index)):
+        assert index.ends[i - 1] < index.starts[i]
+    # Providers disagree 1:1, smallest country code wins everywhere.
+    assert index.lookup(ip_to_int("1.0.0.200")) == "AU"
+    iptk_sql = IpToolKit(db_path=db_path)
+    assert iptk_sql.get_country_by_ipv4("1.0.0.200") == "AU"
+    assert iptk_sql.get_countries_by_ipv4(["1.0.0.200"]) == ["AU"]
+
+    usage = index.get_memory_usage()
+    assert usage["ranges"] == len(index)
+    assert usage["total_bytes"] > 0
+
+
+def test_range_index_empty():
+    index = IpRangeIndex.from_ranges([])
+    assert len(index) == 0
+    assert index.lookup(ip_to_int("8.8.8.8")) is None
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_get_countries_by_ipv4(db_path, in_memory):
+    iptk = IpToolKit(db_path=db_path, in_memory=in_memory)
+    ips = ["8.8.8.8", "1.0.0.1", "0.0.0.1", "1.0.2.1", "8.8.8.8", "8.8.4.4"]
+
+    result = iptk.get_countries_by_ipv4(ips)
+
+    assert result == [iptk.get_country_by_ipv4(ip) for ip in ips]
+    assert result == ["US", "AU", None, "CN", "US", "US"]
+    assert iptk.get_countries_by_ipv4([]) == []
+
+
+def test_get_countries_by_ipv4_sparse_batch(db_path, monkeypatch):
+    monkeypatch.setattr(iptoolkit, "_LOOKUP_MANY_MAX_GAP", 1 << 8)
+    iptk = IpToolKit(db_path=db_path, cache_size=0)
+    # 8.8.4.0-8.8.8.255 spans the gap between 8.8.4.4 and 8.8.8.8, so it is clipped per query.
+    ips = ["8.8.8.8", "1.0.0.1", "1.0.0.200", "1.0.2.1", "8.8.4.4", "0.0.0.1"]
+    assert iptk.get_countries_by_ipv4(ips) == [
+        iptk.get_country_by_ipv4(ip) for ip in ips
+    ]
+    assert iptk.get_countries_by_ipv4(ips) == ["US", "AU", "AU", "CN", "US", None]
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_get_countries_by_ipv4_numpy(db_path, in_memory):
+    np = pytest.importorskip("numpy")
+    iptk = IpToolKit(db_path=db_path, in_memory=in_memory)
+    ips = ["8.8.8.8", "0.0.0.1", "1.0.2.1", "255.255.255.255"]
+    expected = ["US", None, "CN", None]
+
+    result = iptk.get_countries_by_ipv4(np.array(ips))
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == expected
+
+    result = iptk.get_countries_by_ipv4(
+        np.array([ip_to_int(ip) for ip in ips], dtype=np.uint32)
+    )
+    assert result.tolist() == expected
+
+
+def test_lookup_cache(db_path):
+    iptk = IpToolKit(db_path=db_path, cache_size=2)
+
+    assert iptk.get_country_by_ipv4("8.8.8.8") == "US"
+    assert iptk.get_country_by_ipv4("8.8.8.8") == "US"
+    assert iptk.get_country_by_ipv4("0.0.0.1") is None
+    assert iptk.get_country_by_ipv4("0.0.0.1") is None
+    assert iptk.get_country_by_ipv4("1.0.0.1") == "AU"
+
+    stats = iptk.get_stats()
+    assert stats["rows_total"] == len(ROWS)
+    assert stats["rows_per_provider"] == {"db-ip.com": 3, "ipinfo.io": 3}
+    assert stats["cache"]["hits"] == 2
+    assert stats["cache"]["misses"] == 3
+    assert stats["cache"]["evictions"] == 1
+    assert stats["cache"]["size"] == 2
+
+
+def test_lookup_cache_disabled(db_path):
+    iptk = IpToolKit(db_path=db_path, cache_size=0)
+    assert iptk.get_country_by_ipv4("8.8.8.8") == "US"
+    assert iptk.get_stats()["cache"] is None
+
+
+def _gz_chunks(path: pathlib.Path, chunk_size: int = 64) -> list[bytes]:
+    data = gzip.compress(path.read_bytes())
+    return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+@pytest.mark.parametrize(
+    "provider, fixture, expected_rows",
+    [
+        ("db-ip.com", "dbip-country-lite.csv", 9),
+        ("ipinfo.io", "ipinfo-country.csv", 5),
+    ],
+)
+def test_ingest_streams_fixture(db_path, provider, fixture, expected_rows):
+    progress = []
+    iptk = IpToolKit(db_path=db_path, progress_callback=progress.append)
+    iptk.INSERT_CHUNK_SIZE = 3
+    chunks = _gz_chunks(ASSETS / fixture)
+
+    rows = iptk._ingest(
+        provider=provider, chunks=chunks, bytes_total=sum(map(len, chunks))
+    )
+
+    assert rows == expected_rows
+    assert iptk.get_stats()["rows_per_provider"][provider] == expected_rows
+    assert [p["rows"] for p in progress] == sorted(p["rows"] for p in progress)
+    assert progress[-1]["rows"] == expected_rows
+    assert progress[-1]["bytes_read"] == progress[-1]["bytes_total"]
+    assert iptk.get_country_by_ipv4("78.60.1.1") == "LT"
+
+
+def test_reload_is_atomic_for_concurrent_readers(db_path):
+    seen = []
+    reader = IpToolKit(db_path=db_path, cache_size=0)
+
+    def read_in_other_thread(progress: dict) -> None:
+        thread = threading.Thread(
+            target=lambda: seen.append(
+                (
+                    reader.get_country_by_ipv4("1.0.0.1"),
+                    reader.get_stats()["rows_total"],
+                )
+            )
+        )
+        thread.start()
+        thread.join()
+
+    iptk = IpToolKit(db_path=db_path, progress_callback=read_in_other_thread)
+    iptk.INSERT_CHUNK_SIZE = 2
+    iptk._ingest(
+        provider="db-ip.com", chunks=_gz_chunks(ASSETS / "dbip-country-lite.csv")
+    )
+
+    # Mid-load readers see complete previous dataset, never an empty or partial one.
+    assert seen and all(s == ("AU", len(ROWS)) for s in seen)
+
+    stats = iptk.get_stats()
+    assert stats["rows_per_provider"] == {"db-ip.com": 9, "ipinfo.io": 3}
+    with get_conn_cur(db_path) as (conn, cur):
+        cur.execute(
+            "SELECT type, name FROM sqlite_master WHERE tbl_name LIKE 'ip_to_country%' AND name NOT LIKE '%meta%' ORDER BY name"
+        )
+        assert [(r["type"], r["name"]) for r in cur.fetchall()] == [
+            ("table", "ip_to_country"),
+            ("index", "ip_to_country_idx"),
+        ]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_import_file_skips_unchanged(db_path, tmp_path, compress):
+    path = tmp_path / "dbip-country-lite-2024-12.csv"
+    path.write_bytes((ASSETS / "dbip-country-lite.csv").read_bytes())
+    if compress:
+        path = path.with_suffix(".csv.gz")
+        path.write_bytes(gzip.compress((ASSETS / "dbip-country-lite.csv").read_bytes()))
+
+    iptk = IpToolKit(db_path=db_path, in_memory=True)
+    assert iptk.get_country_by_ipv4("31.0.0.1") is None
+
+    assert iptk.import_file(path) == 9
+    assert iptk.get_country_by_ipv4("31.0.0.1") == "LT"
+    meta = iptk.get_stats()["providers"]["db-ip.com"]
+    assert meta["version"] == path.name
+    assert meta["rows"] == 9
+    assert len(meta["checksum"]) == 64
+
+    assert iptk.import_file(path) is None
+    assert iptk.import_file(path, force=True) == 9
+
+    with pytest.raises(ValueError, match="Unknown provider"):
+        iptk.import_file(path, provider="maxmind.com")
+
+
+def test_offline_setup_does_not_download(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Unexpected download!")
+
+    monkeypatch.setattr("gyvatukas.services.iptoolkit.httpx.stream", fail)
+    try:
+        iptk = IpToolKit(db_path=tmp_path / "offline.db", auto_setup=False)
+        assert iptk.get_country_by_ipv4("8.8.8.8") is None
+        assert iptk.get_countries_by_ipv4(["8.8.8.8"]) == [None]
+
+        iptk.import_file(ASSETS / "ipinfo-country.csv", provider="ipinfo.io")
+        assert iptk.get_countries_by_ipv4(["8.8.8.8"]) == ["US"]
+    finally:
+        close_connections()
+
+
+def test_setup_skips_imported_version(db_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Unexpected download!")
+
+    monkeypatch.setattr("gyvatukas.services.iptoolkit.httpx.stream", fail)
+    iptk = IpToolKit(db_path=db_path)
+    version = get_utc_today().strftime("%Y-%m")
+    iptk._ingest(
+        provider="db-ip.com",
+        chunks=_gz_chunks(ASSETS / "dbip-country-lite.csv"),
+        version=version,
+    )
+
+    iptk.setup_db()
+    assert iptk.get_stats()["providers"]["db-ip.com"]["version"] == version
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+@pytest.mark.parametrize(
+    "ip, expected_result",
+    [
+        ("2001:4860:4860::8888", "US"),
+        ("2001:200::1", "JP"),
+        ("2001:199::1", None),
+        ("::1", None),
+        ("8.8.8.8", "US"),
+    ],
+)
+def test_ipv6_lookup(tmp_path, in_memory, ip, expected_result):
+    try:
+        iptk = IpToolKit(db_path=tmp_path / "ip6.db", auto_setup=False)
+        iptk.import_file(ASSETS / "dbip-country-lite.csv")
+        iptk.import_file(ASSETS / "ipinfo-country.csv", provider="ipinfo.io")
+        if in_memory:
+            iptk.load_index()
+
+        assert iptk.get_country_by_ip(ip) == expected_result
+        if ":" in ip:
+            assert iptk.get_country_by_ipv6(ip) == expected_result
+    finally:
+        close_connections()
+
+
+def test_mmap_index_file(tmp_path):
+    ips = ["8.8.8.8", "1.0.2.1", "0.0.0.1", "78.60.1.1", "2001:200::1", "::1"]
+    try:
+        iptk = IpToolKit(db_path=tmp_path / "iptoolkit.db", auto_setup=False)
+        iptk.import_file(ASSETS / "dbip-country-lite.csv")
+        iptk.import_file(ASSETS / "ipinfo-country.csv", provider="ipinfo.io")
+        path = iptk.compile_index_file()
+        assert path == tmp_path / "iptoolkit.idx"
+
+        worker = IpToolKit(db_path=tmp_path / "missing.db", index_path=path)
+        assert not (tmp_path / "missing.db").exists()
+        assert [worker.get_country_by_ip(ip) for ip in ips] == [
+            iptk.get_country_by_ip(ip) for ip in ips
+        ]
+        assert [worker.get_country_by_ip(ip) for ip in ips] == [
+            "US",
+            "CN",
+            "ZZ",
+            "LT",
+            "JP",
+            None,
+        ]
+        assert worker.get_countries_by_ipv4(ips[:4]) == ["US", "CN", "ZZ", "LT"]
+
+        stats = worker.get_stats()
+        assert not (tmp_path / "missing.db").exists()
+        assert stats["rows_total"] is None
+        assert stats["providers"] is None
+        assert stats["index"] is not None
+        assert stats["index6"] is not None
+        assert stats["cache"] is not None
+
+        # Recompiled file replaces old one, workers pick it up on reopen.
+        iptk.import_file(ASSETS / "ipinfo-country.csv", provider="db-ip.com")
+        iptk.compile_index_file(path)
+        worker.open_index_file(path)
+        assert worker.get_country_by_ip("31.0.0.1") is None
+    finally:
+        close_connections()
+
+
+def test_mmap_index_file_invalid(tmp_path):
+    path = tmp_path / "invalid.idx"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(GyvatukasException, match="not an IpToolKit index file"):
+        IpToolKit(index_path=path)
+
+
+def test_mmap_index_file_truncated(tmp_path):
+    try:
+        iptk = IpToolKit(db_path=tmp_path / "iptoolkit.db", auto_setup=False)
+        iptk.import_file(ASSETS / "dbip-country-lite.csv")
+        path = iptk.compile_index_file()
+    finally:
+        close_connections()
+
+    data = path.read_bytes()
+    for size in (len(data) - 8, 16, 0):
+        path.write_bytes(data[:size])
+        with pytest.raises(GyvatukasException, match="truncated"):
+            IpToolKit(index_path=path)
+
+
+@pytest.mark.parametrize(
+    "provider, fixture, expected_rows",
+    [
+        ("db-ip.com", "dbip-country-lite-malformed.csv", 3),
+        ("ipinfo.io", "ipinfo-country-malformed.csv", 2),
+    ],
+)
+def test_import_skips_malformed_rows(
+    tmp_path, caplog, provider, fixture, expected_rows
+):
+    try:
+        iptk = IpToolKit(db_path=tmp_path / "malformed.db", auto_setup=False)
+        assert iptk.import_file(ASSETS / fixture, provider=provider) == expected_rows
+        assert iptk.get_country_by_ipv4("78.60.1.1") == "LT"
+        assert "skipped" in caplog.text
+    finally:
+        close_connections()
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import diskcache
+import pytest
+
+from gyvatukas.utils.cache import LruCache, TieredCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LruCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.get_stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 1,
+        "hit_rate": 0.5,
+    }
+
+
+def test_lru_cache_none_value():
+    missing = object()
+    cache = LruCache()
+    cache.set("a", None)
+    assert cache.get("a", missing) is None
+    assert cache.get("b", missing) is missing
+    assert cache.delete("a") is True
+    assert cache.delete("a") is False
+
+
+def test_lru_cache_invalid_size():
+    with pytest.raises(ValueError):
+        LruCache(maxsize=0)
+
+
+def test_lru_cache_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LruCache(ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    now[0] += 11
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_tiered_cache_promotes_from_disk(tmp_path):
+    disk = diskcache.Cache(directory=tmp_path)
+    TieredCache("test", ttl=60, disk=disk).set("a", 1)
+
+    cache = TieredCache("test", ttl=60, disk=disk)
+    assert cache.get("a") == 1
+    assert cache.get("a") == 1
+    assert cache.get_stats()["disk_hits"] == 1
+    assert cache.get("missing") is None
+
+
+def test_tiered_cache_coalesces_concurrent_calls():
+    cache = TieredCache("test", ttl=60)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_set("k", compute)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+
+
+def test_tiered_cache_does_not_cache_none():
+    cache = TieredCache("test", ttl=60)
+    calls = []
+    assert cache.get_or_set("k", lambda: calls.append(1)) is None
+    assert cache.get_or_set("k", lambda: calls.append(1)) is None
+    assert len(calls) == 2
@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+
+from gyvatukas.utils.http import (
+    aclose_http_client,
+    close_http_client,
+    get_async_http_client,
+    get_http_client,
+    set_http_client,
+)
+from gyvatukas.www.github_com import GithubComBase
+
+
+def test_get_http_client_is_shared_and_recreated():
+    client = get_http_client()
+    assert get_http_client() is client
+
+    close_http_client()
+    assert client.is_closed
+    assert get_http_client() is not client
+    close_http_client()
+
+
+def test_get_async_http_client_per_loop():
+    async def get_twice():
+        client = get_async_http_client()
+        assert get_async_http_client() is client
+        await aclose_http_client()
+        return client
+
+    first = asyncio.run(get_twice())
+    second = asyncio.run(get_twice())
+    assert first is not second
+    assert first.is_closed and second.is_closed
+
+
+def test_www_client_uses_shared_or_injected_client():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, text="<h1>hi</h1>")
+
+    set_http_client(httpx.Client(transport=httpx.MockTransport(handler)))
+    try:
+        assert GithubComBase().convert_md_to_html("# hi") == "<h1>hi</h1>"
+    finally:
+        close_http_client()
+
+    injected = httpx.Client(transport=httpx.MockTransport(handler))
+    client = GithubComBase(client=injected)
+    assert client._get_client() is injected
+    assert len(requests) == 1
@@ -1,5 +1,25 @@
+import time
+
+import diskcache
+import httpx
 import pytest
-from gyvatukas.utils.ip import get_ip_country
+
+import gyvatukas.utils.ip as ip_module
+from gyvatukas.utils.cache import TieredCache
+from gyvatukas.utils.http import close_http_client, set_http_client
+from gyvatukas.utils.ip import (
+    get_ip_countries,
+    get_ip_country,
+    get_ip_country_code,
+    get_ip_country_codes,
+    get_ipv4_meta_many,
+    get_my_ipv4,
+    ip_to_int,
+    ipv6_to_int,
+    parse_ip,
+    IpSet,
+    IpMap,
+)
 
 
 @pytest.mark.integration
@@ -13,3 +33,212 @@ from gyvatukas.utils.ip import get_ip_country
 def test_get_ip_country(ip, expected_result) -> None:
     result = get_ip_country(ip)
     assert result == expected_result
+
+
+@pytest.mark.parametrize(
+    "ip, expected_result",
+    [
+        ("0.0.0.0", 0),
+        ("8.8.8.8", 134744072),
+        ("255.255.255.255", 2**32 - 1),
+    ],
+)
+def test_ip_to_int(ip, expected_result) -> None:
+    assert ip_to_int(ip) == expected_result
+
+
+@pytest.mark.parametrize(
+    "ip", ["", "1.2.3", "01.2.3.4", "256.0.0.1", "::1", " 1.2.3.4"]
+)
+def test_ip_to_int_invalid(ip) -> None:
+    with pytest.raises(ValueError):
+        ip_to_int(ip)
+
+
+def test_parse_ip() -> None:
+    assert parse_ip("8.8.8.8") == (4, 134744072)
+    assert parse_ip("::1") == (6, 1)
+    assert ipv6_to_int("2001:db8::") == 0x20010DB8 << 96
+    with pytest.raises(ValueError):
+        parse_ip("1::2::3")
+
+
+def test_ip_set() -> None:
+    ip_set = IpSet(
+        ["10.0.0.0/8", "10.1.0.0/16", "11.0.0.0/8", "192.168.1.1", "2001:db8::/32"]
+    )
+
+    # Nested and adjacent networks are merged.
+    assert len(ip_set) == 3
+    assert "10.1.2.3" in ip_set
+    assert "11.255.255.255" in ip_set
+    assert "192.168.1.1" in ip_set
+    assert "2001:db8::1" in ip_set
+    assert "12.0.0.0" not in ip_set
+    assert "192.168.1.2" not in ip_set
+    assert "2001:db9::1" not in ip_set
+    assert "not an ip" not in ip_set
+    assert "8.8.8.8" not in IpSet()
+
+
+def test_ip_map_longest_prefix_match() -> None:
+    ip_map = IpMap(
+        {
+            "0.0.0.0/0": "internet",
+            "10.0.0.0/8": "internal",
+            "10.1.0.0/16": "office",
+            "10.1.2.0/24": "printers",
+            "10.2.0.0/16": "lab",
+            "2001:db8::/32": "v6",
+        }
+    )
+
+    assert len(ip_map) == 6
+    assert ip_map.get("8.8.8.8") == "internet"
+    assert ip_map.get("10.0.0.1") == "internal"
+    assert ip_map.get("10.1.0.1") == "office"
+    assert ip_map.get("10.1.2.3") == "printers"
+    assert ip_map.get("10.1.3.0") == "office"
+    assert ip_map.get("10.2.255.255") == "lab"
+    assert ip_map.get("10.3.0.0") == "internal"
+    assert ip_map.get("11.0.0.0") == "internet"
+    assert ip_map.get_network("10.1.2.3") == "10.1.2.0/24"
+    assert ip_map["2001:db8::1"] == "v6"
+    assert ip_map.get("2001:db9::1", "default") == "default"
+    assert "::1" not in ip_map
+    with pytest.raises(KeyError):
+        ip_map["::1"]
+
+
+def test_ip_map_duplicate_network_last_wins() -> None:
+    ip_map = IpMap([("10.0.0.0/8", "a"), ("10.0.0.1/8", "b")])
+    assert ip_map.get("10.0.0.5") == "b"
+
+
+def _fake_client(responses: dict) -> httpx.Client:
+    """Client with mocked transport, `responses` maps host to (delay, status, text)."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        delay, status, text = responses[request.url.host]
+        time.sleep(delay)
+        return httpx.Response(status, text=text)
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_get_my_ipv4_concurrent_returns_first_valid() -> None:
+    client = _fake_client(
+        {
+            "wasab.is": (0.0, 200, "not json"),
+            "ifconfig.me": (0.0, 200, "1.2.3.4\n"),
+            "checkip.amazonaws.com": (1.0, 200, "5.6.7.8\n"),
+        }
+    )
+    started = time.perf_counter()
+    assert get_my_ipv4(concurrent=True, client=client) == "1.2.3.4"
+    assert time.perf_counter() - started < 1.0
+
+
+def test_get_my_ipv4_rejects_invalid_answers() -> None:
+    client = _fake_client(
+        {
+            "wasab.is": (0.0, 200, '{"ip": "9.9.9.9"}'),
+            "ifconfig.me": (0.0, 200, "<html>"),
+            "checkip.amazonaws.com": (0.0, 500, ""),
+        }
+    )
+    assert get_my_ipv4(client=client) == "9.9.9.9"
+    assert get_my_ipv4(concurrent=True, client=client) == "9.9.9.9"
+
+
+def test_get_my_ipv4_cache(monkeypatch, tmp_path) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, text="1.2.3.4")
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ip_module, "_IP_SERVICES", ip_module._IP_SERVICES[1:])
+    opened = []
+    monkeypatch.setattr(
+        ip_module,
+        "get_app_cache",
+        lambda: opened.append(diskcache.Cache(directory=tmp_path)) or opened[-1],
+    )
+    monkeypatch.setattr(ip_module, "_app_cache", None)
+
+    assert get_my_ipv4(client=client) == "1.2.3.4"
+    assert opened == []
+    assert get_my_ipv4(cache_ttl=60, client=client) == "1.2.3.4"
+    assert get_my_ipv4(cache_ttl=60, client=client) == "1.2.3.4"
+    assert len(calls) == 2
+    assert len(opened) == 1
+
+
+@pytest.fixture
+def fake_wasabis(monkeypatch):
+    """Fake https://wasab.is as shared http client with fresh meta cache, returns list of looked up ips."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ip = request.url.params["ip"]
+        calls.append(ip)
+        if ip == "10.0.0.1":
+            return httpx.Response(500)
+        return httpx.Response(
+            200, json={"ip": ip, "country": "Lithuania", "country_code": "LT"}
+        )
+
+    set_http_client(httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(
+        ip_module, "_ipv4_meta_cache", TieredCache("test", ttl=60, maxsize=16)
+    )
+    yield calls
+    close_http_client()
+
+
+def test_get_ipv4_meta_many(fake_wasabis) -> None:
+    result = get_ipv4_meta_many(["1.1.1.1", "2.2.2.2", "1.1.1.1", "10.0.0.1"])
+    assert result == {
+        "1.1.1.1": {"ip": "1.1.1.1", "country": "Lithuania", "country_code": "LT"},
+        "2.2.2.2": {"ip": "2.2.2.2", "country": "Lithuania", "country_code": "LT"},
+        "10.0.0.1": None,
+    }
+    assert len(fake_wasabis) == 3
+
+    # Successful lookups are cached, failed are retried.
+    get_ipv4_meta_many(["1.1.1.1", "2.2.2.2", "10.0.0.1"])
+    assert len(fake_wasabis) == 4
+
+    with pytest.raises(ValueError):
+        get_ipv4_meta_many(["1.1.1.1"], max_workers=0)
+
+
+def test_get_ip_country_names_and_codes(fake_wasabis) -> None:
+    class FakeIpToolKit:
+        def get_country_by_ip(self, ip):
+            return {"1.1.1.1": "AU"}.get(ip)
+
+    assert get_ip_country("1.1.1.1") == "Lithuania"
+    assert get_ip_country("not an ip") is None
+    assert get_ip_countries(["2.2.2.2", "bad"]) == {"2.2.2.2": "Lithuania", "bad": None}
+    assert fake_wasabis == ["1.1.1.1", "2.2.2.2"]
+
+    iptk = FakeIpToolKit()
+    assert get_ip_country_code("1.1.1.1", iptk) == "AU"
+    assert get_ip_country_code("not an ip", iptk) is None
+    assert get_ip_country_codes(["1.1.1.1", "3.3.3.3", "bad"], iptk) == {
+        "1.1.1.1": "AU",
+        "3.3.3.3": None,
+        "bad": None,
+    }
+    assert len(fake_wasabis) == 2
+
+    # Local hits answer offline, only misses go to network.
+    assert get_ip_country_code("3.3.3.3", iptk, network_fallback=True) == "LT"
+    assert get_ip_country_codes(
+        ["1.1.1.1", "4.4.4.4", "10.0.0.1", "bad"], iptk, network_fallback=True
+    ) == {"1.1.1.1": "AU", "4.4.4.4": "LT", "10.0.0.1": None, "bad": None}
+    assert fake_wasabis[:3] == ["1.1.1.1", "2.2.2.2", "3.3.3.3"]
+    assert sorted(fake_wasabis[3:]) == ["10.0.0.1", "4.4.4.4"]
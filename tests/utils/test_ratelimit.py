@@ -0,0 +1,96 @@
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from gyvatukas.utils.ratelimit import RateLimiter, rate_limited
+
+
+def _try_acquire_in_child(path, queue) -> None:
+    queue.put(RateLimiter(1, 60, name="test", path=path).try_acquire())
+
+
+@pytest.fixture
+def bucket_path(tmp_path):
+    return tmp_path / "test.bucket"
+
+
+def test_rate_limiter_burst_then_reserves(bucket_path):
+    limiter = RateLimiter(10, 1, name="test", burst=2, path=bucket_path)
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    assert not limiter.try_acquire()
+
+    # Waiters reserve tokens in order and sleep once.
+    assert limiter._update(1, reserve=True) == pytest.approx(0.1, abs=0.02)
+    assert limiter._update(1, reserve=True) == pytest.approx(0.2, abs=0.02)
+
+    stats = limiter.get_stats()
+    assert stats["acquired"] == 4
+    assert stats["rejected"] == 1
+    assert stats["waits"] == 2
+    assert stats["wait_seconds_max"] == pytest.approx(0.2, abs=0.02)
+
+
+def test_rate_limiter_refills(bucket_path):
+    limiter = RateLimiter(20, 1, name="test", burst=1, path=bucket_path)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    time.sleep(0.06)
+    assert limiter.try_acquire()
+
+
+def test_rate_limiter_shared_between_processes(bucket_path):
+    assert RateLimiter(1, 60, name="test", path=bucket_path).try_acquire()
+
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_try_acquire_in_child, args=(bucket_path, queue)
+    )
+    process.start()
+    process.join(timeout=10)
+    assert queue.get(timeout=1) is False
+
+
+def test_rate_limiter_not_shared():
+    first = RateLimiter(1, 60, name="test", shared=False)
+    second = RateLimiter(1, 60, name="test", shared=False)
+    assert first.try_acquire()
+    assert second.try_acquire()
+    assert not first.try_acquire()
+
+
+def test_rate_limited_async_does_not_block_loop():
+    limiter = RateLimiter(1, 0.1, name="test", shared=False)
+    ticks = []
+
+    @rate_limited(limiter)
+    async def call():
+        return "ok"
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        return await asyncio.gather(call(), call(), ticker())
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    assert results[:2] == ["ok", "ok"]
+    assert len(ticks) == 5
+    assert time.perf_counter() - started >= 0.09
+    assert limiter.get_stats()["waits"] == 1
+
+
+def test_rate_limiter_invalid_args():
+    with pytest.raises(ValueError):
+        RateLimiter(0, 1, name="test")
+    with pytest.raises(ValueError):
+        RateLimiter(1, 0, name="test")
+    with pytest.raises(ValueError):
+        RateLimiter(1, 1, name="test", burst=0)
+    with pytest.raises(ValueError):
+        RateLimiter(1, 1, name="test", shared=False).acquire(tokens=2)
@@ -1,5 +1,16 @@
+import asyncio
+import json
+
+import httpx
 import pytest
-from gyvatukas.www.github_com import GithubComNoAuth
+
+from gyvatukas.exceptions import GyvatukasException
+from gyvatukas.utils.ratelimit import RateLimiter
+from gyvatukas.www.github_com import (
+    AsyncGithubComNoAuth,
+    GithubComAuth,
+    GithubComNoAuth,
+)
 
 
 class TestGithubComNoAuth:
@@ -40,3 +51,61 @@ class TestGithubComNoAuth:
         client = GithubComNoAuth()
         headers = client._get_auth_headers()
         assert headers == {}
+
+
+def _fake_github(requests: list) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        text = json.loads(request.content)["text"]
+        requests.append(text)
+        if text == "broken":
+            return httpx.Response(422, text="nope")
+        return httpx.Response(200, text=f"<p>{text}</p>")
+
+    return httpx.MockTransport(handler)
+
+
+def test_convert_md_to_html_many(app_cache, monkeypatch):
+    monkeypatch.setattr(
+        GithubComAuth, "RATE_LIMITER", RateLimiter(100, 1, name="test", shared=False)
+    )
+    requests = []
+    client = GithubComAuth(
+        "token", client=httpx.Client(transport=_fake_github(requests)), cache=True
+    )
+    client.convert_md_to_html("a")
+
+    results = client.convert_md_to_html_many(["a", "b", "c", "b", "broken"])
+    assert [r.html for r in results] == [
+        "<p>a</p>",
+        "<p>b</p>",
+        "<p>c</p>",
+        "<p>b</p>",
+        None,
+    ]
+    assert [r.from_cache for r in results] == [True, False, False, False, False]
+    assert isinstance(results[-1].error, GyvatukasException)
+    assert sorted(requests) == ["a", "b", "broken", "c"]
+
+    results = client.convert_md_to_html_many(["c", "d"], fancy_gfm_mode=False)
+    assert [r.from_cache for r in results] == [True, False]
+    assert len(requests) == 5
+
+
+def test_convert_md_to_html_many_rate_budget(app_cache, monkeypatch):
+    monkeypatch.setattr(
+        GithubComNoAuth, "RATE_LIMITER", RateLimiter(2, 3600, name="test", shared=False)
+    )
+    requests = []
+
+    async def main():
+        client = AsyncGithubComNoAuth(
+            client=httpx.AsyncClient(transport=_fake_github(requests)), cache=True
+        )
+        return await client.convert_md_to_html_many(
+            ["a", "b", "c"], wait_for_rate_limit=False
+        )
+
+    results = asyncio.run(main())
+    assert sum(r.html is not None for r in results) == 2
+    assert sum(isinstance(r.error, GyvatukasException) for r in results) == 1
+    assert len(requests) == 2
@@ -0,0 +1,317 @@
+import asyncio
+import datetime
+import json
+import threading
+import time
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+import gyvatukas.www.mano_eso_lt as mano_eso_lt
+from gyvatukas.utils.simplestore import DirStore
+from gyvatukas.www.mano_eso_lt import (
+    AsyncManoEsoLt,
+    ConsumptionRecord,
+    ConsumptionSeries,
+    ManoEsoLt,
+    dump_consumption_series,
+    load_consumption_series,
+)
+
+FORM_HTML = """
+<form>
+  <input name="form_build_id" value="build-1">
+  <input name="form_token" value="token-1">
+  <input name="form_id" value="eso_consumption_history_form">
+</form>
+"""
+
+
+def _week_response(
+    active_date: datetime.date, published_until: datetime.datetime | None = None
+) -> dict:
+    records = []
+    for offset in range(1, ManoEsoLt.WEEK_DAYS + 1):
+        day = active_date - datetime.timedelta(days=offset)
+        for hour in range(24):
+            dt = datetime.datetime.combine(day, datetime.time(hour))
+            published = published_until is None or dt < published_until
+            records.append(
+                {"date": f"{dt:%Y%m%d%H%M%S}", "value": "-0.5" if published else None}
+            )
+    return [
+        {"command": "noise"},
+        {
+            "settings": {
+                "eso_consumption_history_form": {
+                    "graphics_data": {
+                        "datasets": [
+                            {"key": "P+", "label": "Suvartota", "record": records}
+                        ]
+                    }
+                }
+            }
+        },
+    ]
+
+
+@pytest.fixture
+def eso_published() -> dict:
+    """Hours from `until` on are served as null by `fake_eso`, like ones mano.eso.lt did not publish yet."""
+    return {"until": None}
+
+
+@pytest.fixture
+def fake_eso(tmp_path, monkeypatch, eso_published):
+    """Returns list of requests made to fake mano.eso.lt, session is saved to tmp_path."""
+    monkeypatch.setattr(
+        ManoEsoLt, "_get_session_path", staticmethod(lambda: tmp_path / "session.json")
+    )
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        cookies = request.headers.get("cookie", "")
+        logged_in = "SESS=ok" in cookies and "expired" not in cookies
+        if request.method == "POST" and request.url.params.get("destination"):
+            return httpx.Response(
+                200, text=FORM_HTML, headers={"set-cookie": "SESS=ok; Path=/"}
+            )
+        if not logged_in:
+            return httpx.Response(302, headers={"location": "/"})
+        if request.method == "GET":
+            return httpx.Response(200, text=FORM_HTML)
+        form = parse_qs(request.content.decode())
+        active_date = datetime.date.fromisoformat(form["active_date_value"][0][:10])
+        return httpx.Response(
+            200, json=_week_response(active_date, eso_published["until"])
+        )
+
+    return requests, httpx.MockTransport(handler)
+
+
+def _make_eso(cls, transport, store=None):
+    client_cls = httpx.AsyncClient if cls is AsyncManoEsoLt else httpx.Client
+    return cls(
+        username="me",
+        password="secret",
+        client=client_cls(transport=transport),
+        store=store,
+    )
+
+
+def test_session_is_reused(fake_eso):
+    requests, transport = fake_eso
+    eso = _make_eso(ManoEsoLt, transport)
+    assert not eso.is_persisted_session
+    eso.ensure_login()
+    assert [r.method for r in requests] == ["POST"]
+
+    eso = _make_eso(ManoEsoLt, transport)
+    assert eso.is_persisted_session
+    eso.ensure_login()
+    assert [r.method for r in requests] == ["POST", "GET"]
+
+    # Session of other user is ignored.
+    other = ManoEsoLt(username="other", password="x", client=httpx.Client())
+    assert other.cookies is None
+
+
+def test_expired_session_logs_in_again(fake_eso):
+    requests, transport = fake_eso
+    eso = _make_eso(ManoEsoLt, transport)
+    eso.ensure_login()
+    eso.cookies = {"SESS": "expired"}
+    datasets = eso.get_week_stats("1", datetime.date(2025, 1, 8))
+    assert [r.method for r in requests] == ["POST", "POST", "POST", "POST"]
+    assert len(datasets) == 7
+    assert datasets[0].dt == datetime.date(2025, 1, 1)
+    assert datasets[0].total_kwh == 12.0
+
+
+def test_sync_range_fetches_missing_days(fake_eso, tmp_path):
+    requests, transport = fake_eso
+    store = DirStore(tmp_path / "store")
+    eso = _make_eso(ManoEsoLt, transport, store=store)
+    eso.ensure_login()
+
+    start, end = datetime.date(2025, 1, 1), datetime.date(2025, 1, 10)
+    days = eso.sync_range("1", start, end, max_concurrency=2)
+    assert list(days) == [start + datetime.timedelta(days=i) for i in range(10)]
+    assert len(requests) == 1 + 2
+    assert len(store.keys()) == 10
+
+    # Stored days are not fetched again, only days outside of them.
+    days = eso.sync_range("1", start, end + datetime.timedelta(days=3))
+    assert len(days) == 13
+    assert len(requests) == 1 + 2 + 1
+    assert days[start][0].records[0].kwh == 0.5
+
+    with pytest.raises(ValueError):
+        eso.sync_range("1", start, end, max_concurrency=100)
+
+
+def test_sync_range_refetches_unpublished_hours(fake_eso, eso_published, tmp_path):
+    requests, transport = fake_eso
+    store = DirStore(tmp_path / "store")
+    eso = _make_eso(ManoEsoLt, transport, store=store)
+    eso.ensure_login()
+
+    start, end = datetime.date(2025, 1, 1), datetime.date(2025, 1, 7)
+    eso_published["until"] = datetime.datetime(2025, 1, 7, 20)
+    days = eso.sync_range("1", start, end)
+    assert len(days[end][0].records) == 20
+    assert days[end][0].total_kwh == 10.0
+    assert len(store.keys()) == 6
+
+    eso_published["until"] = None
+    days = eso.sync_range("1", start, end)
+    assert len(requests) == 1 + 2
+    assert days[end][0].total_kwh == 12.0
+    assert len(store.keys()) == 7
+
+
+def test_day_complete_with_dst():
+    eso = ManoEsoLt(username="me", password="secret", client=httpx.Client())
+    day = datetime.date(2025, 3, 30)
+    records = [
+        ConsumptionRecord(datetime.datetime.combine(day, datetime.time(h)), 0.5)
+        for h in range(23)
+    ]
+    dataset = mano_eso_lt.ConsumptionDataset("P+", "Suvartota", day, 11.5, records)
+    assert eso._is_day_complete(day, [dataset])
+    assert not eso._is_day_complete(day + datetime.timedelta(days=1), [dataset])
+
+
+def _expiring_eso(tmp_path, monkeypatch) -> tuple[dict, httpx.MockTransport]:
+    """Fake mano.eso.lt whose session expires on first data request."""
+    monkeypatch.setattr(
+        ManoEsoLt, "_get_session_path", staticmethod(lambda: tmp_path / "session.json")
+    )
+    state = {"logins": 0, "valid": None, "expired": False}
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST" and request.url.params.get("destination"):
+            with lock:
+                state["logins"] += 1
+                state["valid"] = f"SESS=s{state['logins']}"
+            return httpx.Response(
+                200,
+                text=FORM_HTML,
+                headers={"set-cookie": f"{state['valid']}; Path=/"},
+            )
+        with lock:
+            if not state["expired"]:
+                state["expired"] = True
+                state["valid"] = None
+        time.sleep(0.05)  # Keep concurrent requests in flight together.
+        if state["valid"] is None or state["valid"] not in request.headers.get(
+            "cookie", ""
+        ):
+            return httpx.Response(302, headers={"location": "/"})
+        form = parse_qs(request.content.decode())
+        active_date = datetime.date.fromisoformat(form["active_date_value"][0][:10])
+        return httpx.Response(200, json=_week_response(active_date))
+
+    return state, httpx.MockTransport(handler)
+
+
+@pytest.mark.parametrize("cls", [ManoEsoLt, AsyncManoEsoLt])
+def test_session_expires_mid_sync(tmp_path, monkeypatch, cls):
+    state, transport = _expiring_eso(tmp_path, monkeypatch)
+    eso = _make_eso(cls, transport, store=DirStore(tmp_path / "store"))
+    start, end = datetime.date(2025, 1, 1), datetime.date(2025, 1, 28)
+
+    if cls is AsyncManoEsoLt:
+
+        async def main():
+            await eso.login()
+            return await eso.sync_range("1", start, end, max_concurrency=4)
+
+        days = asyncio.run(main())
+    else:
+        eso.login()
+        days = eso.sync_range("1", start, end, max_concurrency=4)
+
+    assert len(days) == 28
+    # Initial login and single re-login shared by all workers.
+    assert state["logins"] == 2
+
+
+def test_async_sync_range(fake_eso, tmp_path):
+    requests, transport = fake_eso
+
+    async def main():
+        eso = _make_eso(AsyncManoEsoLt, transport, store=DirStore(tmp_path / "store"))
+        await eso.ensure_login()
+        return await eso.sync_range(
+            "1",
+            datetime.date(2025, 1, 1),
+            datetime.date(2025, 1, 21),
+            max_concurrency=3,
+        )
+
+    days = asyncio.run(main())
+    assert len(days) == 21
+    assert sum(r.method == "POST" for r in requests) == 1 + 3
+    assert json.loads((tmp_path / "session.json").read_text())["username"] == "me"
+
+
+def _make_series(days: int) -> ConsumptionSeries:
+    start = datetime.datetime(2025, 1, 27)
+    records = [
+        ConsumptionRecord(dt=start + datetime.timedelta(hours=h), kwh=1.0)
+        for h in range(days * 24)
+    ]
+    # Order of records does not matter.
+    return ConsumptionSeries.from_records("P+", "Suvartota", reversed(records))
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_series_aggregate(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(mano_eso_lt, "np", None)
+    elif mano_eso_lt.np is None:
+        pytest.skip("numpy is not installed")
+    series = _make_series(days=10)  # 2025-01-27 (monday) to 2025-02-05.
+
+    daily = series.aggregate("day")
+    assert len(daily) == 10
+    assert daily[datetime.date(2025, 1, 27)] == 24.0
+    assert series.aggregate("week") == {
+        datetime.date(2025, 1, 27): 7 * 24.0,
+        datetime.date(2025, 2, 3): 3 * 24.0,
+    }
+    assert series.aggregate("month") == {
+        datetime.date(2025, 1, 1): 5 * 24.0,
+        datetime.date(2025, 2, 1): 5 * 24.0,
+    }
+    with pytest.raises(ValueError):
+        series.aggregate("year")
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_series_datasets_and_blob(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(mano_eso_lt, "np", None)
+    elif mano_eso_lt.np is None:
+        pytest.skip("numpy is not installed")
+    series = _make_series(days=3)
+    datasets = series.to_datasets()
+    assert [d.dt for d in datasets] == [
+        datetime.date(2025, 1, 27),
+        datetime.date(2025, 1, 28),
+        datetime.date(2025, 1, 29),
+    ]
+    assert datasets[1].records[0].dt == datetime.datetime(2025, 1, 28)
+    assert datasets[1].total_kwh == 24.0
+    assert ConsumptionSeries.from_datasets(datasets)["P+"] == series
+    assert ConsumptionSeries.from_datasets(reversed(datasets))["P+"] == series
+
+    blob = dump_consumption_series([series, ConsumptionSeries("P-", "Pagaminta")])
+    assert len(blob) < len(series) * 16
+    loaded = load_consumption_series(blob)
+    assert loaded[0] == series
+    assert len(loaded[1]) == 0
@@ -1,5 +1,28 @@
+import asyncio
+
+import httpx
 import pytest
-from gyvatukas.www.nominatim_org import NominatimOrg
+
+import gyvatukas.utils.cache as cache_module
+from gyvatukas.utils.ratelimit import RateLimiter
+from gyvatukas.www.nominatim_org import AsyncNominatimOrg, NominatimOrg
+
+
+@pytest.fixture
+def fake_nominatim(monkeypatch):
+    """Returns list of requests made to fake nominatim, rate limit is disabled."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/search":
+            return httpx.Response(200, json=[{"lat": "54.68", "lon": "25.28"}])
+        return httpx.Response(200, json={"display_name": "Vilnius"})
+
+    monkeypatch.setattr(
+        NominatimOrg, "RATE_LIMITER", RateLimiter(1000, 1, name="test", shared=False)
+    )
+    return requests, httpx.MockTransport(handler)
 
 
 class TestNominatimOrg:
@@ -50,3 +73,126 @@ class TestNominatimOrg:
         lon_float = float(lon)
         assert -90 <= lat_float <= 90
         assert -180 <= lon_float <= 180
+
+
+def test_response_cache(app_cache, fake_nominatim):
+    requests, transport = fake_nominatim
+    client = NominatimOrg("test", client=httpx.Client(transport=transport), cache=True)
+
+    assert client.resolve_address_to_coords("Vilnius, Lithuania") == ("54.68", "25.28")
+    # Normalized address hits cache.
+    assert client.resolve_address_to_coords("  vilnius,   LITHUANIA ") == (
+        "54.68",
+        "25.28",
+    )
+    assert client.resolve_coords_to_address(54.68, 25.28) == "Vilnius"
+    assert client.resolve_coords_to_address(54.6800000001, 25.28) == "Vilnius"
+    assert len(requests) == 2
+
+    client.resolve_address_to_coords("Vilnius, Lithuania", use_cache=False)
+    assert len(requests) == 3
+
+    # Persistent tier survives new process, simulated by dropping memory tiers.
+    cache_module._tiered_caches.clear()
+    client = NominatimOrg("test", client=httpx.Client(transport=transport), cache=True)
+    assert client.resolve_coords_to_address(54.68, 25.28) == "Vilnius"
+    assert len(requests) == 3
+
+
+def test_response_cache_disabled_by_default(app_cache, fake_nominatim):
+    requests, transport = fake_nominatim
+    client = NominatimOrg("test", client=httpx.Client(transport=transport))
+    client.resolve_coords_to_address(54.68, 25.28)
+    client.resolve_coords_to_address(54.68, 25.28)
+    assert len(requests) == 2
+
+
+def test_async_response_cache(app_cache, fake_nominatim):
+    requests, transport = fake_nominatim
+    client = AsyncNominatimOrg(
+        "test", client=httpx.AsyncClient(transport=transport), cache=True
+    )
+
+    async def main():
+        first = await client.resolve_coords_to_address(54.68, 25.28)
+        second = await client.resolve_coords_to_address(54.68, 25.28)
+        return first, second
+
+    assert asyncio.run(main()) == ("Vilnius", "Vilnius")
+    assert len(requests) == 1
+
+
+def test_resolve_addresses_to_coords_resumes_from_checkpoint(app_cache, tmp_path):
+    queries = []
+    fail_on = {"c street"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.host == "nominatim.local"
+        q = request.url.params["q"]
+        queries.append(q)
+        if q in fail_on:
+            raise httpx.ConnectError("boom")
+        if q == "nowhere":
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json=[{"lat": q, "lon": "1"}])
+
+    client = NominatimOrg(
+        "test",
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        base_url="http://nominatim.local/",
+        rate_limiter=RateLimiter(1000, 1, name="test", shared=False),
+    )
+    addresses = ["A street", "a  STREET", "nowhere", "C street", "d street"]
+    checkpoint = tmp_path / "geocode.jsonl"
+
+    with pytest.raises(httpx.ConnectError):
+        client.resolve_addresses_to_coords(addresses, checkpoint_path=checkpoint)
+    assert queries == ["a street", "nowhere", "c street"]
+
+    # Simulate crash mid-write.
+    with checkpoint.open("a") as f:
+        f.write('{"q": "d str')
+
+    fail_on.clear()
+    progress = []
+    result = client.resolve_addresses_to_coords(
+        addresses, checkpoint_path=checkpoint, progress_callback=progress.append
+    )
+    assert queries[3:] == ["c street", "d street"]
+    assert result == {
+        "A street": ("a street", "1"),
+        "a  STREET": ("a street", "1"),
+        "nowhere": None,
+        "C street": ("c street", "1"),
+        "d street": ("d street", "1"),
+    }
+    assert progress == [{"done": 3, "total": 4}, {"done": 4, "total": 4}]
+    assert len(NominatimOrg._read_checkpoint(checkpoint)) == 4
+
+
+@pytest.mark.parametrize("use_checkpoint", [False, True])
+def test_async_resolve_addresses_to_coords(app_cache, tmp_path, use_checkpoint):
+    def handler(request: httpx.Request) -> httpx.Response:
+        q = request.url.params["q"]
+        if q == "nowhere":
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json=[{"lat": q, "lon": "1"}])
+
+    checkpoint = tmp_path / "geocode.jsonl" if use_checkpoint else None
+
+    async def main():
+        client = AsyncNominatimOrg(
+            "test",
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            rate_limiter=RateLimiter(1000, 1, name="test", shared=False),
+        )
+        return await client.resolve_addresses_to_coords(
+            ["A street", "nowhere"], checkpoint_path=checkpoint
+        )
+
+    assert asyncio.run(main()) == {"A street": ("a street", "1"), "nowhere": None}
+    if use_checkpoint:
+        assert NominatimOrg._read_checkpoint(checkpoint) == {
+            "a street": ("a street", "1"),
+            "nowhere": None,
+        }
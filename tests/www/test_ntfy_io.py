@@ -1,4 +1,24 @@
-from gyvatukas.www.ntfy_io import NtfyIO, NtfyIOParams
+import asyncio
+import json
+import pathlib
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import httpx
+import pytest
+
+import gyvatukas.www.ntfy_io as ntfy_io
+from gyvatukas.exceptions import GyvatukasException
+from gyvatukas.utils.ratelimit import RateLimiter
+from gyvatukas.www.ntfy_io import (
+    AsyncNtfyIO,
+    NtfyIO,
+    NtfyIOBatchSender,
+    NtfyIOParams,
+)
 
 
 def test_ntfyio_post():
@@ -15,3 +35,196 @@ def test_ntfyio_post():
     assert isinstance(resp, dict)
     assert resp.get("id")
     assert resp.get("topic") == "pauliusbaulius-gyvatukas-test"
+
+
+def test_async_ntfyio_post():
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if body["topic"] == "broken":
+            return httpx.Response(500, text="nope")
+        return httpx.Response(200, json={"id": "1", "topic": body["topic"]})
+
+    client = AsyncNtfyIO(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    client.RATE_LIMITER = RateLimiter(10, 1, name="test", shared=False)
+
+    resp = asyncio.run(client.post(NtfyIOParams(topic="t", message="hi")))
+    assert resp == {"id": "1", "topic": "t"}
+    with pytest.raises(GyvatukasException):
+        asyncio.run(client.post(NtfyIOParams(topic="broken", message="hi")))
+
+
+def _recording_ntfy(posted: list) -> NtfyIO:
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if body["topic"] == "broken":
+            return httpx.Response(500, text="nope")
+        posted.append(body)
+        return httpx.Response(200, json={"id": "1"})
+
+    ntfy = NtfyIO(client=httpx.Client(transport=httpx.MockTransport(handler)))
+    ntfy.RATE_LIMITER = RateLimiter(100, 1, name="test", shared=False)
+    return ntfy
+
+
+def test_batch_sender_coalesces_per_topic():
+    posted = []
+    with NtfyIOBatchSender(
+        _recording_ntfy(posted), window=0.2, max_batch_messages=3
+    ) as sender:
+        for i in range(4):
+            sender.submit(
+                NtfyIOParams(topic="a", message=f"a{i}", tags=["x"], priority=i + 1)
+            )
+        sender.submit(NtfyIOParams(topic="b", message="b0", title="t"))
+        sender.submit(NtfyIOParams(topic="broken", message="lost"))
+        assert sender.flush(timeout=5)
+
+    by_topic = sorted(posted, key=lambda p: (p["topic"], len(p["message"])))
+    assert [p["message"] for p in by_topic] == ["a3", "a0\na1\na2", "b0"]
+    assert by_topic[1]["priority"] == 3
+    assert by_topic[1]["tags"] == ["x"]
+    assert by_topic[2]["title"] == "t"
+    stats = sender.get_stats()
+    assert stats["sent_messages"] == 5
+    assert stats["sent_requests"] == 3
+    assert stats["failed_messages"] == 1
+    assert stats["pending"] == 0
+
+
+def _wait_until_taken(sender: NtfyIOBatchSender) -> None:
+    deadline = time.monotonic() + 5
+    while sender.get_stats()["queued"] and time.monotonic() < deadline:
+        time.sleep(0.001)
+    time.sleep(0.05)  # Let batcher finish collecting.
+
+
+@pytest.mark.parametrize("policy", ["drop_oldest", "drop_new"])
+def test_batch_sender_drop_policies(policy):
+    posted = []
+    release = threading.Event()
+    ntfy = _recording_ntfy(posted)
+    post = ntfy.post
+    ntfy.post = lambda payload: release.wait(5) and post(payload)
+
+    sender = NtfyIOBatchSender(
+        ntfy, window=0, max_queue=2, max_concurrency=1, policy=policy
+    )
+    # First is being sent, second waits for free sender, rest fill the queue.
+    for message in ["a", "b"]:
+        sender.submit(NtfyIOParams(topic="t", message=message))
+        _wait_until_taken(sender)
+    results = [
+        sender.submit(NtfyIOParams(topic="t", message=message))
+        for message in ["c", "d", "e", "f"]
+    ]
+    assert sender.dropped == 2
+    release.set()
+    sender.close()
+
+    messages = sorted(p["message"] for p in posted)
+    if policy == "drop_oldest":
+        assert results == [True] * 4
+        assert messages == ["a", "b", "e\nf"]
+    else:
+        assert results == [True, True, False, False]
+        assert messages == ["a", "b", "c\nd"]
+    assert sender.sent_messages == 4
+    with pytest.raises(GyvatukasException):
+        sender.submit(NtfyIOParams(topic="t", message="late"))
+
+
+def test_batch_sender_close_timeout_drops_instead_of_crashing(monkeypatch):
+    thread_errors = []
+    monkeypatch.setattr(threading, "excepthook", thread_errors.append)
+    posted = []
+    release = threading.Event()
+    ntfy = _recording_ntfy(posted)
+    post = ntfy.post
+    ntfy.post = lambda payload: release.wait(5) and post(payload)
+
+    sender = NtfyIOBatchSender(ntfy, window=0, max_concurrency=1)
+    assert sender in ntfy_io._open_batch_senders
+    # First is being sent, second waits for free sender, third stays queued.
+    for topic in ["a", "b"]:
+        sender.submit(NtfyIOParams(topic=topic, message="hi"))
+        _wait_until_taken(sender)
+    sender.submit(NtfyIOParams(topic="c", message="hi"))
+
+    sender.close(timeout=0.1)
+    assert sender not in ntfy_io._open_batch_senders
+    release.set()
+    sender._thread.join(5)
+    assert sender.flush(timeout=5)
+    assert not sender._thread.is_alive()
+    assert thread_errors == []
+    assert (sender.sent_messages, sender.dropped) == (1, 2)
+    assert sender._slots._value == 1
+
+
+def test_batch_sender_close_is_bounded_by_timeout():
+    posted = []
+    release = threading.Event()
+    ntfy = _recording_ntfy(posted)
+    post = ntfy.post
+    ntfy.post = lambda payload: release.wait(5) and post(payload)
+
+    sender = NtfyIOBatchSender(ntfy, window=0)
+    sender.submit(NtfyIOParams(topic="a", message="hi"))
+    _wait_until_taken(sender)
+
+    started = time.monotonic()
+    sender.close(timeout=0.2)
+    assert time.monotonic() - started < 1
+    release.set()
+    assert sender.flush(timeout=5)
+    assert sender.sent_messages == 1
+    assert sender._slots._value == sender.max_concurrency
+
+
+def test_batch_sender_chunks_by_merged_message_size(monkeypatch):
+    monkeypatch.setattr(NtfyIOBatchSender, "MAX_MESSAGE_BYTES", 40)
+    posted = []
+    with NtfyIOBatchSender(_recording_ntfy(posted), window=0.2) as sender:
+        for i in range(6):
+            sender.submit(
+                NtfyIOParams(topic="t", message=f"message {i}", title=f"title {i}")
+            )
+        assert sender.flush(timeout=5)
+
+    assert sender.sent_messages == 6
+    assert len(posted) > 1
+    assert all(len(p["message"].encode()) <= 40 for p in posted)
+    assert "title 0: message 0" in posted[0]["message"]
+
+
+def test_batch_sender_flushes_at_interpreter_exit():
+    script = textwrap.dedent(
+        """
+        import json
+        import httpx
+        from gyvatukas.utils.ratelimit import RateLimiter
+        from gyvatukas.www.ntfy_io import NtfyIO, NtfyIOBatchSender, NtfyIOParams
+
+        def handler(request):
+            print(json.loads(request.content)["message"], flush=True)
+            return httpx.Response(200, json={"id": "1"})
+
+        ntfy = NtfyIO(client=httpx.Client(transport=httpx.MockTransport(handler)))
+        ntfy.RATE_LIMITER = RateLimiter(100, 1, name="test", shared=False)
+        sender = NtfyIOBatchSender(ntfy, window=1.0)
+        for i in range(3):
+            sender.submit(NtfyIOParams(topic="t", message=f"m{i}"))
+        """
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=pathlib.Path(__file__).parents[2],
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["m0", "m1", "m2"]
+    assert "Traceback" not in result.stderr
@@ -0,0 +1,445 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import gyvatukas.utils.cache as cache_module
+from gyvatukas.exceptions import GyvatukasException
+from gyvatukas.utils.simplestore import DirStore
+from gyvatukas.www.openrouter_ai import (
+    AsyncOpenrouterAi,
+    OpenrouterAi,
+    OpenrouterPromptCache,
+)
+
+
+class FakeOpenrouterHandler(BaseHTTPRequestHandler):
+    """Chat completions endpoint, behaviour depends on first message content."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        content = body["messages"][0]["content"]
+        with server.lock:
+            server.calls[content] += 1
+            calls = server.calls[content]
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(0.05)
+            if content == "rate" and calls == 1:
+                self._reply(429, {"error": "slow down"}, {"Retry-After": "0"})
+            elif content == "fail":
+                self._reply(500, {"error": "boom"})
+            elif content == "slow" and calls == 1:
+                time.sleep(0.5)
+                self._reply(200, {})
+            else:
+                usage = {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}
+                self._reply(200, {"choices": [{"text": content}], "usage": usage})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _reply(self, status: int, data: dict, headers: dict | None = None):
+        payload = json.dumps(data).encode()
+        try:
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client timed out.
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenrouterHandler)
+    server.lock = threading.Lock()
+    server.calls = Counter()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def _make_client(cls, server, client):
+    api = cls(token="test", client=client, timeout=0.3, max_retries=2)
+    api.BASE_URL = f"http://127.0.0.1:{server.server_port}/api/v1"
+    api.BACKOFF_BASE = 0.01
+    return api
+
+
+def test_parse_retry_after():
+    assert OpenrouterAi._parse_retry_after("3") == 3
+    assert OpenrouterAi._parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert OpenrouterAi._parse_retry_after("garbage") is None
+    assert OpenrouterAi._parse_retry_after(None) is None
+
+
+def test_prompt_structured_many(server):
+    api = _make_client(OpenrouterAi, server, httpx.Client())
+    batch = [[{"role": "user", "content": c}] for c in ("a", "rate", "b", "fail")]
+    batch += [[{"role": "user", "content": f"x{i}"}] for i in range(6)]
+
+    results = api.prompt_structured_many(
+        model="m", messages_batch=batch, max_concurrency=3
+    )
+
+    assert results[0]["choices"][0]["text"] == "a"
+    assert results[1]["choices"][0]["text"] == "rate"
+    assert isinstance(results[3], httpx.HTTPStatusError)
+    assert server.calls["rate"] == 2
+    assert server.calls["fail"] == 3
+    assert server.max_in_flight <= 3
+
+    stats = api.get_stats()
+    assert stats["requests"] == 13
+    assert stats["retries"] == 3
+    assert stats["total_tokens"] == 5 * 9
+    assert stats["latency_max_s"] >= 0.05
+
+
+def test_post_read_timeout_is_not_retried(server):
+    """Server may have accepted POST already, retrying would bill generation twice."""
+    api = _make_client(OpenrouterAi, server, httpx.Client())
+    with pytest.raises(httpx.ReadTimeout):
+        api.prompt_structured(model="m", messages=[{"role": "user", "content": "slow"}])
+    assert server.calls["slow"] == 1
+    stats = api.get_stats()
+    assert (stats["errors"], stats["retries"]) == (1, 0)
+
+
+def test_post_connect_error_is_retried():
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200, json={"choices": [{"text": "ok"}]})
+
+    api = OpenrouterAi(
+        token="test", client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    api.BACKOFF_BASE = 0
+    result = api.prompt_simplified(model="m", prompt="hi")
+    assert result["choices"][0]["text"] == "ok"
+    assert len(attempts) == 2
+
+
+def test_async_prompt_structured_many(server):
+    async def main():
+        async with httpx.AsyncClient() as client:
+            api = _make_client(AsyncOpenrouterAi, server, client)
+            batch = [[{"role": "user", "content": f"y{i}"}] for i in range(6)]
+            results = await api.prompt_structured_many(
+                model="m", messages_batch=batch, max_concurrency=2
+            )
+            return api, results
+
+    api, results = asyncio.run(main())
+    assert [r["choices"][0]["text"] for r in results] == [f"y{i}" for i in range(6)]
+    assert server.max_in_flight <= 2
+    assert api.get_stats()["prompt_tokens"] == 18
+
+
+SSE_BODY = (
+    b": OPENROUTER PROCESSING\n\n"
+    b'data: {"choices": [{"delta": {"content": "Hel"}, "finish_reason": null}]}\n\n'
+    b'data: {"choices": [{"delta": {"content": "lo"}, "finish_reason": null}]}\n\n'
+    b'data: {"choices": [{"delta": {}, "finish_reason": "stop"}],\n'
+    b'data: "usage": {"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6}}\n\n'
+    b"data: [DONE]\n\n"
+)
+
+
+def _sse_handler(calls: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        if len(calls) == 1:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        return httpx.Response(
+            200, content=SSE_BODY, headers={"Content-Type": "text/event-stream"}
+        )
+
+    return handler
+
+
+def test_prompt_structured_stream():
+    calls = []
+    transport = httpx.MockTransport(_sse_handler(calls))
+    api = OpenrouterAi(token="test", client=httpx.Client(transport=transport))
+
+    deltas = list(
+        api.prompt_structured_stream(
+            model="m", messages=[{"role": "user", "content": "hi"}]
+        )
+    )
+
+    assert "".join(d.text for d in deltas) == "Hello"
+    assert deltas[-1].finish_reason == "stop"
+    assert deltas[-1].usage["total_tokens"] == 6
+    assert calls[-1]["stream"] is True
+    assert api.get_stats()["retries"] == 1
+    assert api.get_stats()["total_tokens"] == 6
+
+
+def test_async_prompt_simplified_stream():
+    calls = []
+    transport = httpx.MockTransport(_sse_handler(calls))
+
+    async def main():
+        api = AsyncOpenrouterAi(
+            token="test", client=httpx.AsyncClient(transport=transport)
+        )
+        return [d async for d in api.prompt_simplified_stream(model="m", prompt="hi")]
+
+    deltas = asyncio.run(main())
+    assert [d.text for d in deltas] == ["Hel", "lo", ""]
+    assert calls[-1]["prompt"] == "hi"
+
+
+def test_stream_error_event():
+    body = b'data: {"error": {"message": "overloaded"}}\n\n'
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    api = OpenrouterAi(token="test", client=httpx.Client(transport=transport))
+    with pytest.raises(GyvatukasException):
+        list(api.prompt_simplified_stream(model="m", prompt="hi"))
+    stats = api.get_stats()
+    assert (stats["requests"], stats["errors"]) == (1, 1)
+
+
+def _sse_client(body: bytes) -> OpenrouterAi:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    return OpenrouterAi(token="test", client=httpx.Client(transport=transport))
+
+
+def test_stream_last_event_without_blank_line():
+    body = (
+        b'data: {"choices": [{"text": "Hel"}]}\n\n'
+        b'data: {"choices": [{"text": "lo", "finish_reason": "stop"}]}'
+    )
+    api = _sse_client(body)
+    deltas = list(api.prompt_simplified_stream(model="m", prompt="hi"))
+    assert [d.text for d in deltas] == ["Hel", "lo"]
+    assert api.get_stats()["requests"] == 1
+
+
+def test_stream_stopped_early_is_recorded():
+    api = _sse_client(SSE_BODY)
+    stream = api.prompt_simplified_stream(model="m", prompt="hi")
+    assert next(stream).text == "Hel"
+    stream.close()
+    stats = api.get_stats()
+    assert (stats["requests"], stats["errors"]) == (1, 0)
+
+
+def _flaky_sse_handler(attempts: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200, content=SSE_BODY)
+
+    return handler
+
+
+@pytest.mark.parametrize("cls", [OpenrouterAi, AsyncOpenrouterAi])
+def test_stream_connect_error_is_retried(cls):
+    attempts = []
+    transport = httpx.MockTransport(_flaky_sse_handler(attempts))
+
+    async def collect(api):
+        return [d async for d in api.prompt_simplified_stream(model="m", prompt="hi")]
+
+    if cls is AsyncOpenrouterAi:
+        api = cls(token="test", client=httpx.AsyncClient(transport=transport))
+        api.BACKOFF_BASE = 0
+        deltas = asyncio.run(collect(api))
+    else:
+        api = cls(token="test", client=httpx.Client(transport=transport))
+        api.BACKOFF_BASE = 0
+        deltas = list(api.prompt_simplified_stream(model="m", prompt="hi"))
+
+    assert "".join(d.text for d in deltas) == "Hello"
+    assert len(attempts) == 2
+    stats = api.get_stats()
+    assert (stats["requests"], stats["retries"], stats["errors"]) == (2, 1, 1)
+
+
+def test_stream_connect_error_is_recorded():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("refused")
+
+    transport = httpx.MockTransport(handler)
+    api = OpenrouterAi(token="test", client=httpx.Client(transport=transport))
+    api.BACKOFF_BASE = 0
+    api.max_retries = 1
+    with pytest.raises(httpx.ConnectError):
+        list(api.prompt_simplified_stream(model="m", prompt="hi"))
+    stats = api.get_stats()
+    assert (stats["requests"], stats["retries"], stats["errors"]) == (2, 1, 2)
+
+
+MODELS = {
+    "data": [
+        {
+            "id": "google/gemini-2.5-flash",
+            "context_length": 1048576,
+            "pricing": {"prompt": "0.0000003", "completion": "0.0000025"},
+        },
+        {"id": "openai/gpt-4o", "context_length": 128000},
+    ]
+}
+
+
+def test_model_index(app_cache):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json=MODELS)
+
+    api = OpenrouterAi(
+        token="test", client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+
+    assert api.is_model_available("openai/gpt-4o")
+    assert not api.is_model_available("nope/nope")
+    assert api.get_model_context_length("google/gemini-2.5-flash") == 1048576
+    assert api.get_model_pricing("google/gemini-2.5-flash")["prompt"] == "0.0000003"
+    assert api.get_model_pricing("openai/gpt-4o") is None
+    assert api.get_model("nope/nope") is None
+    assert calls == ["/api/v1/models"]
+
+    assert api.is_model_available("openai/gpt-4o", refresh=True)
+    assert len(calls) == 2
+    # Without cache=True nothing is persisted.
+    assert list(app_cache.iterkeys()) == []
+
+    # With cache=True catalogue is shared through app cache.
+    cached = OpenrouterAi(
+        token="test",
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        cache=True,
+    )
+    assert cached.get_model("openai/gpt-4o")["context_length"] == 128000
+    assert len(calls) == 3
+    assert list(app_cache.iterkeys())
+    cache_module._tiered_caches.clear()
+    other = OpenrouterAi(
+        token="other",
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        cache=True,
+    )
+    assert other.get_model("openai/gpt-4o")["context_length"] == 128000
+    assert len(calls) == 3
+
+
+def test_async_model_index(app_cache):
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=MODELS))
+
+    async def main():
+        api = AsyncOpenrouterAi(
+            token="test", client=httpx.AsyncClient(transport=transport)
+        )
+        return (
+            await api.is_model_available("openai/gpt-4o"),
+            await api.get_model_context_length("openai/gpt-4o"),
+        )
+
+    assert asyncio.run(main()) == (True, 128000)
+
+
+def _completion_handler(calls: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        return httpx.Response(
+            200, json={"choices": [{"message": {"content": f"#{len(calls)}"}}]}
+        )
+
+    return handler
+
+
+def test_prompt_cache(tmp_path):
+    calls = []
+    cache = OpenrouterPromptCache(DirStore(tmp_path), max_entries=2)
+    api = OpenrouterAi(
+        token="test",
+        client=httpx.Client(transport=httpx.MockTransport(_completion_handler(calls))),
+        prompt_cache=cache,
+    )
+    messages = [{"role": "user", "content": "hi"}]
+
+    first = api.prompt_structured(model="m", messages=messages)
+    assert api.prompt_structured(model="m", messages=messages) == first
+    assert len(calls) == 1
+    # Any param change is a different request.
+    api.prompt_structured(model="m", messages=messages, max_tokens=5)
+    api.prompt_structured(model="m", messages=messages, use_cache=False)
+    assert len(calls) == 3
+    api.prompt_simplified(model="m", prompt="hi")
+    assert (
+        api.prompt_simplified(model="m", prompt="hi")["choices"][0]["message"][
+            "content"
+        ]
+        == "#4"
+    )
+    assert len(calls) == 4
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+    # First prompt was least recently used and got evicted.
+    api.prompt_structured(model="m", messages=messages)
+    assert len(calls) == 5
+
+    # Index is rebuilt from store, also without flush.
+    reopened = OpenrouterPromptCache(DirStore(tmp_path), max_entries=2)
+    assert reopened.get_stats()["entries"] == 2
+    cache.flush()
+    reopened = OpenrouterPromptCache(DirStore(tmp_path), max_entries=2)
+    assert reopened.get(cache.make_key("/completions", {"model": "m", "prompt": "hi"}))
+
+
+def test_prompt_cache_max_bytes(tmp_path):
+    cache = OpenrouterPromptCache(DirStore(tmp_path), max_bytes=100)
+    cache.set("a", {"text": "x" * 60})
+    cache.set("b", {"text": "y" * 60})
+    assert cache.get("a") is None
+    assert cache.get("b") == {"text": "y" * 60}
+    assert cache.get_stats()["bytes"] <= 100
+
+
+def test_async_prompt_cache(tmp_path):
+    calls = []
+    transport = httpx.MockTransport(_completion_handler(calls))
+
+    async def main():
+        api = AsyncOpenrouterAi(
+            token="test",
+            client=httpx.AsyncClient(transport=transport),
+            prompt_cache=OpenrouterPromptCache(DirStore(tmp_path)),
+        )
+        return [await api.prompt_simplified(model="m", prompt="hi") for _ in range(3)]
+
+    results = asyncio.run(main())
+    assert results[0] == results[2]
+    assert len(calls) == 1
@@ -1,5 +1,10 @@
+import asyncio
+
+import httpx
 import pytest
-from gyvatukas.www.powerhitradio_lt import PowerHitRadioLt
+
+from gyvatukas.utils.ratelimit import RateLimiter
+from gyvatukas.www.powerhitradio_lt import AsyncPowerHitRadioLt, PowerHitRadioLt
 
 
 class TestPowerHitRadioLt:
@@ -18,3 +23,79 @@ class TestPowerHitRadioLt:
 
         assert isinstance(result, dict)
         assert len(result) > 0
+
+
+def test_async_get_currently_playing():
+    """Async client shares request building and parsing with sync one."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert str(request.url) == PowerHitRadioLt.URL_CURRENTLY_PLAYING
+        return httpx.Response(200, json={"artist": "a", "title": "b"})
+
+    client = AsyncPowerHitRadioLt(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    client.RATE_LIMITER = RateLimiter(1, 1, name="test", shared=False)
+    assert asyncio.run(client.get_currently_playing()) == {"artist": "a", "title": "b"}
+
+
+def _fake_radio(requests: list) -> httpx.MockTransport:
+    """Serves song a with etag, then 304, a without etag, server error and song b."""
+    responses = [
+        httpx.Response(200, json={"title": "a"}, headers={"ETag": '"1"'}),
+        httpx.Response(304),
+        httpx.Response(200, json={"title": "a"}),
+        httpx.Response(500),
+        httpx.Response(200, json={"title": "b"}),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+
+    return httpx.MockTransport(handler)
+
+
+def test_watch_yields_changes_only(monkeypatch):
+    monkeypatch.setattr(
+        PowerHitRadioLt, "RATE_LIMITER", RateLimiter(100, 1, name="test", shared=False)
+    )
+    sleeps = []
+    monkeypatch.setattr(
+        "gyvatukas.www.powerhitradio_lt.time.sleep", lambda s: sleeps.append(s)
+    )
+    requests = []
+    client = PowerHitRadioLt(client=httpx.Client(transport=_fake_radio(requests)))
+
+    watcher = client.watch(min_interval=1, max_interval=10, backoff=2)
+    assert next(watcher) == {"title": "a"}
+    assert next(watcher) == {"title": "b"}
+    assert len(requests) == 5
+    assert requests[1].headers["If-None-Match"] == '"1"'
+    assert "If-None-Match" not in requests[3].headers
+    # Backs off while unchanged, waits longest after error.
+    assert sleeps == [1, 2, 4, 10]
+
+    with pytest.raises(ValueError):
+        next(client.watch(min_interval=10, max_interval=1))
+
+
+def test_async_watch(monkeypatch):
+    monkeypatch.setattr(
+        PowerHitRadioLt, "RATE_LIMITER", RateLimiter(100, 1, name="test", shared=False)
+    )
+    requests = []
+
+    async def main():
+        client = AsyncPowerHitRadioLt(
+            client=httpx.AsyncClient(transport=_fake_radio(requests))
+        )
+        songs = []
+        async for song in client.watch(min_interval=0, max_interval=0):
+            songs.append(song)
+            if len(songs) == 2:
+                break
+        return songs
+
+    assert asyncio.run(main()) == [{"title": "a"}, {"title": "b"}]
+    assert len(requests) == 5